@@ -0,0 +1,150 @@
+"""
+Stand-in executables for the EDA tools called by the flows, so the flows can be
+run end to end without any vendor tools installed.
+
+Each fake tool logs its call, sleeps for a configurable latency, writes a
+configurable number of log lines and creates the output files the flows and
+Makefiles expect, e.g. the file given with `-o` or the `simv` executable of
+VCS. The fake tools are configured with environment variables, so they can be
+changed without reinstalling them:
+
+    FAKETOOLS_LATENCY       Seconds each call takes, default 0.
+    FAKETOOLS_LINES         Number of log lines each call writes, default 10.
+    FAKETOOLS_FAIL          Comma separated list of tools which fail.
+    FAKETOOLS_LOG           File the calls are appended to as JSON lines.
+
+The latency and the number of lines can be set for a single tool by inserting
+the tool name in upper case, e.g. FAKETOOLS_VSIM_LATENCY=2.
+
+Usage:
+    python benchmarks/faketools.py --flow modelsim --flow quartus BINDIR
+    PATH=BINDIR:$PATH FAKETOOLS_LATENCY=0.5 simpl modelsim
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Iterable
+
+__all__ = ["TOOLS", "install", "read_log"]
+
+TOOLS = {
+    "encrypt": ["encrypt_1735"],
+    "icarus": ["iverilog", "vvp"],
+    "modelsim": ["vcom", "vdir", "vlib", "vlog", "vmap", "vopt", "vsim"],
+    "quartus": ["qsys-generate", "quartus", "quartus_dse", "quartus_dsew", "quartus_ipgenerate", "quartus_sh"],
+    "questasim": ["qrun", "visualizer"],
+    "rivierapro": ["vcom", "vdir", "vlib", "vlog", "vmap", "vsim"],
+    "vcs": ["vcs", "vhdlan", "vlogan"],
+    "vivado": ["vivado"],
+    "xsim": ["xelab", "xsim", "xvhdl", "xvlog"],
+}
+
+VERSIONS = {
+    "qrun": "QuestaSim-64 qrun 2024.1 Utility 2024.01 Jan  6 2024",
+    "quartus_sh": "Quartus Prime Shell\nVersion 24.1.0 Build 115 03/21/2024 SC Pro Edition",
+    "vsim": "Questa Sim-64 vsim 2024.1 Simulator 2024.01 Jan  6 2024",
+}
+
+SCRIPT = """#!{python} -S
+import sys
+sys.path.insert(0, {directory!r})
+from faketools import main
+sys.exit(main({tool!r}, sys.argv[1:]))
+"""
+
+
+def setting(tool: str, name: str, default: str) -> str:
+    key = re.sub(r"\W", "_", tool.upper())
+    return os.environ.get(f"FAKETOOLS_{key}_{name}", os.environ.get(f"FAKETOOLS_{name}", default))
+
+
+def create_outputs(tool: str, args: list[str]) -> None:
+    if "-o" in args[:-1]:
+        output = Path(args[args.index("-o") + 1])
+        if tool == "vcs":
+            install_tool(output.parent, "simv", output.name)
+        else:
+            output.write_text(f"{tool}\n")
+    elif tool == "vcs":
+        install_tool(Path.cwd(), "simv")
+    elif tool == "vlib" and args:
+        Path(args[-1]).mkdir(parents=True, exist_ok=True)
+    elif tool == "quartus_sh" and args[:2] == ["-t", "project.tcl"]:
+        m = re.search(r'^project_new .*"(\S+)"$', Path("project.tcl").read_text(), re.MULTILINE)
+        if m:
+            Path(f"{m.group(1)}.qsf").write_text(f"{tool}\n")
+
+
+def main(tool: str, args: list[str]) -> int:
+    start = time.time()
+    if any(arg in ("-version", "--version") for arg in args):
+        print(VERSIONS.get(tool, f"{tool} 1.0"))
+        return 0
+    if tool == "vdir":
+        print("MODULE")
+        return 0
+    time.sleep(float(setting(tool, "LATENCY", "0")))
+    for i in range(int(setting(tool, "LINES", "10"))):
+        print(f"# {tool}: line {i + 1}")
+    failed = tool in os.environ.get("FAKETOOLS_FAIL", "").split(",")
+    if failed:
+        print(f"# ** Error: {tool}: failed")
+    else:
+        create_outputs(tool, args)
+    sys.stdout.flush()
+    logfile = os.environ.get("FAKETOOLS_LOG")
+    if logfile:
+        call = {"tool": tool, "args": args, "cwd": os.getcwd(), "start": start, "end": time.time()}
+        with open(logfile, "a") as f:
+            f.write(json.dumps(call) + "\n")
+    return 1 if failed else 0
+
+
+def install_tool(bindir: Path, tool: str, name: str | None = None) -> Path:
+    path = bindir.joinpath(name or tool)
+    path.write_text(SCRIPT.format(python=sys.executable, directory=str(Path(__file__).parent.absolute()), tool=tool))
+    path.chmod(0o755)
+    return path
+
+
+def install(bindir: Path, flows: Iterable[str] | None = None) -> list[Path]:
+    """
+    Install fake tools in a directory and return their paths.
+
+    Args:
+        bindir: Directory the fake tools are installed in. Prepend it to PATH
+            to use the fake tools.
+        flows: Install the tools of these flows, or of all flows if None.
+    """
+    tools = sorted({tool for flow in (flows or TOOLS) for tool in TOOLS[flow]})
+    bindir.mkdir(parents=True, exist_ok=True)
+    return [install_tool(bindir, tool) for tool in tools]
+
+
+def read_log(logfile: Path) -> list[dict]:
+    """
+    Read the calls logged by the fake tools.
+    """
+    if not logfile.exists():
+        return []
+    return [json.loads(line) for line in logfile.read_text().splitlines()]
+
+
+def cli() -> None:
+    parser = argparse.ArgumentParser(description="Install fake EDA tools")
+    parser.add_argument("--flow", action="append", choices=sorted(TOOLS), help="Install the tools of a flow")
+    parser.add_argument("bindir", type=Path, help="Directory the tools are installed in")
+    args = parser.parse_args()
+    for path in install(args.bindir, args.flow):
+        print(path)
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,249 @@
+"""
+Benchmarks of the project model and the simulation flows on a synthetic
+project. No EDA tools are needed, the flows only generate their build files,
+or with --execute run end to end with the fake tools from faketools.py. The
+time of a flow run is then split into the time spent in the tools and the
+overhead of simplhdl and make.
+
+The results are written as JSON with sorted keys, so results from different
+runs and versions can be compared with a plain diff or loaded by a script.
+
+Usage:
+    python benchmarks/run.py --cores 100 --files 20 --fanout 3 --libraries 4 --output results.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Callable
+
+import faketools
+from synthetic import generate_project
+
+from simplhdl import __version__
+from simplhdl.cli.arguments import parse_arguments
+from simplhdl.cocotb import Cocotb
+from simplhdl.plugin.flow import FlowFactory
+from simplhdl.plugin.parser import ParserFactory
+from simplhdl.project.attributes import Library
+from simplhdl.project.design import Design
+from simplhdl.project.files import SystemVerilogFile
+from simplhdl.project.fileset import FileOrder
+from simplhdl.project.project import Project
+from simplhdl.utils import md5sum
+from simplhdl_icarus.icarusflow import IcarusFlow
+from simplhdl_modelsim.modelsim.modelsimflow import ModelSimFlow
+from simplhdl_parser.simplhdlparser import SimplHdlParser
+from simplhdl_questasim.questasim.questasimflow import QuestaSimFlow
+from simplhdl_vcs.vcs.vcsflow import VcsFlow
+from simplhdl_vivado.xsim.xsimflow import XsimFlow
+
+SCHEMA = 1
+
+# NOTE: The Riviera-PRO flow can't generate its files, it calls the missing
+#       method get_libraries().
+FLOWS = {
+    "icarus": IcarusFlow,
+    "modelsim": ModelSimFlow,
+    "questasim": QuestaSimFlow,
+    "vcs": VcsFlow,
+    "xsim": XsimFlow,
+}
+
+
+def register() -> None:
+    if "simplhdl_parser" not in ParserFactory.registry:
+        ParserFactory.register("simplhdl_parser", SimplHdlParser)
+    for name, flow in FLOWS.items():
+        if name not in FlowFactory.registry:
+            FlowFactory.register(name, flow)
+
+
+def parse(spec: Path) -> Project:
+    project = Project("default")
+    project.add_design(Design("default"))
+    project.defaultDesign.defaultLibrary = Library("work")
+    parser = ParserFactory().get_parser(spec)
+    project.defaultDesign.add_fileset(parser.parse(spec, project, parse_arguments(["modelsim"])))
+    return project
+
+
+def elaborate(spec: Path) -> Project:
+    project = parse(spec)
+    project.elaborate()
+    project.validate()
+    return project
+
+
+def summarize(times: list[float]) -> dict:
+    return {
+        "max": round(max(times), 6),
+        "mean": round(statistics.mean(times), 6),
+        "median": round(statistics.median(times), 6),
+        "min": round(min(times), 6),
+        "repeat": len(times),
+    }
+
+
+def measure(function: Callable[[], object], repeat: int, setup: Callable[[], object] | None = None) -> dict:
+    times = list()
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return summarize(times)
+
+
+def benchmark_project(spec: Path, repeat: int) -> dict[str, dict]:
+    results = dict()
+    results["project.parse"] = measure(lambda: parse(spec), repeat)
+    project = parse(spec)
+    results["project.elaborate"] = measure(lambda: (project.elaborate(), project.validate()), repeat)
+    design = project.defaultDesign
+    for order in (FileOrder.COMPILE, FileOrder.HIERARCHY, FileOrder.STRATA):
+        name = f"design.files.{order.name.lower()}"
+        results[name] = measure(lambda order=order: design.files(order=order), repeat)
+    results["design.files.type"] = measure(lambda: design.files(type=SystemVerilogFile), repeat)
+    fileset = design.filesets()[-1]
+    results["fileset.files.compile"] = measure(lambda: fileset.files(order=FileOrder.COMPILE), repeat)
+    paths = [f.path for f in design.files()]
+    results["hash.files"] = measure(lambda: md5sum(*paths), repeat)
+    return results
+
+
+def benchmark_flows(spec: Path, workdir: Path, repeat: int) -> dict[str, dict]:
+    results = dict()
+    for name in FLOWS:
+        project = elaborate(spec)
+        builddir = workdir.joinpath(name)
+        args = parse_arguments([name])
+        flow = FlowFactory.get_flow(name, args, project, builddir)
+        flow.cocotb = Cocotb(project, args.seed)
+        # NOTE: The tool version is read from the tool in configure()
+        flow.version = 2024.1
+
+        def clean(builddir=builddir):
+            shutil.rmtree(builddir, ignore_errors=True)
+            builddir.mkdir(parents=True)
+
+        results[f"generate.{name}"] = measure(flow.generate, repeat, setup=clean)
+        # NOTE: Regenerating an unchanged project is the common case when
+        #       iterating on a design.
+        results[f"regenerate.{name}"] = measure(flow.generate, repeat)
+        results[f"hash.filesets.{name}"] = measure(flow.is_filesets_changed, repeat)
+    return results
+
+
+def execute_flow(name: str, spec: Path, builddir: Path, logfile: Path, repeat: int) -> list[tuple[float, float]]:
+    """
+    Run a flow end to end and return the total time and the time spent in
+    the tools of each run.
+    """
+    args = parse_arguments([name, "--step", "simulate"])
+    runs = list()
+    for _ in range(repeat):
+        shutil.rmtree(builddir, ignore_errors=True)
+        logfile.unlink(missing_ok=True)
+        flow = FlowFactory.get_flow(name, args, elaborate(spec), builddir)
+        start = time.perf_counter()
+        flow.run()
+        total = time.perf_counter() - start
+        tools = sum(call["end"] - call["start"] for call in faketools.read_log(logfile))
+        runs.append((total, tools))
+    return runs
+
+
+def benchmark_execute(spec: Path, workdir: Path, repeat: int, latency: float, lines: int) -> dict[str, dict]:
+    results = dict()
+    bindir = workdir.joinpath("bin")
+    logfile = workdir.joinpath("faketools.log")
+    faketools.install(bindir, FLOWS)
+    environ = os.environ.copy()
+    os.environ["PATH"] = f"{bindir}{os.pathsep}{os.environ['PATH']}"
+    os.environ["FAKETOOLS_LATENCY"] = str(latency)
+    os.environ["FAKETOOLS_LINES"] = str(lines)
+    os.environ["FAKETOOLS_LOG"] = str(logfile)
+    # NOTE: The flows echo the tool output on stdout, which may be where the
+    #       results are written.
+    output = io.TextIOWrapper(workdir.joinpath("execute.log").open("wb"))
+    try:
+        for name in FLOWS:
+            with redirect_stdout(output):
+                runs = execute_flow(name, spec, workdir.joinpath("execute", name), logfile, repeat)
+            # NOTE: The start up time of the fake tools is part of the
+            #       overhead, as the tools only log the time they run.
+            results[f"execute.{name}"] = summarize([total for total, _ in runs])
+            results[f"execute.{name}.tools"] = summarize([tools for _, tools in runs])
+            results[f"execute.{name}.overhead"] = summarize([total - tools for total, tools in runs])
+    finally:
+        output.close()
+        os.environ.clear()
+        os.environ.update(environ)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark SimplHDL on a synthetic project")
+    parser.add_argument("--cores", type=int, default=50, help="Number of cores")
+    parser.add_argument("--files", type=int, default=20, help="Number of files in each core")
+    parser.add_argument("--fanout", type=int, default=3, help="Number of cores each core depends on")
+    parser.add_argument("--libraries", type=int, default=4, help="Number of libraries")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the choice of dependencies")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of times each benchmark is run")
+    parser.add_argument("--no-flows", action="store_true", help="Skip the simulation flow benchmarks")
+    parser.add_argument("--execute", action="store_true", help="Run the simulation flows with fake tools")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds each fake tool call takes")
+    parser.add_argument("--lines", type=int, default=10, help="Number of log lines each fake tool call writes")
+    parser.add_argument("-o", "--output", type=Path, help="Write results to file instead of stdout")
+    args = parser.parse_args()
+
+    register()
+    parameters = {
+        "cores": args.cores,
+        "fanout": args.fanout,
+        "files": args.files,
+        "libraries": args.libraries,
+        "seed": args.seed,
+    }
+    with tempfile.TemporaryDirectory(prefix="simplhdl-bench-") as tmpdir:
+        workdir = Path(tmpdir)
+        spec = generate_project(workdir.joinpath("project"), **parameters)
+        results = benchmark_project(spec, args.repeat)
+        if not args.no_flows:
+            results.update(benchmark_flows(spec, workdir.joinpath("build"), args.repeat))
+        if args.execute:
+            results.update(benchmark_execute(spec, workdir, args.repeat, args.latency, args.lines))
+
+    report = {
+        "benchmarks": results,
+        "environment": {
+            "machine": platform.machine(),
+            "python": platform.python_version(),
+            "simplhdl": __version__,
+            "system": platform.system(),
+        },
+        "parameters": dict(parameters, latency=args.latency, lines=args.lines) if args.execute else parameters,
+        "schema": SCHEMA,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True) + "\n"
+    if args.output is None:
+        sys.stdout.write(text)
+    else:
+        args.output.write_text(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Generate synthetic SimplHDL projects for benchmarking.
+
+A project consists of a number of cores, each with its own core file and a
+number of SystemVerilog files. The first file of a core is a package, the
+other files are modules importing the package and instantiating the module
+before them. The first module of a core instantiates the last module of each
+core it depends on. Each core depends on the previous core, so all cores are
+part of the project, and on up to `fanout - 1` other earlier cores.
+
+Usage:
+    python benchmarks/synthetic.py --cores 100 --files 20 --fanout 3 --libraries 4 OUTPUT
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+from pathlib import Path
+
+__all__ = ["generate_project"]
+
+FORMAT_ID = "#%SimplAPI=1.0"
+
+
+def core_name(core: int) -> str:
+    return f"core{core:04d}"
+
+
+def module_name(core: int, index: int) -> str:
+    return f"c{core:04d}_m{index:04d}"
+
+
+def package_name(core: int) -> str:
+    return f"c{core:04d}_pkg"
+
+
+def core_dependencies(core: int, fanout: int, rng: random.Random) -> list[int]:
+    if core == 0 or fanout < 1:
+        return []
+    others = rng.sample(range(core - 1), min(fanout - 1, core - 1))
+    return [core - 1] + sorted(others)
+
+
+def write_package(path: Path, core: int) -> None:
+    path.write_text(f"package {package_name(core)};\n  parameter int WIDTH = {8 + core % 8};\nendpackage\n")
+
+
+def write_module(path: Path, core: int, index: int, instances: list[str]) -> None:
+    lines = [
+        f"module {module_name(core, index)}",
+        f"  import {package_name(core)}::*;",
+        "(",
+        "  input logic clk,",
+        "  input logic [WIDTH-1:0] a,",
+        "  output logic [WIDTH-1:0] y",
+        ");",
+    ]
+    for i, instance in enumerate(instances):
+        lines.append(f"  {instance} u{i} (.clk(clk), .a(a), .y());")
+    lines += ["  always_ff @(posedge clk) y <= a;", "endmodule", ""]
+    path.write_text("\n".join(lines))
+
+
+def write_core(path: Path, files: list[str], dependencies: list[Path], library: str | None, top: str | None) -> None:
+    lines = [FORMAT_ID, ""]
+    if library:
+        lines.append(f"library: {library}")
+    if dependencies:
+        lines.append("dependencies:")
+        lines += [f"  - {dependency}" for dependency in dependencies]
+    lines.append("files:")
+    lines += [f"  - {file}" for file in files]
+    if top:
+        lines.append(f"top: {top}")
+    lines.append("")
+    path.write_text("\n".join(lines))
+
+
+def generate_project(
+    directory: Path,
+    cores: int = 10,
+    files: int = 10,
+    fanout: int = 2,
+    libraries: int = 1,
+    seed: int = 1,
+) -> Path:
+    """
+    Generate a synthetic project in a directory and return the path of the
+    top level core file.
+
+    Args:
+        directory: Output directory.
+        cores: Number of cores.
+        files: Number of HDL files in each core, at least 2.
+        fanout: Number of cores each core depends on.
+        libraries: Number of libraries the cores are spread over.
+        seed: Seed for the choice of dependencies.
+    """
+    if cores < 1 or files < 2:
+        raise ValueError("A project needs at least 1 core with 2 files")
+    rng = random.Random(seed)
+    top = None
+    for core in range(cores):
+        name = core_name(core)
+        coredir = directory.joinpath(name)
+        coredir.mkdir(parents=True, exist_ok=True)
+        dependencies = core_dependencies(core, fanout, rng)
+        filenames = [f"{package_name(core)}.sv"]
+        write_package(coredir.joinpath(filenames[0]), core)
+        for index in range(1, files):
+            if index == 1:
+                instances = [module_name(d, files - 1) for d in dependencies]
+            else:
+                instances = [module_name(core, index - 1)]
+            filename = f"{module_name(core, index)}.sv"
+            write_module(coredir.joinpath(filename), core, index, instances)
+            filenames.append(filename)
+        library = f"lib{core % libraries}" if libraries > 1 else None
+        is_top = core == cores - 1
+        top = coredir.joinpath(f"{name}.yml")
+        write_core(
+            top,
+            filenames,
+            [Path("..", core_name(d), f"{core_name(d)}.yml") for d in dependencies],
+            library,
+            module_name(core, files - 1) if is_top else None,
+        )
+    return top
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic SimplHDL project")
+    parser.add_argument("--cores", type=int, default=10, help="Number of cores")
+    parser.add_argument("--files", type=int, default=10, help="Number of files in each core")
+    parser.add_argument("--fanout", type=int, default=2, help="Number of cores each core depends on")
+    parser.add_argument("--libraries", type=int, default=1, help="Number of libraries")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the choice of dependencies")
+    parser.add_argument("output", type=Path, help="Output directory")
+    args = parser.parse_args()
+    top = generate_project(args.output, args.cores, args.files, args.fanout, args.libraries, args.seed)
+    print(top)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,32 @@
 from __future__ import annotations
 
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .cli.arguments import parse_arguments
+    from .project.design import Design
+    from .project.fileset import FileOrder, Fileset, FilesetOrder
+    from .project.project import Project, ProjectError
+
 __version__ = "0.12.1"
 
-from .__main__ import parse_arguments
-from .project.design import *
-from .project.fileset import *
-from .project.project import *
+__all__ = ["Design", "FileOrder", "Fileset", "FilesetOrder", "Project", "ProjectError", "parse_arguments"]
+
+# NOTE: The project model is imported on first use, so the command line can
+#       hand a command over to the daemon without loading it.
+_modules = {
+    "Design": ".project.design",
+    "FileOrder": ".project.fileset",
+    "Fileset": ".project.fileset",
+    "FilesetOrder": ".project.fileset",
+    "Project": ".project.project",
+    "ProjectError": ".project.project",
+    "parse_arguments": ".cli.arguments",
+}
+
+
+def __getattr__(name: str):
+    if name in _modules:
+        return getattr(importlib.import_module(_modules[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -3,4 +3,17 @@ try:
 except ImportError:
     from importlib_resources import files as resources_files
 
-__all__ = ["resources_files"]
+from pathlib import PurePath
+
+__all__ = ["is_relative_to", "resources_files"]
+
+
+def is_relative_to(path: PurePath, other: PurePath) -> bool:
+    """
+    PurePath.is_relative_to, which is new in Python 3.9.
+    """
+    try:
+        path.relative_to(other)
+    except ValueError:
+        return False
+    return True
@@ -0,0 +1,4 @@
+from .local import LocalBackend
+from .queue import QueueBackend
+
+__all__ = ["LocalBackend", "QueueBackend"]
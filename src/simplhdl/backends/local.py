@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator
+
+from ..plugin.backend import BackendBase, Job, JobResult, execute
+
+__all__ = ["LocalBackend"]
+
+logger = logging.getLogger(__name__)
+
+GB = 1024**3
+
+# NOTE: Seconds a started job is assumed to take to allocate the memory it
+#       needs, e.g. while a compile reads its database.
+MEMORY_RAMP = 60.0
+
+
+def available_memory() -> int | None:
+    """
+    Get the memory available for new processes on this host in bytes, or None
+    if it isn't known.
+    """
+    try:
+        with Path("/proc/meminfo").open() as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class LocalBackend(BackendBase):
+    """
+    Run jobs as processes on this host, a limited number at a time.
+    """
+
+    def __init__(self, name: str, args: Namespace) -> None:
+        super().__init__(name, args)
+        self.stopped = threading.Event()
+        self.condition = threading.Condition()
+        self.running = 0
+        self.started: list[float] = list()
+
+    @classmethod
+    def parse_args(cls, parser) -> None:
+        parser.add_argument(
+            "-j",
+            "--jobs",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of jobs run in parallel by the local backend (default: number of CPUs)",
+        )
+        parser.add_argument(
+            "--job-memory",
+            type=float,
+            metavar="GB",
+            help="Memory each job needs, no job is started by the local backend unless it is available",
+        )
+
+    def run(self, jobs: list[Job]) -> Iterator[JobResult]:
+        workers = max(1, min(getattr(self.args, "jobs", None) or 1, len(jobs)))
+        memory = getattr(self.args, "job_memory", None)
+        available = available_memory() if memory else None
+        if available is not None:
+            workers = max(1, min(workers, int(available // (memory * GB))))
+        logger.info(f"Running {len(jobs)} jobs, {workers} at a time")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self.execute, job) for job in jobs]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            except BaseException:
+                self.cancel()
+                raise
+
+    def execute(self, job: Job) -> JobResult:
+        self.throttle()
+        try:
+            return execute(job, self.stopped)
+        finally:
+            with self.condition:
+                self.running -= 1
+                self.condition.notify_all()
+
+    def throttle(self) -> None:
+        """
+        Wait until the memory a job needs is available, or no other job is
+        running. The jobs started before may not have allocated their memory
+        yet, so it is reserved for them until they have run for a while.
+        """
+        memory = getattr(self.args, "job_memory", None)
+        with self.condition:
+            while memory and self.running and not self.stopped.is_set():
+                self.started = [t for t in self.started if time.monotonic() - t < MEMORY_RAMP]
+                available = available_memory()
+                if available is None or available - len(self.started) * memory * GB >= memory * GB:
+                    break
+                self.condition.wait(timeout=1.0)
+            self.running += 1
+            self.started.append(time.monotonic())
+
+    def cancel(self) -> None:
+        self.stopped.set()
@@ -0,0 +1,250 @@
+"""
+A job queue in a directory shared by a pool of hosts, e.g. on NFS. Jobs are
+written to the queue as JSON files and run by workers, which are started on
+the hosts with ssh, or as local processes on this host. A worker claims a job
+by renaming its file, which is atomic, so each job runs once.
+
+    <queue>/pending/<id>.json   Jobs waiting for a worker
+    <queue>/running/<id>.json   Jobs claimed by a worker
+    <queue>/done/<id>.json      Results of finished jobs
+    <queue>/cancel/<id>         Jobs to stop
+    <queue>/workers/<host>.log  Output of the workers
+
+Workers can also be started by hand, or kept running, with
+
+    python -m simplhdl.backends.queue QUEUE --slots 8 --wait
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from argparse import Namespace
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterator
+
+from ..plugin.backend import BackendBase, BackendError, Job, JobResult, JobStatus, execute
+
+__all__ = ["QueueBackend", "Worker"]
+
+logger = logging.getLogger(__name__)
+
+LOCALHOSTS = ("localhost", "127.0.0.1", socket.gethostname())
+
+
+def write_json(path: Path, data: dict[str, Any]) -> None:
+    """
+    Write a file of the queue. The file is written next to its destination
+    and renamed, so readers never see a partial file.
+    """
+    tmpfile = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmpfile.write_text(json.dumps(data))
+    os.replace(tmpfile, path)
+
+
+def parse_hosts(hosts: str) -> list[tuple[str, int]]:
+    """
+    Parse a list of hosts like 'node1:8,node2:8,localhost'. A host without a
+    number of slots gets one slot per CPU of this host.
+    """
+    result = list()
+    for host in hosts.split(","):
+        name, _, slots = host.strip().partition(":")
+        if not name:
+            continue
+        try:
+            result.append((name, int(slots) if slots else os.cpu_count() or 1))
+        except ValueError:
+            raise BackendError(f"Invalid number of slots in host '{host}'")
+    return result
+
+
+class Queue:
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory.absolute()
+        self.pending = self.directory.joinpath("pending")
+        self.running = self.directory.joinpath("running")
+        self.done = self.directory.joinpath("done")
+        self.cancelled = self.directory.joinpath("cancel")
+        self.workers = self.directory.joinpath("workers")
+        for subdirectory in (self.pending, self.running, self.done, self.cancelled, self.workers):
+            subdirectory.mkdir(parents=True, exist_ok=True)
+
+
+class Worker:
+    """
+    Run the jobs of a queue, a number of jobs at a time, until the queue is
+    empty, or forever if `wait` is set.
+    """
+
+    def __init__(self, directory: Path, slots: int = 1, wait: bool = False, interval: float = 0.5) -> None:
+        self.queue = Queue(directory)
+        self.slots = max(1, slots)
+        self.wait = wait
+        self.interval = interval
+        self.active: dict[str, tuple[Future, threading.Event]] = dict()
+
+    def claim(self) -> tuple[str, Job] | None:
+        for path in sorted(self.queue.pending.glob("*.json")):
+            running = self.queue.running.joinpath(path.name)
+            try:
+                os.rename(path, running)
+            except FileNotFoundError:
+                # NOTE: Claimed by another worker.
+                continue
+            return path.stem, Job.from_dict(json.loads(running.read_text()))
+        return None
+
+    def work(self, id: str, job: Job, stopped: threading.Event) -> None:
+        logger.info(f"Run {job.name}")
+        result = execute(job, stopped)
+        write_json(self.queue.done.joinpath(f"{id}.json"), result.to_dict())
+        self.queue.running.joinpath(f"{id}.json").unlink(missing_ok=True)
+        logger.info(f"{job.name} {result.status.value} ({result.duration:.1f}s)")
+
+    def run(self) -> None:
+        with ThreadPoolExecutor(max_workers=self.slots) as pool:
+            while True:
+                for id, (future, stopped) in list(self.active.items()):
+                    if future.done():
+                        del self.active[id]
+                        future.result()
+                    elif self.queue.cancelled.joinpath(id).exists():
+                        stopped.set()
+                while len(self.active) < self.slots:
+                    claimed = self.claim()
+                    if claimed is None:
+                        break
+                    id, job = claimed
+                    stopped = threading.Event()
+                    self.active[id] = (pool.submit(self.work, id, job, stopped), stopped)
+                if not self.active and not self.wait:
+                    break
+                time.sleep(self.interval)
+
+
+class QueueBackend(BackendBase):
+    """
+    Run jobs on a pool of hosts through a job queue in a shared directory.
+    """
+
+    def __init__(self, name: str, args: Namespace) -> None:
+        super().__init__(name, args)
+        queue = getattr(args, "queue", None)
+        if queue is None:
+            queue = Path(getattr(args, "outputdir", "_build")).joinpath("queue")
+        self.queue = Queue(Path(queue))
+        self.hosts = parse_hosts(getattr(args, "hosts", None) or "localhost")
+        self.ssh = getattr(args, "ssh", None) or "ssh"
+        self.python = getattr(args, "remote_python", None) or "python3"
+        self.start_workers = not getattr(args, "no_workers", False)
+        self.jobs: dict[str, Job] = dict()
+        self.workers: list[subprocess.Popen] = list()
+
+    @classmethod
+    def parse_args(cls, parser) -> None:
+        parser.add_argument("--queue", type=Path, help="Job queue directory shared by the hosts of the queue backend")
+        parser.add_argument(
+            "--hosts", help="Hosts of the queue backend with their number of slots, e.g. node1:8,node2:8"
+        )
+        parser.add_argument("--ssh", help="Command used to start workers on other hosts (default: ssh)")
+        parser.add_argument("--remote-python", help="Python on the other hosts (default: python3)")
+        parser.add_argument(
+            "--no-workers", action="store_true", help="Don't start workers, the queue is served by running workers"
+        )
+
+    def worker_command(self, host: str, slots: int) -> list[str]:
+        command = ["-m", "simplhdl.backends.queue", str(self.queue.directory), "--slots", str(slots)]
+        if host in LOCALHOSTS:
+            return [sys.executable, *command]
+        return [*self.ssh.split(), host, self.python, *command]
+
+    def start(self, count: int) -> None:
+        for host, slots in self.hosts:
+            slots = min(slots, count)
+            command = self.worker_command(host, slots)
+            logger.debug(f"Start worker on {host}: {' '.join(command)}")
+            with self.queue.workers.joinpath(f"{host}.log").open("ab") as log:
+                self.workers.append(
+                    subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT)
+                )
+
+    def is_serving(self) -> bool:
+        return not self.start_workers or any(worker.poll() is None for worker in self.workers)
+
+    def collect(self) -> Iterator[JobResult]:
+        for id in list(self.jobs):
+            path = self.queue.done.joinpath(f"{id}.json")
+            if path.exists():
+                result = JobResult.from_dict(json.loads(path.read_text()))
+                path.unlink()
+                self.queue.cancelled.joinpath(id).unlink(missing_ok=True)
+                del self.jobs[id]
+                yield result
+
+    def run(self, jobs: list[Job]) -> Iterator[JobResult]:
+        for job in jobs:
+            id = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+            write_json(self.queue.pending.joinpath(f"{id}.json"), job.to_dict())
+            self.jobs[id] = job
+        logger.info(f"Queued {len(jobs)} jobs in {self.queue.directory}")
+        if self.start_workers:
+            self.start(len(jobs))
+        try:
+            while self.jobs:
+                yield from self.collect()
+                if self.jobs and not self.is_serving():
+                    # NOTE: The last results may have been written just before
+                    #       the workers exited.
+                    yield from self.collect()
+                    yield from self.lost()
+                    break
+                time.sleep(0.2)
+        except BaseException:
+            self.cancel()
+            raise
+        finally:
+            for worker in self.workers:
+                worker.wait()
+            self.workers.clear()
+
+    def lost(self) -> Iterator[JobResult]:
+        """
+        Get the jobs which weren't run, because all workers have exited.
+        """
+        for id, job in list(self.jobs.items()):
+            self.queue.pending.joinpath(f"{id}.json").unlink(missing_ok=True)
+            self.queue.running.joinpath(f"{id}.json").unlink(missing_ok=True)
+            del self.jobs[id]
+            logger.error(f"{job.name}: no worker ran the job, see the logs in {self.queue.workers}")
+            yield JobResult(job.name, JobStatus.LOST, logfile=job.logfile, tags=job.tags)
+
+    def cancel(self) -> None:
+        for id in self.jobs:
+            try:
+                self.queue.pending.joinpath(f"{id}.json").unlink()
+            except FileNotFoundError:
+                self.queue.cancelled.joinpath(id).touch()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the jobs of a simplhdl job queue")
+    parser.add_argument("queue", type=Path, help="Job queue directory")
+    parser.add_argument("--slots", type=int, default=os.cpu_count(), help="Number of jobs run in parallel")
+    parser.add_argument("--wait", action="store_true", help="Wait for new jobs when the queue is empty")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s {socket.gethostname()} %(message)s")
+    Worker(args.queue, args.slots, args.wait).run()
+
+
+if __name__ == "__main__":
+    main()
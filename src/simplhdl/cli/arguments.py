@@ -10,7 +10,7 @@ from .. import __version__
 from ..plugin.flow import FlowFactory
 
 
-def parse_arguments(args: Sequence[str] = None, namespace: None = None) -> argparse.Namespace:
+def global_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
         prog="simpl",
         description="Simple framework for simulation and implementation of HDL designs",
@@ -25,6 +25,18 @@ def parse_arguments(args: Sequence[str] = None, namespace: None = None) -> argpa
         type=Path,
         help="output directory for build files",
     )
+    parser.add_argument("--profile", action="store_true", help="Profile the run with cProfile")
+    parser.add_argument(
+        "--daemon",
+        choices=["start", "stop", "status"],
+        help="Control the daemon which keeps the project loaded between invocations",
+    )
+    parser.add_argument("--no-daemon", action="store_true", help="Don't run the command in the daemon")
+    return parser
+
+
+def parse_arguments(args: Sequence[str] = None, namespace: None = None) -> argparse.Namespace:
+    parser = global_parser()
     subparsers = parser.add_subparsers(
         title="Flows",
         description="""Different work flows for simulation and implementation
@@ -36,3 +48,20 @@ def parse_arguments(args: Sequence[str] = None, namespace: None = None) -> argpa
 
     argcomplete.autocomplete(parser)
     return parser.parse_args(args=args, namespace=namespace)
+
+
+def flow_index(argv: Sequence[str]) -> int:
+    """
+    Get the index of the flow name in a command line, which is the first
+    argument that isn't a global option or the value of one, e.g. 2 in
+    '-o modelsim modelsim'.
+    """
+    # NOTE: argparse has no public way to look up the action of an option.
+    actions = global_parser()._option_string_actions
+    i = 0
+    while i < len(argv):
+        if not argv[i].startswith("-"):
+            return i
+        action = actions.get(argv[i])
+        i += 2 if action is not None and action.nargs != 0 else 1
+    raise ValueError(f"No flow in command line: {' '.join(argv)}")
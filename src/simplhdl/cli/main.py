@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import cProfile
+import logging
+import pstats
+import sys
+import traceback
+from argparse import Namespace
+
+from rich.logging import RichHandler
+
+from .. import daemon, trace
+from ..client import DaemonError
+from ..plugin.flow import FlowError
+from ..plugin.generator import GeneratorError
+from ..plugin.loader import load_plugins
+from ..plugin.parser import ParserError
+from ..project.project import Project, ProjectError
+from ..simplhdl import Simplhdl
+from ..utils import CalledShError
+from .arguments import parse_arguments
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging(verbose: int) -> None:
+    levels = [logging.INFO, logging.DEBUG, logging.NOTSET]
+    level = levels[min(verbose, len(levels) - 1)]
+    if level < logging.INFO:
+        show_path = True
+    else:
+        show_path = False
+
+    FORMAT = "[simplhdl.%(module)s] - %(message)s"
+    console = RichHandler(level=level, show_time=False, rich_tracebacks=True, show_path=show_path)
+    logging.basicConfig(level=5, format=FORMAT, handlers=[console], force=True)
+
+
+def report(args: Namespace, profiler: cProfile.Profile | None) -> None:
+    """
+    Write the trace of the run to the build directory and print the time
+    spent in each phase at -v, and the profile if profiling is enabled.
+    """
+    builddir = args.outputdir.joinpath(args.flow) if args.flow else args.outputdir
+    if builddir.is_dir():
+        trace.write(builddir.joinpath("simplhdl.trace.json"))
+    if args.verbose:
+        trace.print_summary()
+    if profiler is not None:
+        builddir.mkdir(parents=True, exist_ok=True)
+        filename = builddir.joinpath("simplhdl.prof")
+        profiler.dump_stats(filename)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats("cumulative").print_stats(25)
+        logger.info(f"Profile written to {filename}")
+
+
+def run(argv: list[str] | None = None, project: Project | None = None) -> int:
+    try:
+        args = parse_arguments(argv)
+        # NOTE: Kept so a run can be repeated, e.g. to rerun failed tests.
+        args.argv = list(sys.argv[1:] if argv is None else argv)
+        setup_logging(args.verbose)
+        if args.daemon:
+            return daemon.command(args.daemon, run)
+        simpl = Simplhdl(args)
+        profiler = cProfile.Profile() if args.profile else None
+        try:
+            if profiler is not None:
+                profiler.enable()
+            simpl.run(project)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            report(args, profiler)
+    except (
+        NotImplementedError,
+        FileNotFoundError,
+        CalledShError,
+        DaemonError,
+        ParserError,
+        FlowError,
+        GeneratorError,
+        ProjectError,
+    ) as e:
+        logger.debug(traceback.format_exc())
+        logger.error(e)
+        return 1
+    except SystemError:
+        return 1
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    load_plugins()
+    return run(argv)
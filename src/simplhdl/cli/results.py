@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import logging
+import shlex
+import sys
+import time
+from argparse import Namespace
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+from ..backends import LocalBackend
+from ..plugin.backend import Job
+from ..plugin.flow import FlowBase, FlowError
+from ..results import ResultsDatabase, database_path
+
+logger = logging.getLogger(__name__)
+
+
+class Results(FlowBase):
+    @classmethod
+    def parse_args(self, subparsers) -> None:
+        parser = subparsers.add_parser("results", help="Show the results of simulations and builds")
+        parser.add_argument("--database", type=Path, help="Results database (default: <outputdir>/results.db)")
+        parser.add_argument("--last", type=int, default=20, help="Number of runs to show")
+        group = parser.add_mutually_exclusive_group()
+        group.add_argument("--failed", action="store_true", help="Show the tests which failed in their latest run")
+        group.add_argument("--slow", action="store_true", help="Show the tests with the longest mean run time")
+        group.add_argument("--flaky", action="store_true", help="Show the tests which both pass and fail")
+        group.add_argument("--rerun", action="store_true", help="Run the tests which failed in their latest run again")
+        group.add_argument("--builds", action="store_true", help="Show the timing and resources of the latest builds")
+        parser.add_argument("--window", type=int, default=20, help="Number of latest runs of a test used by --flaky")
+        parser.add_argument("-j", "--jobs", type=int, default=1, help="Number of tests rerun in parallel")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON")
+
+    def run(self) -> None:
+        path = self.args.database or database_path(self.builddir.parent)
+        if not path.exists():
+            raise FlowError(f"{path}: no results recorded")
+        with ResultsDatabase(path) as database:
+            if self.args.rerun:
+                self.rerun_failed(database.latest("failed"), path)
+            elif self.args.failed:
+                self.show(database.latest("failed"), "Failed tests")
+            elif self.args.slow:
+                self.show(database.slowest(self.args.last), "Slowest tests")
+            elif self.args.flaky:
+                self.show(database.flaky(self.args.last, self.args.window), "Flaky tests")
+            elif self.args.builds:
+                self.show(database.builds(self.args.last), "Latest builds")
+            else:
+                self.show(database.runs(self.args.last), "Latest runs")
+
+    def show(self, rows, title: str) -> None:
+        rows = [{k: v for k, v in dict(row).items() if k not in ("cocotb_xml", "n")} for row in rows]
+        if self.args.json:
+            for row in rows:
+                if row.get("report"):
+                    row["report"] = json.loads(row["report"])
+            print(json.dumps(rows, indent=2))
+            return
+        table = Table(title=title)
+        # NOTE: Columns without any values, e.g. the cocotb columns of UVM
+        #       tests, are left out.
+        columns = [
+            c
+            for c in (rows[0] if rows else [])
+            if c not in ("id", "cwd", "argv", "builddir", "host", "report") and any(row[c] is not None for row in rows)
+        ]
+        for column in columns:
+            numeric = column != "started" and any(isinstance(row[column], (int, float)) for row in rows)
+            table.add_column(column, justify="right" if numeric else "left")
+        for row in rows:
+            table.add_row(*(self.format(column, row[column]) for column in columns))
+        Console().print(table)
+
+    @staticmethod
+    def format(column: str, value) -> str:
+        if value is None:
+            return ""
+        if column == "started":
+            return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(value))
+        if column == "status":
+            return f"[{'green' if value == 'passed' else 'red'}]{value.upper()}"
+        if isinstance(value, float):
+            return f"{value:.1f}"
+        return str(value)
+
+    def rerun_failed(self, rows, path: Path) -> None:
+        """
+        Run the failed tests again with the command lines they were run with,
+        each in the directory it was run from, and record their results in
+        the same database.
+        """
+        jobs = list()
+        for row in rows:
+            if not row["argv"] or not row["cwd"]:
+                logger.warning(f"{row['test']}: the command line of the run wasn't recorded")
+                continue
+            name = ":".join(str(v) for v in (row["target"] or row["flow"], row["test"], row["seed"]) if v)
+            builddir = Path(row["builddir"] or self.builddir)
+            env = {"SIMPLHDL_NO_DAEMON": "1", "SIMPLHDL_RESULTS_DB": str(path.absolute())}
+            if row["target"]:
+                env["SIMPLHDL_TARGET"] = row["target"]
+            jobs.append(
+                Job(
+                    name,
+                    [sys.executable, "-m", "simplhdl", *shlex.split(row["argv"])],
+                    Path(row["cwd"]),
+                    builddir.joinpath("rerun.log"),
+                    env=env,
+                )
+            )
+        if not jobs:
+            logger.info("No failed tests")
+            return
+        failed = 0
+        for result in LocalBackend("local", Namespace(jobs=self.args.jobs)).run(jobs):
+            if result.passed:
+                logger.info(f"PASSED {result.name} ({result.duration:.1f}s)")
+            else:
+                failed += 1
+                logger.error(f"{result.status.value.upper()} {result.name}, see {result.logfile}")
+        if failed:
+            raise FlowError(f"{failed} of {len(jobs)} tests failed again")
@@ -1,7 +1,82 @@
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import sys
+from pathlib import Path
 from pprint import pprint
-from ..simplhdl import Simplhdl
+
+from rich.console import Console
+from rich.table import Table
+
+from ..plugin.backend import BackendFactory, Job, JobResult, JobStatus
 from ..plugin.flow import FlowBase, FlowError
+from ..project.attributes import Target
+from ..results import JobHistory, ResultsDatabase, database_path
+from ..simplhdl import Simplhdl
+from ..trace import span
 from ..utils import chdir
+from .arguments import flow_index
+
+logger = logging.getLogger(__name__)
+
+
+def target_job(target: Target, builddir: Path, seed: int | None = None, database: Path | None = None, **options) -> Job:
+    """
+    Create the job running a target in its own simpl process. The process is
+    started in the directory of the target, so the current directory of this
+    process is never changed, and writes to its own build directory and log
+    file. The results of all targets are recorded in one database.
+    """
+    if target.argv is None:
+        raise FlowError(f"Target '{target.name}' has no command line")
+    # NOTE: The build directory must be given before the flow name, and
+    #       after any output directory in the target, to take precedence.
+    argv = target.argv
+    i = flow_index(argv)
+    command = [sys.executable, "-m", "simplhdl", *argv[:i], "--outputdir", str(builddir), *argv[i:]]
+    name = target.name
+    if seed is not None:
+        command += ["--seed", str(seed)]
+        name = f"{target.name}:{seed}"
+    env = {"SIMPLHDL_NO_DAEMON": "1", "SIMPLHDL_TARGET": target.name}
+    if database is not None:
+        env["SIMPLHDL_RESULTS_DB"] = str(database)
+    return Job(
+        name,
+        command,
+        target.cwd,
+        builddir.joinpath("simpl.log"),
+        env=env,
+        tags={"target": target.name, "flow": target.args.flow, "seed": seed},
+        **options,
+    )
+
+
+def schedule(jobs: list[Job], history: dict[tuple[str, str | None], JobHistory]) -> list[Job]:
+    """
+    Order jobs by their history, so the jobs which failed recently run first,
+    to report failures early, and the other jobs run longest first, which
+    shortens the total time when jobs run in parallel. A job without history
+    is expected to take as long as the other seeds of its target, or else the
+    mean of all jobs. Jobs without any history keep their order.
+    """
+    targets: dict[str, list[float]] = dict()
+    for (target, _), h in history.items():
+        targets.setdefault(target, list()).append(h.duration)
+    durations = [h.duration for h in history.values()]
+    default = sum(durations) / len(durations) if durations else 0.0
+
+    def key(job: Job) -> tuple[bool, int, float]:
+        seed = job.tags.get("seed")
+        h = history.get((job.tags["target"], None if seed is None else str(seed)))
+        if h is not None:
+            return not h.failed, -h.failures, -h.duration
+        known = targets.get(job.tags["target"])
+        return True, 0, -(sum(known) / len(known) if known else default)
+
+    return sorted(jobs, key=key)
 
 
 class Run(FlowBase):
@@ -16,13 +91,42 @@ class Run(FlowBase):
             choices=["text", "json"],
             help="List project targets",
         )
-        parser.add_argument("-t", "--target", help="Project target to run")
+        parser.add_argument("-t", "--target", action="append", help="Project target to run, can be given several times")
+        parser.add_argument("--all", action="store_true", help="Run all project targets")
+        parser.add_argument("--seeds", type=int, default=1, help="Run each target with this many seeds")
+        parser.add_argument("--timeout", type=float, help="Seconds before a target is stopped")
+        parser.add_argument("--retries", type=int, default=0, help="Number of times a failed target is run again")
+        parser.add_argument(
+            "--order",
+            choices=["history", "given"],
+            default="history",
+            help="Run recently failed targets first, then the slowest (history), or in the given order",
+        )
+        parser.add_argument(
+            "--history", type=int, default=10, help="Number of recent runs of a target used to order the targets"
+        )
+        backends = BackendFactory.get_backends()
+        parser.add_argument(
+            "--backend",
+            choices=list(backends) or None,
+            help="Backend running the targets (default: local)",
+        )
+        group = parser.add_argument_group("backends")
+        for backend in backends.values():
+            backend.parse_args(group)
 
     def run(self) -> None:
         if self.args.list:
             self._show_list(self.args.list)
+            return
+        targets = self._get_targets()
+        for target in targets:
+            if target.args.flow == "run":
+                raise FlowError("Target flow can't be 'run'")
+        if len(targets) == 1 and not self.args.all and self.args.seeds == 1 and self.args.backend is None:
+            self._run_target(targets[0])
         else:
-            self._run_target()
+            self._run_targets(targets)
 
     def _show_list(self, format) -> None:
         if format == "json":
@@ -33,13 +137,91 @@ class Run(FlowBase):
             for target in self.project._targets.keys():
                 print(f"  - {target}")
 
-    def _run_target(self) -> None:
+    def _get_targets(self) -> list[Target]:
+        if self.args.all:
+            return list(self.project.targets.values())
         if self.args.target:
-            target = self.project.get_target(self.args.target)
-        else:
-            target = self.project.defaultTarget
-        if target.args.flow == "run":
-            raise FlowError("Target flow can't be 'run'")
+            return [self.project.get_target(name) for name in dict.fromkeys(self.args.target)]
+        return [self.project.defaultTarget]
+
+    def _run_target(self, target: Target) -> None:
         with chdir(target.cwd):
             simplhdl = Simplhdl(target.args)
             simplhdl.run()
+
+    def _get_jobs(self, targets: list[Target]) -> list[Job]:
+        options = {
+            "timeout": self.args.timeout,
+            "retries": self.args.retries,
+            "database": database_path(self.builddir.parent).absolute(),
+        }
+        jobs = list()
+        for target in targets:
+            builddir = self.builddir.joinpath(target.name).absolute()
+            if self.args.seeds == 1:
+                jobs.append(target_job(target, builddir, **options))
+                continue
+            try:
+                first = int(getattr(target.args, "seed", None))
+            except (TypeError, ValueError):
+                raise FlowError(f"Target '{target.name}' doesn't have a numeric seed")
+            for seed in range(first, first + self.args.seeds):
+                jobs.append(target_job(target, builddir.joinpath(f"seed{seed}"), seed, **options))
+        return jobs
+
+    def _run_targets(self, targets: list[Target]) -> None:
+        """
+        Run targets with a backend, each in its own process, build directory
+        and log file, and print a summary when all targets are done. The jobs
+        are ordered by the history of earlier runs, and their durations and
+        statuses are recorded for the next run.
+        """
+        given = self._get_jobs(targets)
+        database = ResultsDatabase(database_path(self.builddir.parent))
+        jobs = given
+        if self.args.order == "history":
+            jobs = schedule(given, database.history(self.args.history))
+        backend = BackendFactory.get_backend(self.args.backend or "local", self.args)
+        results = list()
+        with database, span(f"{backend.name} backend", "run"):
+            for result in backend.run(jobs):
+                results.append(result)
+                if result.status != JobStatus.CANCELLED:
+                    self._record_job(database, result)
+                if result.passed:
+                    logger.info(f"PASSED {result.name} ({result.duration:.1f}s)")
+                else:
+                    logger.error(
+                        f"{result.status.value.upper()} {result.name} ({result.duration:.1f}s), see {result.logfile}"
+                    )
+        order = {job.name: i for i, job in enumerate(given)}
+        results.sort(key=lambda result: order[result.name])
+        self._print_summary(results)
+        failed = [result for result in results if not result.passed]
+        if failed:
+            raise FlowError(f"{len(failed)} of {len(jobs)} targets failed")
+
+    def _record_job(self, database: ResultsDatabase, result: JobResult) -> None:
+        try:
+            database.record_job(
+                result.tags["target"], result.tags.get("seed"), result.status.value, result.duration, result.host
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"{database.path}: can't record job: {e}")
+
+    def _print_summary(self, results: list[JobResult]) -> None:
+        table = Table(title="Targets")
+        table.add_column("Target")
+        table.add_column("Flow")
+        table.add_column("Status")
+        table.add_column("Time [s]", justify="right")
+        table.add_column("Host")
+        table.add_column("Log")
+        for result in results:
+            color = "green" if result.passed else "red"
+            status = f"[{color}]{result.status.value.upper()}"
+            logfile = os.path.relpath(result.logfile) if result.logfile else ""
+            table.add_row(
+                result.name, result.tags.get("flow", ""), status, f"{result.duration:.1f}", result.host or "", logfile
+            )
+        Console().print(table)
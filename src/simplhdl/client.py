@@ -0,0 +1,124 @@
+"""
+The client side of the simplhdl daemon. This module only depends on the
+standard library, so simpl can hand a command over to a running daemon
+without loading plugins or the project model.
+"""
+
+from __future__ import annotations
+
+import array
+import json
+import os
+import signal
+import socket
+import struct
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any
+
+__all__ = ["DaemonError", "connect", "is_enabled", "peer_uid", "request", "send", "socket_path"]
+
+
+class DaemonError(Exception):
+    pass
+
+
+def socket_path() -> Path:
+    """
+    Get the path of the socket of the daemon, which is in a directory only the
+    user can access, in the runtime directory of the user or else in the
+    temporary directory.
+    """
+    if "SIMPLHDL_DAEMON_SOCKET" in os.environ:
+        return Path(os.environ["SIMPLHDL_DAEMON_SOCKET"])
+    directory = os.environ.get("XDG_RUNTIME_DIR", tempfile.gettempdir())
+    return Path(directory, f"simplhdl-{os.getuid()}", "daemon.sock")
+
+
+def peer_uid(sock: socket.socket) -> int | None:
+    """
+    Get the user id of the process at the other end of a Unix socket, or None
+    if the platform can't tell.
+    """
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    return struct.unpack("3i", credentials)[1]
+
+
+def is_enabled(argv: list[str]) -> bool:
+    """
+    Check if a command line may be sent to the daemon.
+    """
+    if not hasattr(socket, "AF_UNIX") or os.environ.get("SIMPLHDL_NO_DAEMON") or "_ARGCOMPLETE" in os.environ:
+        return False
+    return not any(arg in ("--no-daemon", "--daemon") or arg.startswith("--daemon=") for arg in argv)
+
+
+def connect(path: Path | None = None) -> socket.socket | None:
+    """
+    Connect to the daemon. The commands send their environment and standard
+    streams to the daemon, so a socket or daemon of another user is never
+    used.
+    """
+    path = socket_path() if path is None else path
+    try:
+        owner = path.stat().st_uid
+    except OSError:
+        return None
+    if owner != os.getuid():
+        raise DaemonError(f"{path}: socket belongs to another user")
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        return None
+    if peer_uid(sock) not in (None, os.getuid()):
+        sock.close()
+        raise DaemonError(f"{path}: daemon runs as another user")
+    return sock
+
+
+def send(sock: socket.socket, message: dict[str, Any], fds: list[int] | None = None) -> None:
+    data = json.dumps(message).encode() + b"\n"
+    if fds:
+        sock.sendmsg([data], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))])
+    else:
+        sock.sendall(data)
+
+
+def request(argv: list[str]) -> int | None:
+    """
+    Run a command line in the daemon. Returns the exit code of the command or
+    None if no daemon is running.
+    """
+    try:
+        sock = connect()
+    except DaemonError as e:
+        sys.stderr.write(f"WARNING: {e}, the command isn't run by the daemon\n")
+        return None
+    if sock is None:
+        return None
+    with sock:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        message = {"command": "run", "argv": argv, "cwd": os.getcwd(), "env": dict(os.environ)}
+        send(sock, message, [sys.stdin.fileno(), sys.stdout.fileno(), sys.stderr.fileno()])
+        reader = sock.makefile("r")
+        pid = None
+        while True:
+            try:
+                line = reader.readline()
+                if not line:
+                    raise DaemonError("Lost connection to simplhdl daemon")
+                reply = json.loads(line)
+                pid = reply.get("pid", pid)
+                if "returncode" in reply:
+                    return reply["returncode"]
+            except KeyboardInterrupt:
+                # NOTE: The command doesn't run in the process group of the
+                #       terminal, so forward the interrupt.
+                if pid is not None:
+                    os.killpg(pid, signal.SIGINT)
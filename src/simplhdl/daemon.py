@@ -0,0 +1,261 @@
+"""
+A local server which keeps the plugins, templates and the elaborated project
+loaded between invocations of simpl. When the daemon is running, simpl sends
+its command line, working directory, environment and standard file
+descriptors to the daemon over a Unix socket. The daemon forks a copy of
+itself to run the command, so each command gets its own copy of the warm
+project and can't change the state of the daemon.
+
+The project is rebuilt when the command line, working directory or
+environment differs from the previous command, or when one of the project
+files has been changed.
+"""
+
+from __future__ import annotations
+
+import array
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from pathlib import Path
+from typing import Any, Callable
+
+import rich
+
+from . import trace
+from .cli.arguments import parse_arguments
+from .client import DaemonError, connect, peer_uid, send, socket_path
+from .project.project import Project
+from .simplhdl import Simplhdl
+
+__all__ = ["Daemon", "command"]
+
+logger = logging.getLogger(__name__)
+
+STDIO = 3
+
+
+class Daemon:
+    def __init__(self, path: Path, run: Callable[[list[str], Project | None], int]) -> None:
+        self.path = path
+        self.run = run
+        self.key: tuple | None = None
+        self.project: Project | None = None
+        self.mtimes: dict[Path, int] = dict()
+        self.server: socket.socket | None = None
+
+    def serve(self) -> None:
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.path.unlink(missing_ok=True)
+        self.server.bind(str(self.path))
+        self.path.chmod(0o600)
+        self.server.listen()
+        # NOTE: Let the kernel reap the command processes.
+        signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        logger.info(f"simplhdl daemon listening on {self.path}")
+        try:
+            while self.server is not None:
+                conn, _ = self.server.accept()
+                with conn:
+                    if peer_uid(conn) not in (None, os.getuid()):
+                        logger.warning("Refused a connection from another user")
+                        continue
+                    try:
+                        self.handle(conn)
+                    except Exception:
+                        logger.error(traceback.format_exc())
+        finally:
+            self.path.unlink(missing_ok=True)
+
+    def receive(self, conn: socket.socket) -> tuple[dict[str, Any], list[int]]:
+        fds = array.array("i")
+        data, ancdata, _, _ = conn.recvmsg(1 << 16, socket.CMSG_SPACE(STDIO * fds.itemsize))
+        for level, type, cmsg in ancdata:
+            if level == socket.SOL_SOCKET and type == socket.SCM_RIGHTS:
+                fds.frombytes(cmsg[: len(cmsg) - (len(cmsg) % fds.itemsize)])
+        while not data.endswith(b"\n"):
+            chunk = conn.recv(1 << 16)
+            if not chunk:
+                break
+            data += chunk
+        if not data:
+            return dict(), list(fds)
+        return json.loads(data), list(fds)
+
+    def handle(self, conn: socket.socket) -> None:
+        message, fds = self.receive(conn)
+        if not message:
+            # NOTE: A client checking if the daemon is running
+            return
+        elif message["command"] == "stop":
+            send(conn, {"pid": os.getpid()})
+            self.server.close()
+            self.server = None
+        elif message["command"] == "status":
+            send(conn, {"pid": os.getpid(), "cwd": self.key[0] if self.key else None})
+        elif message["command"] == "run":
+            if len(fds) != STDIO:
+                raise DaemonError("Expected the standard file descriptors of the client")
+            project = self.warm_project(message)
+            pid = os.fork()
+            if pid == 0:
+                self.execute(conn, message, fds, project)
+            for fd in fds:
+                os.close(fd)
+            send(conn, {"pid": pid})
+
+    def execute(self, conn: socket.socket, message: dict[str, Any], fds: list[int], project: Project | None):
+        """
+        Run a command in the forked process, this never returns.
+        """
+        returncode = 1
+        try:
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            os.setpgid(0, 0)
+            self.server.close()
+            for i, fd in enumerate(fds):
+                os.dup2(fd, i)
+                os.close(fd)
+            os.chdir(message["cwd"])
+            os.environ.clear()
+            os.environ.update(message["env"])
+            # NOTE: Detect the terminal of the client
+            rich.reconfigure()
+            returncode = self.run(message["argv"], project)
+        except SystemExit as e:
+            returncode = e.code if isinstance(e.code, int) else 1
+        except KeyboardInterrupt:
+            returncode = 130
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            try:
+                send(conn, {"returncode": returncode or 0})
+            finally:
+                os._exit(returncode or 0)
+
+    def is_changed(self) -> bool:
+        for path, mtime in self.mtimes.items():
+            try:
+                if path.stat().st_mtime_ns != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def warm_project(self, message: dict[str, Any]) -> Project | None:
+        """
+        Get the elaborated project for a command. The project is kept until a
+        command with different arguments, working directory or environment
+        arrives, or until a project file changes.
+        """
+        key = (message["cwd"], tuple(message["argv"]), tuple(sorted(message["env"].items())))
+        if key == self.key and not self.is_changed():
+            logger.debug("Reuse project")
+            return self.project
+        self.key = None
+        self.project = None
+        self.mtimes = dict()
+        cwd = os.getcwd()
+        environ = dict(os.environ)
+        try:
+            os.chdir(message["cwd"])
+            os.environ.clear()
+            os.environ.update(message["env"])
+            args = parse_arguments(message["argv"])
+            if args.flow is None:
+                return None
+            simpl = Simplhdl(args)
+            trace.clear()
+            start = time.perf_counter()
+            project = simpl.create_project(simpl.builddir.joinpath(args.flow))
+            logger.debug(f"Created project in {time.perf_counter() - start:.3f}s")
+            self.mtimes = {path: path.stat().st_mtime_ns for path in simpl.project_files(project)}
+            self.key = key
+            self.project = project
+        except (Exception, SystemExit) as e:
+            # NOTE: Let the command create the project itself, so the error is
+            #       reported to the user.
+            logger.debug(f"Can't create project: {e}")
+        finally:
+            os.chdir(cwd)
+            os.environ.clear()
+            os.environ.update(environ)
+        return self.project
+
+
+def private_directory(directory: Path) -> None:
+    """
+    Create the directory of the socket, which only the user can access, or
+    check that an existing directory is.
+    """
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    stat = directory.stat()
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+        raise DaemonError(f"{directory}: directory of the socket must only be accessible by its owner")
+
+
+def start(path: Path, run: Callable[[list[str], Project | None], int]) -> int:
+    if "SIMPLHDL_DAEMON_SOCKET" not in os.environ:
+        private_directory(path.parent)
+    pid = os.fork()
+    if pid == 0:
+        os.setsid()
+        if os.fork() != 0:
+            os._exit(0)
+        with path.with_suffix(".log").open("a") as log, open(os.devnull) as null:
+            os.dup2(null.fileno(), 0)
+            os.dup2(log.fileno(), 1)
+            os.dup2(log.fileno(), 2)
+        try:
+            Daemon(path, run).serve()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    for _ in range(50):
+        sock = connect(path)
+        if sock is not None:
+            sock.close()
+            logger.info(f"simplhdl daemon started on {path}")
+            return 0
+        time.sleep(0.1)
+    raise DaemonError(f"simplhdl daemon didn't start, see {path.with_suffix('.log')}")
+
+
+def command(action: str, run: Callable[[list[str], Project | None], int]) -> int:
+    """
+    Start, stop or get the status of the daemon.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonError("simplhdl daemon requires Unix sockets")
+    path = socket_path()
+    sock = connect(path)
+    if action == "start":
+        if sock is not None:
+            sock.close()
+            logger.info(f"simplhdl daemon is already running on {path}")
+            return 0
+        return start(path, run)
+    if sock is None:
+        logger.info("simplhdl daemon is not running")
+        return 0 if action == "stop" else 1
+    with sock:
+        send(sock, {"command": action})
+        reply = json.loads(sock.makefile("r").readline())
+    if action == "stop":
+        logger.info(f"simplhdl daemon (pid {reply['pid']}) stopped")
+    else:
+        logger.info(f"simplhdl daemon (pid {reply['pid']}) is running on {path}")
+        if reply["cwd"]:
+            logger.info(f"Project in {reply['cwd']} is loaded")
+    return 0
@@ -0,0 +1,52 @@
+"""
+Matchers for the output of simulators. A simulation flow scans the output of
+a simulation with the matchers of its simulator while it runs, counts the
+warnings, errors and fatals, and can stop the simulation when too many errors
+have been reported, instead of waiting for the teardown of the testbench.
+"""
+
+from __future__ import annotations
+
+import re
+from enum import Enum
+
+__all__ = ["COCOTB_MATCHERS", "UVM_MATCHERS", "LogMatcher", "Severity"]
+
+
+class Severity(str, Enum):
+    WARNING = "warning"
+    ERROR = "error"
+    FATAL = "fatal"
+
+
+class LogMatcher:
+    """
+    Matches the lines of a simulation log reporting a message of a severity,
+    e.g. the UVM_ERROR messages of a UVM testbench.
+    """
+
+    def __init__(self, name: str, pattern: str, severity: Severity = Severity.ERROR) -> None:
+        self.name = name
+        self.pattern = re.compile(pattern)
+        self.severity = severity
+
+    def __call__(self, line: str) -> bool:
+        return self.pattern.search(line) is not None
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name={self.name}, severity={self.severity.value})"
+
+
+# NOTE: The counts of the UVM report summary, e.g. 'UVM_ERROR :    3', aren't
+#       messages.
+UVM_MATCHERS = [
+    LogMatcher("UVM_WARNING", r"^\W*UVM_WARNING\b(?!\s*:\s*\d+\s*$)", Severity.WARNING),
+    LogMatcher("UVM_ERROR", r"^\W*UVM_ERROR\b(?!\s*:\s*\d+\s*$)", Severity.ERROR),
+    LogMatcher("UVM_FATAL", r"^\W*UVM_FATAL\b(?!\s*:\s*\d+\s*$)", Severity.FATAL),
+]
+
+# NOTE: Rows of the regression summary printed by cocotb, e.g.
+#       '** test_alu.test_add   FAIL   10.00   0.01   1000.00  **'
+COCOTB_MATCHERS = [
+    LogMatcher("COCOTB_FAIL", r"^\s*\*\*\s+\S+\s+FAIL\b", Severity.ERROR),
+]
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import logging
+import os
+import signal
+import socket
+import subprocess
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+from argparse import Namespace
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+__all__ = ["BackendBase", "BackendError", "BackendFactory", "Job", "JobResult", "JobStatus", "execute"]
+
+logger = logging.getLogger(__name__)
+
+
+class BackendError(Exception):
+    pass
+
+
+class JobStatus(str, Enum):
+    PASSED = "passed"
+    FAILED = "failed"
+    TIMEOUT = "timeout"
+    CANCELLED = "cancelled"
+    LOST = "lost"
+
+
+class Job:
+    """
+    A command run by a backend, e.g. a simulation. The output of the command
+    is written to the log file. A job that fails or times out is run again up
+    to `retries` times.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        command: list[str],
+        cwd: Path,
+        logfile: Path,
+        env: dict[str, str] | None = None,
+        timeout: float | None = None,
+        retries: int = 0,
+        tags: dict[str, Any] | None = None,
+    ) -> None:
+        self.name = name
+        self.command = command
+        self.cwd = cwd
+        self.logfile = logfile
+        self.env = env
+        self.timeout = timeout
+        self.retries = retries
+        self.tags = tags or dict()
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "command": self.command,
+            "cwd": str(self.cwd),
+            "logfile": str(self.logfile),
+            "env": self.env,
+            "timeout": self.timeout,
+            "retries": self.retries,
+            "tags": self.tags,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> Job:
+        return cls(
+            data["name"],
+            data["command"],
+            Path(data["cwd"]),
+            Path(data["logfile"]),
+            env=data.get("env"),
+            timeout=data.get("timeout"),
+            retries=data.get("retries", 0),
+            tags=data.get("tags"),
+        )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name={self.name})"
+
+
+class JobResult:
+    def __init__(
+        self,
+        name: str,
+        status: JobStatus,
+        returncode: int | None = None,
+        duration: float = 0.0,
+        attempts: int = 0,
+        host: str | None = None,
+        logfile: Path | None = None,
+        tags: dict[str, Any] | None = None,
+    ) -> None:
+        self.name = name
+        self.status = status
+        self.returncode = returncode
+        self.duration = duration
+        self.attempts = attempts
+        self.host = host
+        self.logfile = logfile
+        self.tags = tags or dict()
+
+    @property
+    def passed(self) -> bool:
+        return self.status == JobStatus.PASSED
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "status": self.status.value,
+            "returncode": self.returncode,
+            "duration": self.duration,
+            "attempts": self.attempts,
+            "host": self.host,
+            "logfile": None if self.logfile is None else str(self.logfile),
+            "tags": self.tags,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> JobResult:
+        return cls(
+            data["name"],
+            JobStatus(data["status"]),
+            returncode=data.get("returncode"),
+            duration=data.get("duration", 0.0),
+            attempts=data.get("attempts", 0),
+            host=data.get("host"),
+            logfile=None if data.get("logfile") is None else Path(data["logfile"]),
+            tags=data.get("tags"),
+        )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name={self.name}, status={self.status.value})"
+
+
+def kill(process: subprocess.Popen) -> None:
+    """
+    Kill a job and the processes it started, e.g. the tools started by make.
+    """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+def attempt(job: Job, mode: str, stopped: threading.Event | None) -> tuple[JobStatus, int | None]:
+    deadline = None if job.timeout is None else time.monotonic() + job.timeout
+    env = None if job.env is None else dict(os.environ, **job.env)
+    job.logfile.parent.mkdir(parents=True, exist_ok=True)
+    with job.logfile.open(mode) as log:
+        # NOTE: The job runs in its own session, so it and the processes it
+        #       starts can be killed together.
+        process = subprocess.Popen(
+            job.command, cwd=job.cwd, env=env, stdout=log, stderr=subprocess.STDOUT, start_new_session=True
+        )
+        while True:
+            try:
+                returncode = process.wait(timeout=0.2)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            if stopped is not None and stopped.is_set():
+                kill(process)
+                return JobStatus.CANCELLED, None
+            if deadline is not None and time.monotonic() > deadline:
+                kill(process)
+                log.write(f"\nsimplhdl: job timed out after {job.timeout}s\n".encode())
+                return JobStatus.TIMEOUT, None
+    return JobStatus.PASSED if returncode == 0 else JobStatus.FAILED, returncode
+
+
+def execute(job: Job, stopped: threading.Event | None = None) -> JobResult:
+    """
+    Run a job on this host, again if it fails and has retries left, and get
+    its result. The job is killed when the stopped event is set.
+    """
+    if stopped is not None and stopped.is_set():
+        return JobResult(job.name, JobStatus.CANCELLED, logfile=job.logfile, tags=job.tags)
+    start = time.perf_counter()
+    attempts = 0
+    while True:
+        attempts += 1
+        status, returncode = attempt(job, "wb" if attempts == 1 else "ab", stopped)
+        if status in (JobStatus.PASSED, JobStatus.CANCELLED) or attempts > job.retries:
+            break
+        logger.warning(f"{job.name} {status.value}, retry {attempts} of {job.retries}")
+    return JobResult(
+        job.name,
+        status,
+        returncode=returncode,
+        duration=time.perf_counter() - start,
+        attempts=attempts,
+        host=socket.gethostname(),
+        logfile=job.logfile,
+        tags=job.tags,
+    )
+
+
+class BackendBase(metaclass=ABCMeta):
+    """
+    Runs jobs, e.g. the simulations of a regression, and collects their
+    results.
+    """
+
+    def __init__(self, name: str, args: Namespace) -> None:
+        self.name = name
+        self.args = args
+
+    @classmethod
+    def parse_args(cls, parser) -> None:
+        """
+        Add the arguments of the backend to an argument parser.
+        """
+
+    @abstractmethod
+    def run(self, jobs: list[Job]) -> Iterator[JobResult]:
+        """
+        Run jobs and yield their results as they finish.
+        """
+
+    @abstractmethod
+    def cancel(self) -> None:
+        """
+        Stop the running jobs and don't start any more jobs.
+        """
+
+
+class BackendFactory:
+    """
+    Factory for creating backends
+    """
+
+    registry: Dict[str, BackendBase] = dict()
+
+    @classmethod
+    def register(cls, name: str, _class: BackendBase) -> None:
+        if name in cls.registry:
+            raise Exception(f"Backend {name} already exists.")
+        cls.registry[name] = _class
+
+    @classmethod
+    def get_backend(cls, name: str, args: Namespace) -> BackendBase:
+        if name in cls.registry:
+            return cls.registry[name](name, args)
+        raise BackendError(f"Couldn't find Backend named {name}")
+
+    @classmethod
+    def get_backends(cls) -> Dict[str, BackendBase]:
+        return cls.registry
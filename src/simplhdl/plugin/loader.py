@@ -7,8 +7,11 @@ except ImportError:
 
 from typing import Iterator
 
+from ..backends import LocalBackend, QueueBackend
 from ..cli.info import Info
+from ..cli.results import Results
 from ..cli.run import Run
+from .backend import BackendBase, BackendFactory
 from .flow import FlowBase, FlowFactory
 from .generator import GeneratorBase, GeneratorFactory
 from .parser import ParserBase, ParserFactory
@@ -51,8 +54,8 @@ def load_external_plugins() -> None:
 
             # 2. Check if the class inherits from the expected base (GeneratorBase)
             # You might need to import GeneratorBase here for the check.
-            if not issubclass(PluginClass, (ParserBase, GeneratorBase, FlowBase)):
-                logger.warning(f"Plugin {plugin.name} is not a valid ParserBase, GeneratorBase, FlowBase.")
+            if not issubclass(PluginClass, (ParserBase, GeneratorBase, FlowBase, BackendBase)):
+                logger.warning(f"Plugin {plugin.name} is not a valid ParserBase, GeneratorBase, FlowBase, BackendBase.")
                 continue
 
             if issubclass(PluginClass, ParserBase):
@@ -67,6 +70,10 @@ def load_external_plugins() -> None:
                 FlowFactory.register(plugin.name, PluginClass)
                 logger.debug(f"Registered external flow: {plugin.name}")
 
+            if issubclass(PluginClass, BackendBase):
+                BackendFactory.register(plugin.name, PluginClass)
+                logger.debug(f"Registered external backend: {plugin.name}")
+
         except Exception as e:
             logger.error(f"Failed to load or register plugin {plugin.name}: {e}")
 
@@ -77,4 +84,7 @@ def load_plugins() -> None:
     """
     FlowFactory.register("info", Info)
     FlowFactory.register("run", Run)
+    FlowFactory.register("results", Results)
+    BackendFactory.register("local", LocalBackend)
+    BackendFactory.register("queue", QueueBackend)
     load_external_plugins()
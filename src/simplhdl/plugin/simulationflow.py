@@ -4,16 +4,25 @@ try:
     from importlib.resources import files as resources_files
 except ImportError:
     from importlib_resources import files as resources_files
+import json
 import logging
 import os
+import shlex
 import shutil
+import socket
+import sqlite3
+import sys
+import time
 from argparse import Namespace
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Callable, Generator, Tuple
+from typing import Any, Callable, Generator, Iterable
 
-from jinja2 import Environment, FileSystemLoader
+import networkx as nx
+from jinja2 import Environment
 
 from ..cocotb import Cocotb
+from ..project.dependencies import dependency_graph
 from ..project.files import (
     File,
     HdlSearchPath,
@@ -28,12 +37,17 @@ from ..project.files import (
 )
 from ..project.fileset import Fileset, FilesetOrder, FileOrder
 from ..project.project import Project
+from ..matchers import COCOTB_MATCHERS, UVM_MATCHERS, LogMatcher
+from ..results import ResultsDatabase, SimulationLog, cocotb_results, database_path
+from ..trace import span, traced, tracer
 from ..utils import (
+    OutputWriter,
     append_suffix,
-    generate_from_template,
+    listen,
     md5check,
     md5sum,
     md5write,
+    template_environment,
 )
 from .flow import FlowBase, FlowCategory, FlowError
 
@@ -49,13 +63,141 @@ class SimulationFlow(FlowBase):
         self.hdl_language = None
         self.templates = None
         self.hashfile = self.builddir.joinpath("filesets.hash")
+        self.writer = OutputWriter()
+        self.log: SimulationLog | None = None
+
+    @property
+    def incremental(self) -> bool:
+        """
+        Compile each file on its own, so only changed files and the files
+        depending on them are recompiled.
+        """
+        return getattr(self.args, "incremental", False)
 
     def run(self) -> None:
         self.cocotb = Cocotb(self.project, self.args.seed)
         self.validate()
         self.configure()
-        self.generate()
-        self.execute(self.args.step)
+        with span("generate", "flow"):
+            self.generate()
+        with span("execute", "flow", step=self.args.step):
+            self.run_step(self.args.step)
+
+    def rerun(self) -> None:
+        """
+        Run the flow again after source files have changed. The generated
+        files are only rewritten if they change, so only the changed files
+        and the files depending on them are recompiled.
+        """
+        self.validate()
+        with span("generate", "flow"):
+            self.generate()
+        with span("execute", "flow", step=self.args.step):
+            self.run_step(self.args.step)
+
+    @classmethod
+    def parse_log_args(cls, parser) -> None:
+        """
+        Add the arguments for scanning the output of a simulation.
+        """
+        parser.add_argument(
+            "--max-errors",
+            type=int,
+            metavar="N",
+            help="Stop the simulation when N errors or fatals have been reported",
+        )
+
+    def log_matchers(self) -> list[LogMatcher]:
+        """
+        Get the matchers counting the messages in the output of a simulation.
+        Flows add the messages of their simulator.
+        """
+        return UVM_MATCHERS + COCOTB_MATCHERS
+
+    @contextmanager
+    def simulation(self) -> Generator[None, None, None]:
+        """
+        Save and scan the output of the commands run within the with
+        statement, which flows use around the command running the simulation,
+        so the output of the compile and hooks isn't counted.
+        """
+        if self.log is None:
+            yield
+            return
+        with listen(self.log):
+            yield
+
+    def run_step(self, step: str) -> None:
+        """
+        Execute a step. The output of a simulation is saved in simulate.log,
+        scanned for errors while it runs, and its result is recorded in the
+        results database.
+        """
+        # NOTE: Some flows run all steps when no step is given.
+        if step not in ("simulate", "") or getattr(self.args, "gui", False):
+            self.execute(step)
+            return
+        log = SimulationLog(
+            self.builddir.joinpath("simulate.log"), self.log_matchers(), getattr(self.args, "max_errors", None)
+        )
+        started = time.time()
+        start = time.perf_counter()
+        passed = False
+        self.log = log
+        try:
+            self.execute(step)
+            passed = True
+        finally:
+            self.log = None
+            log.close()
+            self.record_result(log, passed, started, time.perf_counter() - start, tracer.total("sh", start))
+
+    def get_test_name(self) -> str:
+        if "UVM_TESTNAME" in self.project.plusargs:
+            return self.project.plusargs["UVM_TESTNAME"]
+        if self.cocotb.enabled:
+            return self.cocotb.top
+        return " ".join(self.project.defaultDesign.toplevels)
+
+    def record_result(self, log: SimulationLog, passed: bool, started: float, wall_time: float, tool_time: float):
+        result = dict(
+            started=started,
+            target=os.environ.get("SIMPLHDL_TARGET"),
+            flow=self.name,
+            test=self.get_test_name(),
+            seed=str(self.args.seed),
+            wall_time=wall_time,
+            tool_time=tool_time,
+            host=socket.gethostname(),
+            cwd=os.getcwd(),
+            argv=shlex.join(getattr(self.args, "argv", None) or sys.argv[1:]),
+            builddir=str(self.builddir.absolute()),
+        )
+        result.update(errors=log.errors, fatals=log.fatals, messages=json.dumps(log.messages))
+        if log.errors or log.fatals:
+            passed = False
+        if log.is_uvm:
+            result.update(
+                uvm_warnings=log.count("UVM_WARNING"),
+                uvm_errors=log.count("UVM_ERROR"),
+                uvm_fatals=log.count("UVM_FATAL"),
+            )
+            if result["uvm_errors"] or result["uvm_fatals"]:
+                logger.warning(f"UVM reported {result['uvm_errors']} errors and {result['uvm_fatals']} fatals")
+                passed = False
+        xmlfile = self.builddir.joinpath(os.environ.get("COCOTB_RESULTS_FILE", "results.xml"))
+        if self.cocotb.enabled and xmlfile.exists() and xmlfile.stat().st_mtime >= started:
+            cocotb = cocotb_results(xmlfile)
+            if cocotb is not None:
+                result.update(cocotb_tests=cocotb[0], cocotb_failures=cocotb[1], cocotb_xml=cocotb[2])
+                passed = passed and cocotb[1] == 0
+        result["status"] = "passed" if passed else "failed"
+        path = database_path(self.builddir.parent)
+        try:
+            with ResultsDatabase(path) as database:
+                database.record(**result)
+        except sqlite3.Error as e:
+            logger.warning(f"{path}: can't record result: {e}")
 
     def validate(self):
         if not self.project.defaultDesign.toplevels:
@@ -74,7 +216,9 @@ class SimulationFlow(FlowBase):
         libraries = [lib for lib in self.project.defaultDesign.libraries if not lib.external]
         external_libraries = [lib for lib in self.project.defaultDesign.libraries if lib.external]
         incdirs = self.project.defaultDesign.files(type=(HdlSearchPath, VerilogIncludeFile), usedin=UsedIn.SIMULATION)
-        incdirpaths = {f.includeDir for f in incdirs}
+        # NOTE: Keep the include directories in file order, so the generated
+        #       files are the same from run to run.
+        incdirpaths = list(dict.fromkeys(f.includeDir for f in incdirs))
         globals = dict()
         globals["libraries"] = libraries
         globals["external_libraries"] = external_libraries
@@ -107,22 +251,32 @@ class SimulationFlow(FlowBase):
 
     def generate(self):
         self.check_libraries()
-        templatedir = resources_files(self.templates)
-        env = Environment(loader=FileSystemLoader(templatedir), trim_blocks=True)
-        for template in self.get_project_templates(env) + self.get_cocotb_templates(env):
-            generate_from_template(template, self.builddir, self.get_globals())
-        self.generate_make_rules(env)
+        env = template_environment(resources_files(self.templates))
+        globals = self.get_globals()
+        self.writer = OutputWriter(self.builddir.joinpath("generated.digest"))
+        with self.writer:
+            for template in self.get_project_templates(env) + self.get_cocotb_templates(env):
+                self.writer.generate(template, self.builddir, globals)
+            self.generate_make_rules(env, globals)
+        logger.debug(f"Updated {self.writer.rewritten} of {self.writer.written} generated files")
         self.copy_memory_files()
         self.is_filesets_changed()
+        return self.writer.rewritten
 
-    def generate_make_rules(self, environment):
+    def generate_make_rules(self, environment: Environment, globals: dict[str, Any] | None = None):
+        if globals is None:
+            globals = self.get_globals()
         fileset_makefiles: list[str] = list()
         for fileset in self.project.defaultDesign.filesets(order=FilesetOrder.COMPILE):
             for language in ["verilog", "systemverilog", "vhdl"]:
-                fileset_makefiles += self.generate_fileset_makefiles(environment, language, fileset)
+                fileset_makefiles += self.generate_fileset_makefiles(
+                    environment, language, fileset, includes=globals["incdirs"]
+                )
         rules = self.generate_fileset_dependencies(fileset_makefiles)
+        if self.incremental:
+            self.generate_file_rules(environment, fileset_makefiles, rules)
         template = environment.get_template("dependencies.mk.j2")
-        generate_from_template(template, self.builddir, rules=rules)
+        self.writer.generate(template, self.builddir, rules=rules)
 
     def generate_fileset_dependencies(self, filelist: list[Path]):
         """Generate a dependency makefile for filesets. There a two type of
@@ -135,55 +289,128 @@ class SimulationFlow(FlowBase):
             filelist (List[str]): List of generated makefile filesets.
         """
         rules: dict[str, list[str]] = dict()
+        language_filesets: dict[str, list[Path]] = dict()
+        for f in filelist:
+            language_filesets.setdefault(f.stem.rsplit("-", 1)[0], []).append(f)
         for fileset in self.project.defaultDesign.filesets(order=FilesetOrder.HIERARCHY):
-            name = md5sum(fileset.name)
             dependencies = []
-            for language_fileset in [f for f in filelist if f.stem.startswith(name)]:
-                for child in fileset.filesets:
-                    child_name = md5sum(child.name)
-                    dependencies += [append_suffix(f, ".com").name for f in filelist if f.stem.startswith(child_name)]
-                    if dependencies:
-                        rules[append_suffix(language_fileset, ".com").name] = dependencies
+            for child in fileset.filesets:
+                dependencies += [append_suffix(f, ".com").name for f in language_filesets.get(md5sum(child.name), [])]
+            if not dependencies:
+                continue
+            for language_fileset in language_filesets.get(md5sum(fileset.name), []):
+                rules[append_suffix(language_fileset, ".com").name] = dependencies
         return rules
 
-    def generate_fileset_makefiles(self, environment: Environment, language: str, fileset: Fileset) -> list[Path]:
-        table: dict[str, Tuple[list[File], Callable]] = {
-            "verilog": (
-                (VerilogFile, VerilogIncludeFile),
-                self.fileset_verilog_args(fileset),
-            ),
-            "systemverilog": (
-                (SystemVerilogFile, VerilogIncludeFile),
-                self.fileset_systemverilog_args(fileset),
-            ),
-            "vhdl": ((VhdlFile), self.fileset_vhdl_args(fileset)),
+    def fileset_files(self, language: str, fileset: Fileset) -> list[File]:
+        filetypes = {
+            "verilog": (VerilogFile, VerilogIncludeFile),
+            "systemverilog": (SystemVerilogFile, VerilogIncludeFile),
+            "vhdl": (VhdlFile),
+        }
+        return list(fileset.files(type=filetypes[language], usedin=UsedIn.SIMULATION))
+
+    def generate_fileset_makefiles(
+        self, environment: Environment, language: str, fileset: Fileset, includes: Iterable[Path] | None = None
+    ) -> list[Path]:
+        table: dict[str, Callable] = {
+            "verilog": self.fileset_verilog_args,
+            "systemverilog": self.fileset_systemverilog_args,
+            "vhdl": self.fileset_vhdl_args,
         }
-        filetypes, args = table[language]
-        files = list(fileset.files(type=filetypes, usedin=UsedIn.SIMULATION))
+        args = table[language](fileset)
+        files = self.fileset_files(language, fileset)
         name = md5sum(fileset.name)
         base = self.builddir.joinpath(f"{name}-{language}")
         generated: list[str] = list()
         template = environment.get_template("files.j2")
         if not [f for f in files if not isinstance(f, VerilogIncludeFile)]:
             return generated
-        generate_from_template(
-            template,
-            base.with_suffix(".files"),
-            target=base.with_suffix(".fileset").name,
-            files=[f.path.absolute() for f in files],
-            hashfile=self.hashfile.name,
-        )
+        # NOTE: In incremental mode the make rules for each file are generated
+        #       by generate_file_rules and the fileset only holds the arguments
+        if not self.incremental:
+            self.writer.generate(
+                template,
+                base.with_suffix(".files"),
+                target=base.with_suffix(".fileset").name,
+                files=[f.path.absolute() for f in files],
+                hashfile=self.hashfile.name,
+            )
         template = environment.get_template("fileset.j2")
         output = base.with_suffix(".fileset")
         if language == "vhdl":
             includes = []
-        else:
+        elif includes is None:
             includes = self.get_globals()["incdirs"]
-        files = [f.path.absolute() for f in files if not isinstance(f, VerilogIncludeFile)]
-        generate_from_template(template, output, args=args, includes=includes, files=files)
+        if self.incremental:
+            files = []
+        else:
+            files = [f.path.absolute() for f in files if not isinstance(f, VerilogIncludeFile)]
+        self.writer.generate(template, output, args=args, includes=includes, files=files)
         generated.append(output)
         return generated
 
+    def file_target(self, file: File) -> str:
+        return f"{md5sum(str(file.path.absolute()))}.file.com"
+
+    def file_dependencies(self, file: File, graph: nx.DiGraph, targets: dict[File, str]) -> list[str]:
+        """
+        Get the make prerequisites of a file from the design unit dependency
+        graph. Compiled dependencies are referenced by their target and include
+        files by their path. Include files are part of the file that includes
+        them, so their dependencies are followed as well.
+        """
+        dependencies: set[str] = set()
+        visited: set[File] = set()
+        stack = list(graph.successors(file))
+        while stack:
+            dependency = stack.pop()
+            if dependency in visited or dependency is file:
+                continue
+            visited.add(dependency)
+            if isinstance(dependency, VerilogIncludeFile):
+                if not isinstance(dependency, HdlSearchPath):
+                    dependencies.add(str(dependency.path.absolute()))
+                stack += graph.successors(dependency)
+            elif dependency in targets:
+                dependencies.add(targets[dependency])
+        return sorted(dependencies)
+
+    def generate_file_rules(self, environment: Environment, filelist: list[Path], rules: dict[str, list[str]]):
+        """Generate a make rule for each file, so each file is compiled on its
+           own. A file depends on the files providing the design units it uses
+           found by the design unit scanner, which means only changed files and
+           the files depending on them are recompiled. The files of child
+           filesets are always compiled first.
+
+        Args:
+            filelist (List[str]): List of generated makefile filesets.
+            rules (Dict[str, List[str]]): The fileset dependency rules.
+        """
+        template = environment.get_template("incremental.j2")
+        filesets: list[tuple[Path, str, list[File]]] = list()
+        for fileset in self.project.defaultDesign.filesets(order=FilesetOrder.COMPILE):
+            for language in ["verilog", "systemverilog", "vhdl"]:
+                output = self.builddir.joinpath(f"{md5sum(fileset.name)}-{language}.fileset")
+                if output in filelist:
+                    files = [f for f in self.fileset_files(language, fileset) if not isinstance(f, VerilogIncludeFile)]
+                    filesets.append((output, language, files))
+        targets = {file: self.file_target(file) for _, _, files in filesets for file in files}
+        hdlfiles = self.project.defaultDesign.files(
+            type=(VerilogFile, SystemVerilogFile, VerilogIncludeFile, VhdlFile), usedin=UsedIn.SIMULATION
+        )
+        graph = dependency_graph(hdlfiles)
+        for output, language, files in filesets:
+            units = [(f.path.absolute(), targets[f], self.file_dependencies(f, graph, targets)) for f in files]
+            self.writer.generate(
+                template,
+                output.with_suffix(".files"),
+                language=language,
+                fileset=output.name,
+                units=units,
+                order=rules.get(append_suffix(output, ".com").name, []),
+            )
+
     def copy_memory_files(self):
         for file in self.project.defaultDesign.files(MemoryHexFile):
             shutil.copy(file.path.absolute(), self.builddir.absolute())
@@ -206,6 +433,7 @@ class SimulationFlow(FlowBase):
             return True
         return False
 
+    @traced("hash filesets")
     def is_filesets_changed(self) -> bool:
         """
         Check if there are any changes in filesets since last run.
@@ -3,7 +3,7 @@ from __future__ import annotations
 from argparse import Namespace
 from pathlib import Path
 
-from .project import Project
+from .project import Project, current_project
 
 
 class Library:
@@ -11,7 +11,7 @@ class Library:
         self._name: str = name
         self._path: Path | None = path
         self._external: bool = external
-        self._project: Project = Project()
+        self._project: Project = current_project()
 
     @property
     def path(self) -> Path | str:
@@ -38,10 +38,13 @@ class Library:
 
 
 class Target:
-    def __init__(self, name: str, args: Namespace | None = None, cwd: Path | None = None) -> None:
+    def __init__(
+        self, name: str, args: Namespace | None = None, cwd: Path | None = None, argv: list[str] | None = None
+    ) -> None:
         self.name = name
         self._args = args
         self._cwd = cwd or Path(".")
+        self.argv = argv
 
     @property
     def args(self) -> Namespace:
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import logging
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING, Generator, Iterable
+
+import networkx as nx
+
+from .files import (
+    HdlSearchPath,
+    SystemVerilogFile,
+    VerilogFile,
+    VerilogIncludeFile,
+    VhdlFile,
+)
+
+if TYPE_CHECKING:
+    from .files import File
+
+__all__ = ["DesignUnits", "dependency_graph", "scan_file", "strata"]
+
+logger = logging.getLogger(__name__)
+
+
+VHDL_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+VHDL_PROVIDES = re.compile(
+    r"^\s*(?:entity|context)\s+(\w+)\s+is\b|"
+    r"^\s*package\s+(?!body\b)(\w+)\s+is\b|"
+    r"^\s*configuration\s+(\w+)\s+of\b",
+    re.IGNORECASE | re.MULTILINE,
+)
+VHDL_REQUIRES = re.compile(
+    r"\buse\s+\w+\s*\.\s*(\w+)|"
+    r"\bcontext\s+\w+\s*\.\s*(\w+)\s*;|"
+    r"\bentity\s+\w+\s*\.\s*(\w+)|"
+    r"\bpackage\s+body\s+(\w+)|"
+    r"\barchitecture\s+\w+\s+of\s+(\w+)|"
+    r"\bconfiguration\s+\w+\s+of\s+(\w+)|"
+    r"\bcomponent\s+(\w+)|"
+    r"^\s*\w+\s*:\s*(?:component\s+)?(\w+)\s+(?:generic|port)\s+map\b",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+VERILOG_COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+VERILOG_PROVIDES = re.compile(
+    r"^\s*(?:module|macromodule|interface|program|package|primitive|checker)\s+(?:(?:static|automatic)\s+)?(\w+)",
+    re.MULTILINE,
+)
+VERILOG_REQUIRES = re.compile(
+    r"\b(\w+)\s*::|"
+    r"^\s*(\w+)\s*(?:#\s*\(|\w+\s*(?:\[[^\]]*\]\s*)?\()",
+    re.MULTILINE,
+)
+VERILOG_INCLUDE = re.compile(r"`include\s+\"([^\"]+)\"")
+
+
+class DesignUnits:
+    """
+    The design units a source file declares and the design units and include
+    files it depends on. All names are stored in lower case to allow matching
+    across VHDL and Verilog.
+    """
+
+    def __init__(
+        self,
+        provides: Iterable[str] = (),
+        requires: Iterable[str] = (),
+        includes: Iterable[str] = (),
+    ) -> None:
+        self.provides: set[str] = {n.lower() for n in provides}
+        self.requires: set[str] = {n.lower() for n in requires} - self.provides
+        self.includes: set[str] = set(includes)
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(provides={self.provides}, requires={self.requires}, includes={self.includes})"
+        )
+
+
+_scan_cache: dict[Path, tuple[int, DesignUnits]] = {}
+
+
+def _matches(pattern: re.Pattern, text: str) -> Generator[str, None, None]:
+    for match in pattern.finditer(text):
+        for group in match.groups():
+            if group:
+                yield group
+
+
+def scan_vhdl(text: str) -> DesignUnits:
+    text = VHDL_COMMENT.sub("", text)
+    return DesignUnits(provides=_matches(VHDL_PROVIDES, text), requires=_matches(VHDL_REQUIRES, text))
+
+
+def scan_verilog(text: str) -> DesignUnits:
+    text = VERILOG_COMMENT.sub("", text)
+    return DesignUnits(
+        provides=_matches(VERILOG_PROVIDES, text),
+        requires=_matches(VERILOG_REQUIRES, text),
+        includes=[Path(f).name for f in VERILOG_INCLUDE.findall(text)],
+    )
+
+
+def scan_file(file: File) -> DesignUnits:
+    """
+    Scan a HDL file for the design units it declares and depends on. The
+    result is cached on the path and modification time of the file, so
+    scanning the same unchanged file again is free.
+    """
+    if isinstance(file, HdlSearchPath):
+        return DesignUnits()
+    elif isinstance(file, VhdlFile):
+        scanner = scan_vhdl
+    elif isinstance(file, (VerilogFile, SystemVerilogFile, VerilogIncludeFile)):
+        scanner = scan_verilog
+    else:
+        return DesignUnits()
+    path = file.path.resolve()
+    try:
+        mtime = path.stat().st_mtime_ns
+        cached = _scan_cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with path.open("r", errors="replace") as f:
+            text = f.read()
+    except OSError:
+        logger.debug(f"{path}: can't scan for design units")
+        return DesignUnits()
+    units = scanner(text)
+    _scan_cache[path] = (mtime, units)
+    return units
+
+
+def _library(file: File) -> str | None:
+    try:
+        return file.library.name
+    except AttributeError:
+        return None
+
+
+def dependency_graph(files: Iterable[File]) -> nx.DiGraph:
+    """
+    Build a file graph from the design unit dependencies of the files. An edge
+    from file A to file B means that A depends on B, i.e. B must be compiled
+    before A. This is the same convention as the declarative file graph of the
+    design.
+    """
+    files = list(files)
+    graph = nx.DiGraph()
+    graph.add_nodes_from(files)
+    units = {file: scan_file(file) for file in files}
+    providers: dict[str, list[File]] = {}
+    includes: dict[str, list[File]] = {}
+    for file in files:
+        for name in units[file].provides:
+            providers.setdefault(name, []).append(file)
+        if isinstance(file, VerilogIncludeFile) and not isinstance(file, HdlSearchPath):
+            includes.setdefault(file.path.name, []).append(file)
+
+    for file in files:
+        for name in units[file].requires:
+            candidates = [f for f in providers.get(name, []) if f is not file]
+            # NOTE: If a design unit is declared in more than one library, prefer
+            #       the one in the same library as the file that depends on it.
+            local = [f for f in candidates if _library(f) == _library(file)]
+            for provider in local or candidates:
+                graph.add_edge(file, provider)
+        for name in units[file].includes:
+            candidates = [f for f in includes.get(name, []) if f is not file]
+            # NOTE: Include files are found by name, prefer the ones in the same
+            #       fileset if more than one include file has the same name.
+            local = [f for f in candidates if f.parent is file.parent]
+            for include in local or candidates:
+                graph.add_edge(file, include)
+    return graph
+
+
+def strata(files: Iterable[File], graph: nx.DiGraph | None = None) -> list[list[File]]:
+    """
+    Group files into compile strata. All dependencies of a file are in an
+    earlier stratum, so the files within a stratum can be compiled in
+    parallel. Within a stratum the files keep the order of the given files.
+
+    Files in a dependency cycle cannot be compiled in parallel and are put in
+    strata of their own, in the order of the given files.
+    """
+    files = list(files)
+    if graph is None:
+        graph = dependency_graph(files)
+    index = {file: i for i, file in enumerate(files)}
+    condensed = nx.condensation(graph)
+    result: list[list[File]] = []
+    # NOTE: Walk the reversed graph so files without dependencies end up in the
+    #       first stratum, regardless of how deep their dependents are.
+    for generation in nx.topological_generations(condensed.reverse(copy=False)):
+        stratum: list[File] = []
+        cycles: list[list[File]] = []
+        for component in generation:
+            members = sorted(condensed.nodes[component]["members"], key=index.__getitem__)
+            if len(members) == 1:
+                stratum += members
+            else:
+                logger.warning(f"Cyclic design unit dependency: {' -> '.join(str(f.path.name) for f in members)}")
+                cycles.append(members)
+        stratum.sort(key=index.__getitem__)
+        if stratum:
+            result.append(stratum)
+        for members in sorted(cycles, key=lambda m: index[m[0]]):
+            result += [[f] for f in members]
+    return result
@@ -6,6 +6,7 @@ from typing import TYPE_CHECKING, Type
 
 import networkx as nx
 
+from .dependencies import strata
 from .files import filter_files
 from .project import ProjectError
 from .fileset import FileOrder, FilesetOrder
@@ -80,9 +81,29 @@ class Design:
         if order == FileOrder.COMPILE:
             return list(reversed(file_collection))
         elif order == FileOrder.STRATA:
-            raise NotImplementedError("FileOrder.STRATA not implemented yet")
+            return [f for stratum in self.strata(type, **filters) for f in stratum]
         return file_collection
 
+    def strata(
+        self,
+        type: Type[File] | tuple[Type[File], ...] | None = None,
+        **filters,
+    ) -> list[list[File]]:
+        """
+        Retrieves files grouped in compile strata based on the design unit
+        dependencies found in the HDL sources. All dependencies of a file are in
+        an earlier stratum, so files within a stratum can be compiled in
+        parallel.
+        """
+        all_files = self.files()
+        selected = set(filter_files(all_files, file_type=type, **filters))
+        result = []
+        for stratum in strata(all_files):
+            stratum = [f for f in stratum if f in selected]
+            if stratum:
+                result.append(stratum)
+        return result
+
     def filesets(self, order: FilesetOrder = FilesetOrder.COMPILE) -> list[File]:
         fs = list(nx.topological_sort(self._filesets))
         if order == FilesetOrder.HIERARCHY:
@@ -4,7 +4,8 @@ from enum import Enum
 import logging
 from pathlib import Path
 from typing import TYPE_CHECKING, Callable, Type, Iterable, Generator
-from weakref import WeakValueDictionary
+
+from .project import unique_objects
 
 if TYPE_CHECKING:
     import networkx as nx
@@ -27,7 +28,6 @@ class FileOrder(float, Enum):
 
 
 class File:
-    _cache = WeakValueDictionary()
     _default_usedin: list[str] = [UsedIn.SIMULATION, UsedIn.IMPLEMENTATION]
     _default_order: FileOrder = FileOrder.NORMAL
     _default_encrypt: bool = False
@@ -35,11 +35,12 @@ class File:
 
     def __new__(cls, file: Path | str, **attributes) -> File:
         file = Path(file) if isinstance(file, str) else file
-        if file.resolve() in cls._cache:
-            return cls._cache[file.resolve()]
+        cache = unique_objects(File)
+        if file.resolve() in cache:
+            return cache[file.resolve()]
 
         instance = super().__new__(cls)
-        cls._cache[file.resolve()] = instance
+        cache[file.resolve()] = instance
         return instance
 
     def __init__(self, file: Path | str, **attributes) -> None:
@@ -3,12 +3,12 @@ from __future__ import annotations
 from enum import auto, Enum
 import logging
 from typing import TYPE_CHECKING, Generator, Type
-from weakref import WeakValueDictionary
 
 import networkx as nx
 
+from .dependencies import strata
 from .files import filter_files
-from .project import Project
+from .project import Project, current_project, unique_objects
 
 if TYPE_CHECKING:
     from .attributes import Library
@@ -32,14 +32,13 @@ class FilesetOrder(Enum):
 
 
 class Fileset:
-    _cache = WeakValueDictionary()
-
     def __new__(cls, name: str, **attributes) -> Fileset:
-        if name in cls._cache:
-            return cls._cache[name]
+        cache = unique_objects(Fileset)
+        if name in cache:
+            return cache[name]
 
         instance = super().__new__(cls)
-        cls._cache[name] = instance
+        cache[name] = instance
         return instance
 
     def __init__(self, name: str, **attributes) -> None:
@@ -48,7 +47,7 @@ class Fileset:
             return
 
         self._name: str = name
-        self._project: Project = Project()
+        self._project: Project = current_project()
         self.library = attributes.get("library", None)
         self._leafs: list = []
         self._roots: list = []
@@ -85,7 +84,9 @@ class Fileset:
         elif order == FileOrder.HIERARCHY:
             return list(file_collection)
         elif order == FileOrder.STRATA:
-            raise NotImplementedError("FileOrder.STRATA not implemented yet")
+            selected = set(file_collection)
+            files = list(reversed(list(nx.topological_sort(subgraph))))
+            return [f for stratum in strata(files) for f in stratum if f in selected]
         raise NotImplementedError(f"Order '{order}' does not exists")
 
     @property
@@ -1,27 +1,71 @@
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING
-
-from singleton_decorator import singleton
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Generator
+from weakref import WeakValueDictionary
 
 if TYPE_CHECKING:
     from pathlib import Path
     from .attributes import Target
     from .design import Design
 
-__all__ = ["Project", "ProjectError"]
+__all__ = ["Project", "ProjectError", "current_project", "unique_objects"]
 
 logger = logging.getLogger(__name__)
 
+_current: ContextVar[Project | None] = ContextVar("simplhdl_project", default=None)
+
+# NOTE: Files and filesets created when there is no current project.
+_detached: dict[type, WeakValueDictionary] = dict()
+
 
 class ProjectError(Exception):
     pass
 
 
-@singleton
+def current_project() -> Project:
+    """
+    Get the current project of the thread or task, which is the project
+    created last or activated with Project.activate().
+    """
+    project = _current.get()
+    if project is None:
+        raise ProjectError("No project has been created")
+    return project
+
+
+def unique_objects(cls: type) -> WeakValueDictionary:
+    """
+    Get the cache of unique instances of a class, e.g. File or Fileset, in the
+    current project. Each project has its own caches, so several projects can
+    have files with the same path and filesets with the same name.
+    """
+    project = _current.get()
+    caches = _detached if project is None else project._objects
+    try:
+        return caches[cls]
+    except KeyError:
+        return caches.setdefault(cls, WeakValueDictionary())
+
+
 class Project:
-    def __init__(self, name: str, **attributes) -> None:
+    """
+    A project. Creating a project makes it the current project of the thread
+    or task, which libraries, filesets and files created afterwards belong
+    to. Project() without a name returns the current project.
+    """
+
+    def __new__(cls, name: str | None = None, **attributes) -> Project:
+        if name is None:
+            return current_project()
+        return super().__new__(cls)
+
+    def __init__(self, name: str | None = None, **attributes) -> None:
+        if hasattr(self, "_initialized"):
+            return
+
         self._name = name
         self._designs: list[Design] = []
         self._part: str | None = None
@@ -32,6 +76,21 @@ class Project:
         self._hooks: dict[str, list[str]] = {}
         self._targets: dict[str, Target] = {}
         self._builddir: Path | None = None
+        self._objects: dict[type, WeakValueDictionary] = dict()
+        self._initialized = True
+        _current.set(self)
+
+    @contextmanager
+    def activate(self) -> Generator[Project, None, None]:
+        """
+        Make the project the current project within the with statement, e.g.
+        when a project is used in another thread than it was created in.
+        """
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
 
     @property
     def name(self) -> str:
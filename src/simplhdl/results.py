@@ -0,0 +1,395 @@
+"""
+Results of simulation runs. Each simulate step records a compact result in an
+SQLite database in the output directory, or in the database given by the
+SIMPLHDL_RESULTS_DB environment variable, which `simpl run` uses to collect
+the results of all its targets in one database. `simpl run` also records the
+duration and status of each of its jobs, which are used to schedule the jobs
+of the next run. The implementation flows record the timing, resources and
+step runtimes of each build, parsed from the reports of the tool.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import socket
+import sqlite3
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from pathlib import Path
+from typing import Any
+
+from .matchers import UVM_MATCHERS, LogMatcher, Severity
+from .utils import StopCommand
+
+__all__ = ["JobHistory", "ResultsDatabase", "SimulationLog", "cocotb_results", "database_path", "save_build"]
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    target TEXT,
+    flow TEXT NOT NULL,
+    test TEXT NOT NULL,
+    seed TEXT,
+    status TEXT NOT NULL,
+    wall_time REAL NOT NULL,
+    tool_time REAL NOT NULL,
+    uvm_warnings INTEGER,
+    uvm_errors INTEGER,
+    uvm_fatals INTEGER,
+    cocotb_tests INTEGER,
+    cocotb_failures INTEGER,
+    cocotb_xml BLOB,
+    errors INTEGER,
+    fatals INTEGER,
+    messages TEXT,
+    host TEXT,
+    cwd TEXT,
+    argv TEXT,
+    builddir TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_test ON runs (target, flow, test, seed, started);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    target TEXT NOT NULL,
+    seed TEXT,
+    status TEXT NOT NULL,
+    duration REAL NOT NULL,
+    host TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_target ON jobs (target, seed, started);
+CREATE TABLE IF NOT EXISTS builds (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    target TEXT,
+    flow TEXT NOT NULL,
+    design TEXT NOT NULL,
+    step TEXT,
+    status TEXT NOT NULL,
+    wall_time REAL NOT NULL,
+    setup_wns REAL,
+    setup_tns REAL,
+    hold_wns REAL,
+    hold_tns REAL,
+    fmax REAL,
+    peak_memory REAL,
+    report TEXT,
+    host TEXT,
+    builddir TEXT
+);
+CREATE INDEX IF NOT EXISTS builds_design ON builds (target, flow, design, started);
+"""
+
+UVM_SUMMARY = re.compile(r"^\W*(UVM_WARNING|UVM_ERROR|UVM_FATAL)\s*:\s*(\d+)\s*$")
+
+
+def database_path(outputdir: Path) -> Path:
+    if "SIMPLHDL_RESULTS_DB" in os.environ:
+        return Path(os.environ["SIMPLHDL_RESULTS_DB"])
+    return outputdir.joinpath("results.db")
+
+
+class SimulationLog:
+    """
+    Listener for the output of a simulation, which saves the output in a log
+    file and counts the messages found by the matchers of the simulator, e.g.
+    the UVM errors. The counts of the UVM report summary are used, or if the
+    simulation ended before the summary, the number of messages. The
+    simulation is stopped when `max_errors` errors and fatals are reported.
+    """
+
+    def __init__(self, path: Path, matchers: list[LogMatcher] | None = None, max_errors: int | None = None) -> None:
+        self.file = path.open("w")
+        self.matchers = UVM_MATCHERS if matchers is None else matchers
+        self.max_errors = max_errors
+        self.messages = {matcher.name: 0 for matcher in self.matchers}
+        self.summary: dict[str, int] = dict()
+        self.reported = 0
+        self.stopped: str | None = None
+
+    def __call__(self, line: str) -> None:
+        self.file.write(line)
+        m = UVM_SUMMARY.match(line)
+        if m:
+            self.summary[m.group(1)] = int(m.group(2))
+            return
+        for matcher in self.matchers:
+            if matcher(line):
+                self.messages[matcher.name] += 1
+                if matcher.severity != Severity.WARNING:
+                    self.reported += 1
+                break
+        if self.max_errors and self.stopped is None and self.reported >= self.max_errors:
+            self.stopped = f"Stopped the simulation after {self.reported} errors"
+            raise StopCommand(self.stopped)
+
+    def close(self) -> None:
+        self.file.close()
+
+    @property
+    def is_uvm(self) -> bool:
+        return bool(self.summary) or any(self.messages.get(m.name) for m in UVM_MATCHERS)
+
+    def count(self, name: str) -> int:
+        return self.summary.get(name, self.messages.get(name, 0))
+
+    def total(self, severity: Severity) -> int:
+        return sum(self.count(matcher.name) for matcher in self.matchers if matcher.severity == severity)
+
+    @property
+    def errors(self) -> int:
+        return self.total(Severity.ERROR)
+
+    @property
+    def fatals(self) -> int:
+        return self.total(Severity.FATAL)
+
+
+def cocotb_results(path: Path) -> tuple[int, int, bytes] | None:
+    """
+    Get the number of tests and failures of a cocotb results file, and the
+    compressed file.
+    """
+    try:
+        text = path.read_bytes()
+        root = ET.fromstring(text)
+    except (OSError, ET.ParseError) as e:
+        logger.debug(f"{path}: {e}")
+        return None
+    testcases = list(root.iter("testcase"))
+    failures = [t for t in testcases if t.find("failure") is not None or t.find("error") is not None]
+    return len(testcases), len(failures), zlib.compress(text)
+
+
+class JobHistory:
+    """
+    The number of recent runs of a job, their mean duration, how many of them
+    failed, and whether the latest run failed.
+    """
+
+    def __init__(self, runs: int, duration: float, failures: int, failed: bool) -> None:
+        self.runs = runs
+        self.duration = duration
+        self.failures = failures
+        self.failed = failed
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(runs={self.runs}, duration={self.duration:.1f}, failures={self.failures})"
+
+
+class ResultsDatabase:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # NOTE: Targets run in parallel write to the same database, so wait
+        #       for the lock instead of failing.
+        self.connection = sqlite3.connect(path, timeout=60)
+        self.connection.row_factory = sqlite3.Row
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            self.migrate()
+
+    def migrate(self) -> None:
+        """
+        Add the columns added by later versions of the schema to the tables of
+        an existing database.
+        """
+        schema = sqlite3.connect(":memory:")
+        schema.executescript(SCHEMA)
+        for (table,) in schema.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+            existing = {row[1] for row in self.connection.execute(f"PRAGMA table_info({table})")}
+            for _, column, type, *_ in schema.execute(f"PRAGMA table_info({table})").fetchall():
+                if column not in existing:
+                    self.connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {type}")
+        schema.close()
+
+    def __enter__(self) -> ResultsDatabase:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def insert(self, table: str, fields: dict[str, Any]) -> int:
+        fields.setdefault("started", time.time())
+        columns = ", ".join(fields)
+        values = ", ".join("?" for _ in fields)
+        with self.connection:
+            cursor = self.connection.execute(
+                f"INSERT INTO {table} ({columns}) VALUES ({values})", list(fields.values())
+            )
+        return cursor.lastrowid
+
+    def record(self, **fields: Any) -> int:
+        """
+        Record the result of a simulation and return its id.
+        """
+        return self.insert("runs", fields)
+
+    def record_build(self, **fields: Any) -> int:
+        """
+        Record the result of a build and return its id.
+        """
+        return self.insert("builds", fields)
+
+    def record_job(self, target: str, seed: Any, status: str, duration: float, host: str | None = None) -> None:
+        """
+        Record the duration and status of a job of `simpl run`.
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO jobs (started, target, seed, status, duration, host) VALUES (?, ?, ?, ?, ?, ?)",
+                [time.time() - duration, target, None if seed is None else str(seed), status, duration, host],
+            )
+
+    def history(self, window: int = 10) -> dict[tuple[str, str | None], JobHistory]:
+        """
+        Get the history of the last `window` jobs of each target and seed.
+        """
+        rows = self.connection.execute(
+            """
+            SELECT target, seed, COUNT(*) AS runs, AVG(duration) AS duration, SUM(status != 'passed') AS failures,
+                   MAX(CASE WHEN n = 1 THEN status != 'passed' END) AS failed
+            FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY target, seed ORDER BY id DESC) AS n FROM jobs
+            ) WHERE n <= ? GROUP BY target, seed
+            """,
+            [window],
+        ).fetchall()
+        return {
+            (row["target"], row["seed"]): JobHistory(row["runs"], row["duration"], row["failures"], bool(row["failed"]))
+            for row in rows
+        }
+
+    def runs(self, limit: int = 20, status: str | None = None) -> list[sqlite3.Row]:
+        """
+        Get the latest runs, newest first.
+        """
+        where = "" if status is None else "WHERE status = ?"
+        params = [] if status is None else [status]
+        return self.connection.execute(
+            f"SELECT * FROM runs {where} ORDER BY started DESC, id DESC LIMIT ?", [*params, limit]
+        ).fetchall()
+
+    def builds(self, limit: int = 20) -> list[sqlite3.Row]:
+        """
+        Get the latest builds, newest first.
+        """
+        return self.connection.execute(
+            "SELECT * FROM builds ORDER BY started DESC, id DESC LIMIT ?", [limit]
+        ).fetchall()
+
+    def latest(self, status: str | None = None) -> list[sqlite3.Row]:
+        """
+        Get the latest run of each test, target and seed, e.g. to find the
+        tests which currently fail.
+        """
+        rows = self.connection.execute(
+            """
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (
+                    PARTITION BY target, flow, test, seed ORDER BY started DESC, id DESC
+                ) AS n FROM runs
+            ) WHERE n = 1 ORDER BY target, flow, test, seed
+            """
+        ).fetchall()
+        return [row for row in rows if status is None or row["status"] == status]
+
+    def slowest(self, limit: int = 20) -> list[sqlite3.Row]:
+        """
+        Get the tests with the longest mean wall time.
+        """
+        return self.connection.execute(
+            """
+            SELECT target, flow, test, COUNT(*) AS runs, AVG(wall_time) AS mean, MAX(wall_time) AS max,
+                   AVG(tool_time) AS tool
+            FROM runs GROUP BY target, flow, test ORDER BY mean DESC LIMIT ?
+            """,
+            [limit],
+        ).fetchall()
+
+    def flaky(self, limit: int = 20, window: int = 20) -> list[sqlite3.Row]:
+        """
+        Get the tests which both passed and failed in their last runs, ranked
+        by how often the status changed from one run to the next.
+        """
+        return self.connection.execute(
+            """
+            WITH recent AS (
+                SELECT target, flow, test, status, started, id, ROW_NUMBER() OVER (
+                    PARTITION BY target, flow, test ORDER BY started DESC, id DESC
+                ) AS n FROM runs
+            ),
+            changes AS (
+                SELECT *, status != LAG(status) OVER (
+                    PARTITION BY target, flow, test ORDER BY started, id
+                ) AS changed FROM recent WHERE n <= ?
+            )
+            SELECT target, flow, test, COUNT(*) AS runs, SUM(status = 'failed') AS failures,
+                   SUM(COALESCE(changed, 0)) AS changes
+            FROM changes GROUP BY target, flow, test
+            HAVING failures > 0 AND failures < runs
+            ORDER BY changes DESC, failures DESC LIMIT ?
+            """,
+            [window, limit],
+        ).fetchall()
+
+
+def save_build(builddir: Path, flow: str, design: str, step: str, passed: bool, started: float, report: dict) -> None:
+    """
+    Save the report of a build as report.json in the build directory, and
+    record the build in the results database. The WNS, TNS and lowest Fmax
+    have their own columns, to follow their trend, and the whole report is
+    saved as compact JSON.
+    """
+    try:
+        with builddir.joinpath("report.json").open("w") as f:
+            json.dump(report, f, indent=2)
+    except OSError as e:
+        logger.warning(f"{builddir}: can't save report: {e}")
+    fmax = report.get("fmax", dict())
+    steps = report.get("steps", dict())
+    result = dict(
+        started=started,
+        target=os.environ.get("SIMPLHDL_TARGET"),
+        flow=flow,
+        design=design,
+        step=step,
+        status="passed" if passed else "failed",
+        wall_time=time.time() - started,
+        setup_wns=report.get("setup_wns"),
+        setup_tns=report.get("setup_tns"),
+        hold_wns=report.get("hold_wns"),
+        hold_tns=report.get("hold_tns"),
+        fmax=min(fmax.values(), default=None),
+        peak_memory=max((s["peak_memory"] for s in steps.values() if "peak_memory" in s), default=None),
+        report=json.dumps(report, separators=(",", ":")),
+        host=socket.gethostname(),
+        builddir=str(builddir.absolute()),
+    )
+    summary = [
+        f"{name} {result[key]:.3f} ns"
+        for name, key in (("WNS", "setup_wns"), ("TNS", "setup_tns"))
+        if result[key] is not None
+    ]
+    if fmax:
+        clock = min(fmax, key=fmax.get)
+        summary.append(f"Fmax {fmax[clock]:.1f} MHz ({clock})")
+    if summary:
+        logger.info(f"{design}: {', '.join(summary)}")
+    path = database_path(builddir.parent)
+    try:
+        with ResultsDatabase(path) as database:
+            database.record_build(**result)
+    except sqlite3.Error as e:
+        logger.warning(f"{path}: can't record build: {e}")
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import logging
 
 import networkx as nx
@@ -7,9 +9,12 @@ from argparse import Namespace
 from .project.project import Project, ProjectError
 from .project.design import Design
 from .project.attributes import Library
-from .plugin.parser import ParserFactory
-from .plugin.flow import FlowFactory
+from .plugin.parser import ParserFactory, ParserError
+from .plugin.flow import FlowBase, FlowError, FlowFactory
 from .plugin.generator import GeneratorFactory, GeneratorError
+from .trace import span, traced
+from .utils import CalledShError
+from .watch import Watcher
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +24,7 @@ class Simplhdl:
         self.args = args
         self.builddir: Path = args.outputdir
 
+    @traced()
     def create_project(self, builddir: Path) -> Project:
         filename = self.args.projectspec
         project = Project("default")
@@ -26,28 +32,95 @@ class Simplhdl:
         design = Design("default")
         project.add_design(design)
         project.defaultDesign.defaultLibrary = Library("work")
-        parser = ParserFactory().get_parser(filename)
-        fileset = parser.parse(filename, project, self.args)
-        project.defaultDesign.add_fileset(fileset)
-        project.elaborate()
-        project.validate()
+        with span("parse"):
+            parser = ParserFactory().get_parser(filename)
+            fileset = parser.parse(filename, project, self.args)
+            project.defaultDesign.add_fileset(fileset)
+        with span("elaborate"):
+            project.elaborate()
+        with span("validate"):
+            project.validate()
         return project
 
-    def run(self):
+    def project_files(self, project: Project) -> list[Path]:
+        """
+        Get the project specification files the project was created from.
+        """
+        paths = [Path(fs.name) for fs in project.defaultDesign.filesets() if Path(fs.name).is_file()]
+        if self.args.projectspec is not None:
+            paths.append(self.args.projectspec)
+        return [path.resolve() for path in paths]
+
+    def run(self, project: Project | None = None):
+        if getattr(self.args, "watch", False):
+            try:
+                self.watch()
+            except KeyboardInterrupt:
+                logger.info("Stopped watching")
+        else:
+            self.run_flow(self.create_flow(project))
+
+    def watch(self) -> None:
+        """
+        Run the flow and run it again every time a project file changes. If a
+        project specification file changes the project is created again,
+        otherwise the flow regenerates its files and executes again, which
+        only recompiles what has changed.
+        """
+        specfiles: list[Path] = list()
+        sources: list[Path] = list()
+        while True:
+            flow = None
+            try:
+                flow = self.create_flow()
+                specfiles = self.project_files(flow.project)
+                sources = [f.path.resolve() for f in flow.project.defaultDesign.files()]
+                self.run_flow(flow)
+            except (CalledShError, FileNotFoundError, FlowError, GeneratorError, ParserError, ProjectError) as e:
+                logger.error(e)
+            if not specfiles:
+                raise ProjectError("Can't watch a project which can't be created")
+            with Watcher(specfiles + sources) as watcher:
+                logger.info("Waiting for changes...")
+                while True:
+                    changed = watcher.wait()
+                    logger.info(f"Changed: {', '.join(p.name for p in sorted(changed))}")
+                    if flow is None or changed.intersection(specfiles):
+                        break
+                    try:
+                        flow.rerun()
+                    except (CalledShError, FileNotFoundError, FlowError) as e:
+                        logger.error(e)
+                    logger.info("Waiting for changes...")
+
+    @traced()
+    def create_flow(self, project: Project | None = None) -> FlowBase:
         builddir = self.builddir.joinpath(self.args.flow)
-        project = self.create_project(builddir)
+        if project is None:
+            project = self.create_project(builddir)
         flow = FlowFactory.get_flow(self.args.flow, self.args, project, builddir)
-        generators = GeneratorFactory.get_generators(self.args, project, builddir)
-        try:
-            for generator in generators:
-                generator.run(flow)
-                try:
+        with project.activate():
+            generators = GeneratorFactory.get_generators(self.args, project, builddir)
+            try:
+                for generator in generators:
+                    with span(generator.name, "generator"):
+                        generator.run(flow)
+                    try:
+                        with span("elaborate"):
+                            project.elaborate()
+                            project.validate()
+                    except ProjectError as e:
+                        raise GeneratorError(e)
+                with span("elaborate"):
                     project.elaborate()
-                    project.validate()
-                except ProjectError as e:
-                    raise GeneratorError(e)
-            project.elaborate()
-            flow.run()
+            except nx.NetworkXUnfeasible:
+                project.defaultDesign.validate()
+        return flow
 
+    @traced()
+    def run_flow(self, flow: FlowBase) -> None:
+        try:
+            with flow.project.activate(), span(flow.name, "flow"):
+                flow.run()
         except nx.NetworkXUnfeasible:
-            project.defaultDesign.validate()
+            flow.project.defaultDesign.validate()
@@ -0,0 +1,135 @@
+"""
+Timing of the phases of a simplhdl run. Phases are recorded with the span()
+context manager or the traced() decorator, and can be written as a Chrome
+trace file, which can be opened in chrome://tracing or https://ui.perfetto.dev,
+or summarized in a table.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Generator
+
+from rich.console import Console
+from rich.table import Table
+
+__all__ = ["Tracer", "clear", "print_summary", "span", "traced", "tracer", "write"]
+
+logger = logging.getLogger(__name__)
+
+
+class Tracer:
+    def __init__(self) -> None:
+        self.events: list[dict[str, Any]] = list()
+        self.lock = threading.Lock()
+
+    def add(self, name: str, category: str, start: float, end: float, args: dict[str, Any]) -> None:
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": start * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.events.clear()
+
+    def write(self, filename: Path) -> None:
+        with self.lock:
+            events = sorted(self.events, key=lambda e: e["ts"])
+        with filename.open("w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        logger.debug(f"Wrote trace to {filename}")
+
+    def total(self, category: str, since: float = 0.0) -> float:
+        """
+        Get the total time in seconds of the phases of a category, which
+        started after a time from time.perf_counter().
+        """
+        with self.lock:
+            return sum(e["dur"] for e in self.events if e["cat"] == category and e["ts"] >= since * 1e6) / 1e6
+
+    def summary(self) -> list[tuple[str, str, int, float]]:
+        """
+        Get the number of calls and the total time in seconds of each phase,
+        in the order the phases first started.
+        """
+        phases: dict[tuple[str, str], list] = dict()
+        with self.lock:
+            events = sorted(self.events, key=lambda e: e["ts"])
+        for event in events:
+            phase = phases.setdefault((event["cat"], event["name"]), [0, 0.0])
+            phase[0] += 1
+            phase[1] += event["dur"] / 1e6
+        return [(category, name, count, total) for (category, name), (count, total) in phases.items()]
+
+
+tracer = Tracer()
+
+
+@contextmanager
+def span(name: str, category: str = "simplhdl", **args: Any) -> Generator[None, None, None]:
+    """
+    Record the time spent in the body of the with statement as a phase.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracer.add(name, category, start, time.perf_counter(), args)
+
+
+def traced(name: str | None = None, category: str = "simplhdl") -> Callable:
+    """
+    Decorator recording the time spent in a function or method as a phase.
+    Methods are named after the class of the object they are called on.
+    """
+
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            phase = name
+            if phase is None:
+                if args and hasattr(args[0], function.__name__):
+                    phase = f"{type(args[0]).__name__}.{function.__name__}"
+                else:
+                    phase = function.__qualname__
+            with span(phase, category):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def clear() -> None:
+    tracer.clear()
+
+
+def write(filename: Path) -> None:
+    tracer.write(filename)
+
+
+def print_summary() -> None:
+    table = Table(title="Time spent")
+    table.add_column("Category")
+    table.add_column("Phase")
+    table.add_column("Calls", justify="right")
+    table.add_column("Time [s]", justify="right")
+    for category, name, count, total in tracer.summary():
+        table.add_row(category, name, str(count), f"{total:.3f}")
+    Console(stderr=True).print(table)
@@ -1,24 +1,66 @@
 from __future__ import annotations
 
+import json
 import logging
 import os
+import shutil
+import signal
 import sys
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
+from contextvars import ContextVar
 from hashlib import md5
 from pathlib import Path
-from subprocess import PIPE, STDOUT, Popen
+from subprocess import PIPE, STDOUT, Popen, TimeoutExpired
 from time import sleep
-from typing import Generator, Union
+from typing import Callable, Generator, Generic, TypeVar, Union
+from zipfile import ZipFile, ZipInfo
 
-from jinja2 import Template
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+from .trace import span
+
+try:
+    import fcntl
+except ImportError:
+    # NOTE: Windows
+    fcntl = None
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class CalledShError(Exception):
     pass
 
 
+class StopCommand(Exception):
+    """
+    Raised by a listener of sh() to stop the command, e.g. a simulation which
+    has reported too many errors.
+    """
+
+
+_listeners: ContextVar[tuple[Callable[[str], None], ...]] = ContextVar("simplhdl_sh_listeners", default=())
+
+
+@contextmanager
+def listen(listener: Callable[[str], None]) -> Generator[None, None, None]:
+    """
+    Call a function with each line of output of the commands run by sh()
+    within the with statement, e.g. to save or scan the output of a tool. The
+    listener can stop the command by raising StopCommand.
+    """
+    token = _listeners.set(_listeners.get() + (listener,))
+    try:
+        yield
+    finally:
+        _listeners.reset(token)
+
+
 def sh(
     command: list[str],
     cwd: Path | None = None,
@@ -32,23 +74,49 @@ def sh(
         shell = True
 
     logger.debug(" ".join(command))
-    with Popen(command, stdout=PIPE, stderr=STDOUT, cwd=cwd, shell=shell, env=env) as p:
-        if output:
-            stdout_text = ""
-            assert p.stdout is not None
-            for line in p.stdout:
-                sys.stdout.buffer.write(b" " * indent + line)
-                sys.stdout.buffer.flush()
-                stdout_text += line.decode()
-            p.wait()
-        else:
-            stdout_bytes, _ = p.communicate()
-            stdout_text = stdout_bytes.decode().strip()
-
-        if log:
-            with log.open("a") as f:
-                f.write(stdout_text)
-
+    listeners = _listeners.get()
+    stopped = None
+    with span(Path(command[0]).name, "sh", command=" ".join(command)):
+        # NOTE: A command which can be stopped by a listener runs in its own
+        #       session, so it can be stopped with the commands it has started.
+        session = bool(listeners) and os.name != "nt"
+        with Popen(command, stdout=PIPE, stderr=STDOUT, cwd=cwd, shell=shell, env=env, start_new_session=session) as p:
+            if output:
+                stdout_text = ""
+                assert p.stdout is not None
+                try:
+                    for line in p.stdout:
+                        sys.stdout.buffer.write(b" " * indent + line)
+                        sys.stdout.buffer.flush()
+                        text = line.decode(errors="replace")
+                        stdout_text += text
+                        for listener in listeners:
+                            listener(text)
+                except StopCommand as e:
+                    stopped = str(e)
+                    stop(p, session)
+                except BaseException:
+                    # NOTE: The session doesn't get the interrupt of the terminal.
+                    stop(p, session)
+                    raise
+                p.wait()
+            else:
+                stdout_bytes, _ = p.communicate()
+                stdout_text = stdout_bytes.decode().strip()
+                try:
+                    for text in stdout_text.splitlines(keepends=True):
+                        for listener in listeners:
+                            listener(text)
+                except StopCommand as e:
+                    stopped = str(e)
+
+            if log:
+                with log.open("a") as f:
+                    f.write(stdout_text)
+
+    if stopped is not None:
+        logger.error(stopped)
+        raise CalledShError(f"{stdout_text}\n{stopped}")
     if p.returncode != 0:
         if not output:
             logger.debug(stdout_text)
@@ -56,25 +124,364 @@ def sh(
     return stdout_text
 
 
-def generate_from_template(template: Template, output: Path, *args, **kwargs) -> bool:
-    templatefile = Path(template.filename)
-    if output.is_dir():
-        filename = output.joinpath(templatefile.name)
-        if filename.suffix == ".j2":
-            output = filename.with_suffix("")
+def stop(process: Popen, session: bool = False, timeout: float = 5.0) -> None:
+    """
+    Stop a command run by sh(), and the commands it has started if it runs in
+    its own session. The command is terminated, and killed if it hasn't
+    exited after the timeout.
+    """
+    try:
+        if session:
+            os.killpg(process.pid, signal.SIGTERM)
+        else:
+            process.terminate()
+        process.wait(timeout=timeout)
+    except ProcessLookupError:
+        pass
+    except TimeoutExpired:
+        if session:
+            os.killpg(process.pid, signal.SIGKILL)
         else:
-            output = filename
-    text = template.render(*args, **kwargs)
-    if output.exists():
+            process.kill()
+        process.wait()
+
+
+_environments: dict[str, Environment] = dict()
+
+
+def cachedir(*parts: str) -> Path | None:
+    """
+    Get a directory in the user cache directory of simplhdl. Returns None if
+    the directory can't be created, e.g. on a read-only home directory.
+    """
+    root = Path(os.environ.get("XDG_CACHE_HOME", Path.home().joinpath(".cache")))
+    directory = root.joinpath("simplhdl", *parts)
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+    except OSError:
+        logger.debug(f"{directory}: can't create cache directory")
+        return None
+    return directory
+
+
+def template_environment(templatedir) -> Environment:
+    """
+    Get the Jinja environment for a template directory. The environment is
+    created once and reused, so templates are only compiled once per process.
+    Compiled templates are also stored in a bytecode cache in the user cache
+    directory, so they are not compiled again on the next run.
+    """
+    key = str(templatedir)
+    if key not in _environments:
+        directory = cachedir("jinja")
+        bytecode_cache = FileSystemBytecodeCache(str(directory)) if directory is not None else None
+        _environments[key] = Environment(
+            loader=FileSystemLoader(templatedir), trim_blocks=True, bytecode_cache=bytecode_cache
+        )
+    return _environments[key]
+
+
+class OutputWriter:
+    """
+    Write generated files only when their content has changed. The digest,
+    size and modification time of each written file is remembered, so an
+    unchanged render is detected without reading the file back. Files are
+    written to a temporary file first and renamed into place, so an
+    interrupted run never leaves a half written file behind.
+
+    If a digest file is given the digests are stored there between runs.
+    """
+
+    def __init__(self, digestfile: Path | None = None) -> None:
+        self.digestfile = digestfile
+        self.digests: dict[str, list] = dict()
+        self.written = 0
+        self.rewritten = 0
+        if digestfile is not None and digestfile.is_file():
+            try:
+                with digestfile.open() as f:
+                    self.digests = json.load(f)
+            except (OSError, ValueError):
+                logger.debug(f"{digestfile}: can't read digests")
+
+    def __enter__(self) -> OutputWriter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.save()
+
+    def is_up_to_date(self, output: Path, text: str, digest: str) -> bool:
+        try:
+            stat = output.stat()
+        except FileNotFoundError:
+            return False
+        entry = self.digests.get(str(output.absolute()))
+        if entry is not None and entry[1:] == [stat.st_size, stat.st_mtime_ns]:
+            return entry[0] == digest
+        # NOTE: The file is unknown or changed by someone else, so compare the
+        #       content instead.
         with output.open() as f:
-            old_text = f.read()
-        if old_text == text:
+            return f.read() == text
+
+    def write(self, output: Path, text: str) -> bool:
+        """
+        Write text to output if it differs from the current content. Returns
+        True if the file was written.
+        """
+        self.written += 1
+        digest = md5(text.encode()).hexdigest()
+        if self.is_up_to_date(output, text, digest):
             logger.debug(f"{output.absolute()}: is already up to date")
-            return False
-    logger.debug(f"{output.absolute()}: create new")
-    with output.open("w") as f:
-        f.write(text)
-    return True
+            updated = False
+        else:
+            logger.debug(f"{output.absolute()}: create new")
+            tmpfile = output.with_name(f".{output.name}.{os.getpid()}.tmp")
+            try:
+                with tmpfile.open("w") as f:
+                    f.write(text)
+                os.replace(tmpfile, output)
+            finally:
+                tmpfile.unlink(missing_ok=True)
+            self.rewritten += 1
+            updated = True
+        stat = output.stat()
+        self.digests[str(output.absolute())] = [digest, stat.st_size, stat.st_mtime_ns]
+        return updated
+
+    def generate(self, template: Template, output: Path, *args, **kwargs) -> bool:
+        templatefile = Path(template.filename)
+        if output.is_dir():
+            filename = output.joinpath(templatefile.name)
+            if filename.suffix == ".j2":
+                output = filename.with_suffix("")
+            else:
+                output = filename
+        return self.write(output, template.render(*args, **kwargs))
+
+    def save(self) -> None:
+        if self.digestfile is None:
+            return
+        tmpfile = self.digestfile.with_name(f".{self.digestfile.name}.{os.getpid()}.tmp")
+        try:
+            with tmpfile.open("w") as f:
+                json.dump(self.digests, f)
+            os.replace(tmpfile, self.digestfile)
+        except OSError:
+            logger.debug(f"{self.digestfile}: can't write digests")
+        finally:
+            tmpfile.unlink(missing_ok=True)
+
+
+_writer = OutputWriter()
+
+
+class FileMemo(Generic[T]):
+    """
+    Memo of data read from files, e.g. parsed XML files, so each file is only
+    read once. A file is read again when its modification time or size has
+    changed.
+    """
+
+    def __init__(self, read: Callable[[Path], T]) -> None:
+        self.read = read
+        self.entries: dict[Path, tuple[tuple[int, int], T]] = dict()
+
+    def __call__(self, path: Path) -> T:
+        path = path.resolve()
+        stat = path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        entry = self.entries.get(path)
+        if entry is None or entry[0] != key:
+            entry = (key, self.read(path))
+            self.entries[path] = entry
+        return entry[1]
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+LINK_METHODS = ("reflink", "hardlink", "symlink", "copy")
+
+# NOTE: The ioctl cloning a file on Linux file systems with copy-on-write,
+#       e.g. btrfs and XFS.
+FICLONE = 0x40049409
+
+
+def reflink(src: Path, dst: Path) -> None:
+    if fcntl is None or not sys.platform.startswith("linux"):
+        raise OSError("reflinks aren't supported")
+    with src.open("rb") as s, dst.open("wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+def link_file(src: Path, dst: Path, method: str = "copy") -> str:
+    """
+    Make dst a reflink, hardlink or symlink of src, or a copy of it if the
+    file system doesn't support the link, and return the method used. The
+    link is made next to dst and renamed into place, so a hardlink or symlink
+    to another file is replaced, never written through.
+    """
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmpfile = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    try:
+        for m in dict.fromkeys([method, "copy"]):
+            tmpfile.unlink(missing_ok=True)
+            try:
+                if m == "reflink":
+                    reflink(src, tmpfile)
+                elif m == "hardlink":
+                    os.link(src, tmpfile)
+                elif m == "symlink":
+                    os.symlink(src.resolve(), tmpfile)
+                else:
+                    shutil.copy(src, tmpfile)
+            except OSError as e:
+                if m == "copy":
+                    raise
+                logger.debug(f"{dst}: can't {m} {src}: {e}")
+                continue
+            os.replace(tmpfile, dst)
+            return m
+    finally:
+        tmpfile.unlink(missing_ok=True)
+
+
+def sync_files(files: dict[str, Path], directory: Path, manifest: Path, method: str = "copy") -> int:
+    """
+    Keep links or copies of files in a directory, given by their paths in the
+    directory, in sync with the files, and return the number of files linked
+    or copied. The source, digest, size and modification time of each file is
+    stored in a manifest, so only files with a new content are linked again,
+    and files synced before which aren't given anymore are removed.
+    """
+    entries = read_manifest(manifest)
+    synced: dict[str, list] = dict()
+    updated = 0
+    for name, src in files.items():
+        dst = directory.joinpath(name)
+        stat = src.stat()
+        entry = entries.get(name)
+        digest = None
+        if entry is not None and entry[0] == str(src) and os.path.lexists(dst):
+            if entry[2:] == [stat.st_size, stat.st_mtime_ns]:
+                digest = entry[1]
+            else:
+                # NOTE: The file is touched or changed, so compare the digests.
+                digest = md5_add_file(src, md5()).hexdigest()
+        if entry is None or digest != entry[1]:
+            link_file(src, dst, method)
+            updated += 1
+            digest = digest or md5_add_file(src, md5()).hexdigest()
+        synced[name] = [str(src), digest, stat.st_size, stat.st_mtime_ns]
+    for name in entries.keys() - synced.keys():
+        logger.debug(f"Remove {directory.joinpath(name)}")
+        directory.joinpath(name).unlink(missing_ok=True)
+    write_manifest(manifest, synced)
+    return updated
+
+
+def read_manifest(manifest: Path) -> dict[str, list]:
+    try:
+        with manifest.open() as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        logger.debug(f"{manifest}: can't read manifest")
+        return dict()
+
+
+def write_manifest(manifest: Path, entries: dict[str, list]) -> None:
+    tmpfile = manifest.with_name(f".{manifest.name}.{os.getpid()}.tmp")
+    try:
+        with tmpfile.open("w") as f:
+            json.dump(entries, f)
+        os.replace(tmpfile, manifest)
+    finally:
+        tmpfile.unlink(missing_ok=True)
+
+
+# NOTE: Archives with more changed data than this are extracted in parallel.
+PARALLEL_EXTRACT_SIZE = 16 * 1024 * 1024
+
+
+def crc32(filename: Path) -> int:
+    crc = 0
+    with filename.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def extract_members(archive: Path, members: list[ZipInfo], directory: Path) -> None:
+    # NOTE: Each thread reads the archive with its own file object.
+    with ZipFile(archive) as zip:
+        for info in members:
+            target = directory.joinpath(info.filename)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmpfile = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                with zip.open(info) as src, tmpfile.open("wb") as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+                os.replace(tmpfile, target)
+            finally:
+                tmpfile.unlink(missing_ok=True)
+
+
+def extract_zip(archive: Path, directory: Path, manifest: Path, jobs: int | None = None) -> int:
+    """
+    Extract the members of a zip archive which differ from the files in a
+    directory by their CRC or size, and return the number of extracted
+    members. Unchanged files aren't written, so their modification times are
+    kept and make doesn't rebuild what depends on them. The CRC, size and
+    modification time of each file is stored in a manifest, so unchanged files
+    are found without reading them, and files extracted before which aren't in
+    the archive anymore are removed. Archives with much changed data are
+    extracted by `jobs` threads.
+    """
+    entries = read_manifest(manifest)
+    extracted: dict[str, list] = dict()
+    changed: list[ZipInfo] = list()
+    with ZipFile(archive) as zip:
+        for info in zip.infolist():
+            name = os.path.normpath(info.filename)
+            if os.path.isabs(name) or name.split(os.sep)[0] == os.pardir:
+                logger.warning(f"{archive}: {info.filename} is outside the archive and isn't extracted")
+                continue
+            target = directory.joinpath(name)
+            if info.is_dir():
+                target.mkdir(parents=True, exist_ok=True)
+                continue
+            extracted[info.filename] = [info.CRC, info.file_size]
+            try:
+                stat = target.stat()
+            except OSError:
+                changed.append(info)
+                continue
+            entry = entries.get(info.filename)
+            if entry is not None and entry[:3] == [info.CRC, info.file_size, stat.st_mtime_ns]:
+                continue
+            if stat.st_size != info.file_size or crc32(target) != info.CRC:
+                changed.append(info)
+    if changed:
+        logger.debug(f"Extract {len(changed)} of {len(extracted)} files of {archive} to {directory}")
+        jobs = jobs or os.cpu_count() or 1
+        if jobs > 1 and len(changed) > 1 and sum(info.file_size for info in changed) > PARALLEL_EXTRACT_SIZE:
+            chunks = [changed[i::jobs] for i in range(jobs)]
+            with ThreadPoolExecutor(max_workers=jobs) as pool:
+                for future in [pool.submit(extract_members, archive, chunk, directory) for chunk in chunks if chunk]:
+                    future.result()
+        else:
+            extract_members(archive, changed, directory)
+    for name, entry in extracted.items():
+        entry.append(directory.joinpath(name).stat().st_mtime_ns)
+    for name in entries.keys() - extracted.keys():
+        logger.debug(f"Remove {directory.joinpath(name)}")
+        directory.joinpath(name).unlink(missing_ok=True)
+    write_manifest(manifest, extracted)
+    return len(changed)
+
+
+def generate_from_template(template: Template, output: Path, *args, **kwargs) -> bool:
+    return _writer.generate(template, output, *args, **kwargs)
 
 
 def md5_add_file(filename: Path, hash):
@@ -121,6 +528,16 @@ def md5write(*items: Path, filename: Path) -> None:
         f.write(md5sum(*items))
 
 
+def seconds(duration: str) -> float:
+    """
+    Convert a duration like '01:02:03' or '02:03' to seconds.
+    """
+    total = 0.0
+    for part in duration.strip().split(":"):
+        total = total * 60 + float(part)
+    return total
+
+
 def append_suffix(path: Path, suffix: str) -> Path:
     return path.with_suffix(path.suffix + suffix)
 
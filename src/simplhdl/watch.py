@@ -0,0 +1,151 @@
+"""
+Wait for changes to a set of files. On Linux the directories of the files are
+watched with inotify, otherwise, or if inotify isn't available, the
+modification times of the files are polled.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Iterable
+
+__all__ = ["Watcher"]
+
+logger = logging.getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+IN_EVENT = struct.Struct("iIII")
+IN_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+def _libc() -> ctypes.CDLL | None:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    except OSError:
+        return None
+    if not hasattr(libc, "inotify_init1"):
+        return None
+    return libc
+
+
+class Watcher:
+    """
+    Watch files for changes. Bursts of changes, e.g. from an editor saving
+    several files, are collected until no file has changed for the debounce
+    time.
+
+    Args:
+        paths: The files to watch.
+        debounce: Seconds without changes before the changes are reported.
+        interval: Seconds between polls, when inotify isn't available.
+    """
+
+    def __init__(self, paths: Iterable[Path], debounce: float = 0.2, interval: float = 1.0) -> None:
+        self.paths = {Path(p).absolute() for p in paths}
+        self.debounce = debounce
+        self.interval = interval
+        self.fd: int | None = None
+        self.directories: dict[int, Path] = dict()
+        self.mtimes = self.stat()
+        self.libc = _libc()
+        if self.libc is not None:
+            self.inotify()
+        if self.fd is None:
+            logger.debug(f"Polling {len(self.paths)} files for changes")
+
+    def __enter__(self) -> Watcher:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def inotify(self) -> None:
+        fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            logger.debug(f"inotify: {os.strerror(ctypes.get_errno())}")
+            return
+        for directory in {p.parent for p in self.paths}:
+            wd = self.libc.inotify_add_watch(fd, os.fsencode(directory), IN_MASK)
+            if wd < 0:
+                # NOTE: E.g. the limit of watches is reached, poll instead.
+                logger.debug(f"inotify: {directory}: {os.strerror(ctypes.get_errno())}")
+                os.close(fd)
+                self.directories.clear()
+                return
+            self.directories[wd] = directory
+        self.fd = fd
+        logger.debug(f"Watching {len(self.paths)} files in {len(self.directories)} directories")
+
+    def stat(self) -> dict[Path, int | None]:
+        mtimes: dict[Path, int | None] = dict()
+        for path in self.paths:
+            try:
+                mtimes[path] = path.stat().st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def read(self, timeout: float | None) -> set[Path]:
+        """
+        Get the watched files that changed within the timeout.
+        """
+        if self.fd is None:
+            time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+            mtimes = self.stat()
+            changed = {p for p in self.paths if mtimes[p] != self.mtimes[p]}
+            self.mtimes = mtimes
+            return changed
+        changed: set[Path] = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return changed
+        data = os.read(self.fd, 1 << 16)
+        offset = 0
+        while offset < len(data):
+            wd, _, _, length = IN_EVENT.unpack_from(data, offset)
+            offset += IN_EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            path = self.directories.get(wd, Path()).joinpath(os.fsdecode(name))
+            if path in self.paths:
+                changed.add(path)
+        return changed
+
+    def wait(self) -> set[Path]:
+        """
+        Block until one or more of the watched files change and return the
+        changed files.
+        """
+        changed: set[Path] = set()
+        while not changed:
+            changed = self.read(None)
+        while True:
+            more = self.read(self.debounce)
+            if not more:
+                break
+            changed |= more
+        if self.fd is not None:
+            self.mtimes = self.stat()
+        return changed
@@ -6,13 +6,14 @@ import shutil
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
-from jinja2 import Environment, FileSystemLoader, Template
+from jinja2 import Template
 
 from simplhdl import FileOrder
 from simplhdl._compat import resources_files
+from simplhdl.matchers import LogMatcher, Severity
 from simplhdl.plugin import FlowError, FlowTools, SimulationFlow
 from simplhdl.project.files import SystemVerilogFile, UsedIn, VerilogFile
-from simplhdl.utils import escape, generate_from_template, sh
+from simplhdl.utils import escape, generate_from_template, sh, template_environment
 
 from .resources.templates import icarus as icarustemplates
 
@@ -23,6 +24,11 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+ICARUS_MATCHERS = [
+    LogMatcher("ICARUS_ERROR", r"^(ERROR|VVP error):", Severity.ERROR),
+    LogMatcher("ICARUS_FATAL", r"^FATAL:", Severity.FATAL),
+]
+
 
 class IcarusFlow(SimulationFlow):
     """Icarus Verilog simulation flow."""
@@ -47,6 +53,12 @@ class IcarusFlow(SimulationFlow):
         )
         parser.add_argument("--debug", action="store_true", help="Enable full debug capabilities")
         parser.add_argument("--gui", action="store_true", help="Open project in GtkWave GUI")
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Watch the project files and recompile and rerun when they change",
+        )
+        self.parse_log_args(parser)
         parser.add_argument(
             "--seed",
             type=int,
@@ -116,9 +128,13 @@ class IcarusFlow(SimulationFlow):
 
     def generate(self):
         templatedir = resources_files(self.templates)
-        env = Environment(loader=FileSystemLoader(templatedir), trim_blocks=True)
+        env = template_environment(templatedir)
+        globals = self.get_globals()
         for template in self.get_project_templates(env) + self.get_cocotb_templates(env):
-            generate_from_template(template, self.builddir, self.get_globals())
+            generate_from_template(template, self.builddir, globals)
+
+    def log_matchers(self) -> list[LogMatcher]:
+        return ICARUS_MATCHERS + super().log_matchers()
 
     def execute(self, step: str) -> None:
         self.run_hooks("pre")
@@ -140,7 +156,8 @@ class IcarusFlow(SimulationFlow):
             command = ["make", "gui"]
         else:
             command = ["make", step]
-        sh(command, cwd=self.builddir, output=True)
+        with self.simulation():
+            sh(command, cwd=self.builddir, output=True)
         if step == "simulate":
             self.run_hooks("post")
 
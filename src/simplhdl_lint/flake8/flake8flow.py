@@ -8,12 +8,10 @@ import shutil
 from argparse import Namespace
 from pathlib import Path
 
-from jinja2 import Environment, FileSystemLoader
-
 from simplhdl import Project
 from simplhdl.plugin import FlowBase
 from simplhdl.project.files import CocotbPythonFile
-from simplhdl.utils import CalledShError, generate_from_template, sh
+from simplhdl.utils import CalledShError, generate_from_template, sh, template_environment
 
 from ..resources.templates import flake8 as templates
 
@@ -55,7 +53,7 @@ class Flake8Flow(FlowBase):
             shutil.copy(config, self.builddir.joinpath("setup.cfg"))
         else:
             templatedir = resources_files(self.templates)
-            environment = Environment(loader=FileSystemLoader(templatedir), trim_blocks=True)
+            environment = template_environment(templatedir)
             template = environment.get_template("setup.cfg.j2")
             generate_from_template(template, self.builddir)
 
@@ -7,8 +7,6 @@ import os
 from argparse import Namespace
 from pathlib import Path
 
-from jinja2 import Environment, FileSystemLoader
-
 from simplhdl import Project
 from simplhdl.plugin import FlowBase, FlowError
 from simplhdl.project.files import (
@@ -16,7 +14,7 @@ from simplhdl.project.files import (
     VerilogIncludeFile,
     VerilogFile,
 )
-from simplhdl.utils import CalledShError, generate_from_template, sh
+from simplhdl.utils import CalledShError, generate_from_template, sh, template_environment
 
 from ..resources.templates import verible as templates
 
@@ -59,7 +57,7 @@ class VeribleFlow(FlowBase):
             self.rules = rules
         else:
             templatedir = resources_files(self.templates)
-            environment = Environment(loader=FileSystemLoader(templatedir), trim_blocks=True)
+            environment = template_environment(templatedir)
             template = environment.get_template("rules.cfg.j2")
             generate_from_template(template, self.builddir)
             self.rules = "rules.cfg"
@@ -7,12 +7,10 @@ import os
 from argparse import Namespace
 from pathlib import Path
 
-from jinja2 import Environment, FileSystemLoader
-
 from simplhdl import Project
 from simplhdl.plugin import FlowBase, FlowError
 from simplhdl.project.files import VhdlFile
-from simplhdl.utils import CalledShError, generate_from_template, sh
+from simplhdl.utils import CalledShError, generate_from_template, sh, template_environment
 
 from ..resources.templates import vsg as templates
 
@@ -55,7 +53,7 @@ class VsgFlow(FlowBase):
 
     def generate(self):
         templatedir = resources_files(self.templates)
-        environment = Environment(loader=FileSystemLoader(templatedir), trim_blocks=True)
+        environment = template_environment(templatedir)
         template = environment.get_template("files.json.j2")
         generate_from_template(template, self.builddir, VHDLSourceFile=VhdlFile, project=self.project)
         if self.args.rules:
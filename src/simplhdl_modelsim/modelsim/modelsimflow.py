@@ -10,6 +10,7 @@ from typing import Any
 from jinja2 import Template
 
 from simplhdl import Fileset, Project
+from simplhdl.matchers import LogMatcher, Severity
 from simplhdl.plugin import FlowTools, SimulationFlow
 from simplhdl.project.files import ModelsimIniFile
 from simplhdl.utils import escape, sh
@@ -18,6 +19,11 @@ from ..resources.templates import modelsim as modelsimtemplates
 
 logger = logging.getLogger(__name__)
 
+MODELSIM_MATCHERS = [
+    LogMatcher("MODELSIM_ERROR", r"^#?\s*\*\* Error\b", Severity.ERROR),
+    LogMatcher("MODELSIM_FATAL", r"^#?\s*\*\* Fatal\b", Severity.FATAL),
+]
+
 
 class Flag(list):
     def add(self, item):
@@ -81,6 +87,17 @@ class ModelSimFlow(SimulationFlow):
             metavar="ARGS",
             help="Extra arguments for ModelSim vlog command",
         )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Compile each file on its own and only recompile changed files and their dependents",
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Watch the project files and recompile and rerun when they change",
+        )
+        self.parse_log_args(parser)
         parser.add_argument(
             "--seed",
             type=int,
@@ -216,8 +233,9 @@ class ModelSimFlow(SimulationFlow):
         return library
 
     def generate(self):
-        super().generate()
+        rewritten = super().generate()
         self.copy_modelsim_ini()
+        return rewritten
 
     def copy_modelsim_ini(self):
         files = list(self.project.defaultDesign.files(ModelsimIniFile))
@@ -231,6 +249,9 @@ class ModelSimFlow(SimulationFlow):
                 logger.info(f"Use {file.path}")
                 shutil.copy(file.path.resolve(), self.builddir.resolve())
 
+    def log_matchers(self) -> list[LogMatcher]:
+        return MODELSIM_MATCHERS + super().log_matchers()
+
     def execute(self, step: str) -> None:
         self.run_hooks("pre")
 
@@ -251,7 +272,8 @@ class ModelSimFlow(SimulationFlow):
             command = ["make", "gui"]
         else:
             command = ["make", step]
-        sh(command, cwd=self.builddir, output=True)
+        with self.simulation():
+            sh(command, cwd=self.builddir, output=True)
         if step == "simulate":
             self.run_hooks("post")
 
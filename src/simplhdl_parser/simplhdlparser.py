@@ -10,7 +10,7 @@ from simplhdl import (
     Fileset,
     Project,
 )
-from simplhdl.__main__ import parse_arguments
+from simplhdl.cli.arguments import parse_arguments
 from simplhdl.plugin import ParserBase
 from simplhdl.project.files import FileFactory
 from simplhdl.project.attributes import Target
@@ -69,10 +69,12 @@ class SimplHdlParser(ParserBase):
             fileset.TopLevel = spec.get("top")
 
         for name, value in spec.get("targets", dict()).items():
+            argv = split(value)
             target = Target(
                 name=name,
-                args=parse_arguments(split(value)),
+                args=parse_arguments(argv),
                 cwd=self._core_stack[-1].parent,
+                argv=argv,
             )
             project.add_target(target)
         for name, value in spec.get("defines", dict()).items():
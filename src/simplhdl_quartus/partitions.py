@@ -0,0 +1,101 @@
+"""
+Design partitions of incremental Quartus compiles. The final snapshot of each
+partition is exported after a compile, and reused by the next compile if none
+of the source files of the partition have changed. The source files of a
+partition are found in the file graph, as the files the file declaring the
+entity of the partition depends on, and the files which depend on it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from argparse import ArgumentTypeError
+from pathlib import Path
+from typing import Iterable
+
+import networkx as nx
+
+from simplhdl.project.dependencies import dependency_graph, scan_file
+from simplhdl.project.files import File, HdlSearchPath, SystemVerilogFile, VerilogFile, VerilogIncludeFile, VhdlFile
+
+__all__ = ["Partition", "partition_digests", "read_digests", "write_digests"]
+
+logger = logging.getLogger(__name__)
+
+
+class Partition:
+    """
+    A design partition given as NAME:INSTANCE:ENTITY, e.g.
+    'core:u_top|u_core:core', where INSTANCE is the hierarchy path of the
+    instance of ENTITY which is the root of the partition.
+    """
+
+    def __init__(self, name: str, instance: str, entity: str) -> None:
+        self.name = name
+        self.instance = instance
+        self.entity = entity
+
+    @classmethod
+    def parse(cls, text: str) -> Partition:
+        fields = text.split(":")
+        if len(fields) != 3 or not all(fields):
+            raise ArgumentTypeError(f"{text}: partitions are given as NAME:INSTANCE:ENTITY")
+        return cls(*fields)
+
+    def qdb(self, directory: Path) -> Path:
+        return directory.joinpath(f"{self.name}.qdb")
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(name={self.name}, instance={self.instance}, entity={self.entity})"
+
+
+def file_digest(file: File) -> str:
+    try:
+        return hashlib.sha256(file.path.read_bytes()).hexdigest()
+    except OSError:
+        return "missing"
+
+
+def partition_digests(partitions: Iterable[Partition], files: Iterable[File], fingerprint: str) -> dict[str, str]:
+    """
+    Get a digest of the source files of each partition. The files which
+    aren't HDL files, e.g. IP files and constraints, aren't in the file graph,
+    so they are part of all partitions, as is the fingerprint of the project.
+    The files instantiating the partition, directly or through other files,
+    are part of it too, as they set its parameters and port connections.
+    """
+    files = [f for f in files if not isinstance(f, HdlSearchPath)]
+    hdlfiles = [f for f in files if isinstance(f, (VerilogFile, SystemVerilogFile, VerilogIncludeFile, VhdlFile))]
+    graph = dependency_graph(hdlfiles)
+    shared = hashlib.sha256(fingerprint.encode())
+    for file in sorted(set(files) - set(hdlfiles), key=lambda f: str(f.path)):
+        shared.update(f"{file.path}:{file_digest(file)}\n".encode())
+    digests = dict()
+    for partition in partitions:
+        roots = [f for f in hdlfiles if partition.entity.lower() in scan_file(f).provides]
+        if not roots:
+            logger.warning(f"{partition.name}: entity {partition.entity} not found, the partition is always compiled")
+            continue
+        sources = set(roots)
+        for root in roots:
+            sources |= nx.descendants(graph, root) | nx.ancestors(graph, root)
+        digest = shared.copy()
+        for file in sorted(sources, key=lambda f: str(f.path)):
+            digest.update(f"{file.path}:{file_digest(file)}\n".encode())
+        digests[partition.name] = digest.hexdigest()
+    return digests
+
+
+def read_digests(path: Path) -> dict[str, str]:
+    try:
+        with path.open() as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return dict()
+
+
+def write_digests(path: Path, digests: dict[str, str]) -> None:
+    with path.open("w") as f:
+        json.dump(digests, f, indent=2)
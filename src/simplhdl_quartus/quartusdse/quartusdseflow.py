@@ -1,17 +1,45 @@
+from __future__ import annotations
+
+import itertools
+import json
 import logging
+import os
 import shutil
-from argparse import Namespace
+from argparse import ArgumentTypeError, Namespace
 from pathlib import Path
 
+from rich.console import Console
+from rich.table import Table
+
 from simplhdl import Project
 from simplhdl.plugin import FlowTools, ImplementationFlow
-from simplhdl.utils import sh
+from simplhdl.plugin.backend import BackendFactory, Job, JobStatus
+from simplhdl.plugin.flow import FlowError
+from simplhdl.utils import sh, sync_files
 
+from ..partitions import Partition
 from ..quartusflow import QuartusFlow
+from ..reports import parse_sta_summary
 from ..resources.templates import quartus as templates
 
 logger = logging.getLogger(__name__)
 
+# NOTE: Inputs of the project found by relative paths, which each clone of
+#       the project has its own copy of, as the compiles of the sweep may
+#       generate the IP of the systems at the same time.
+CLONED_INPUTS = ("qsys", "ips", "quartus.ini")
+
+# NOTE: Memory in GB a compile of the sweep is assumed to need, so a sweep
+#       doesn't start more compiles than the host has memory for.
+SWEEP_JOB_MEMORY = 16.0
+
+
+def parse_setting(text: str) -> tuple[str, list[str]]:
+    name, _, values = text.partition("=")
+    if not name or not values:
+        raise ArgumentTypeError(f"{text}: settings are given as NAME=VALUE1,VALUE2")
+    return name, values.split(",")
+
 
 class QuartusDseFlow(ImplementationFlow):
     @classmethod
@@ -37,6 +65,40 @@ class QuartusDseFlow(ImplementationFlow):
             help="Number of seeds to sweep as part of the exploration space. "
             + "DSE auto-generates seed values when this is provided",
         )
+        parser.add_argument(
+            "--sweep",
+            action="store_true",
+            help="Compile each seed and setting in its own copy of the project with a backend, instead of quartus_dse. "
+            + f"The local backend starts a compile when {SWEEP_JOB_MEMORY:g} GB of memory is available, "
+            + "unless --job-memory is given",
+        )
+        parser.add_argument("--first-seed", type=int, default=1, help="First seed of the sweep")
+        parser.add_argument(
+            "--partition",
+            action="append",
+            type=Partition.parse,
+            default=[],
+            metavar="NAME:INSTANCE:ENTITY",
+            help="Design partition, as given to the quartus flow, e.g. core:u_top|u_core:core",
+        )
+        parser.add_argument(
+            "--setting",
+            action="append",
+            type=parse_setting,
+            default=[],
+            metavar="NAME=VALUE1,VALUE2",
+            help="Global assignment swept with the seeds, e.g. OPTIMIZATION_MODE=BALANCED,AGGRESSIVE_PERFORMANCE",
+        )
+        backends = BackendFactory.get_backends()
+        parser.add_argument(
+            "--backend",
+            choices=list(backends) or None,
+            help="Backend running the compiles of the sweep (default: local)",
+        )
+        group = parser.add_argument_group("backends")
+        for backend in backends.values():
+            backend.parse_args(group)
+        parser.set_defaults(job_memory=SWEEP_JOB_MEMORY)
 
     def __init__(self, name, args: Namespace, project: Project, builddir: Path):
         super().__init__(name, args, project, builddir)
@@ -44,11 +106,17 @@ class QuartusDseFlow(ImplementationFlow):
         self.tools.add(FlowTools.QUARTUS)
 
     def run(self) -> None:
-        quartus = QuartusFlow("quartus", None, self.project, self.builddir)
+        # NOTE: The partitions are part of the project, so a project created
+        #       by the quartus flow with partitions isn't created again.
+        args = Namespace(partition=getattr(self.args, "partition", []))
+        quartus = QuartusFlow("quartus", args, self.project, self.builddir)
         quartus.validate()
         quartus.configure()
         quartus.generate()
-        self.execute()
+        if getattr(self.args, "sweep", False):
+            self.sweep()
+        else:
+            self.execute()
 
     def execute(self):
         name = self.project.name
@@ -63,6 +131,115 @@ class QuartusDseFlow(ImplementationFlow):
         command = f"quartus_dse {args} {name}".split()
         sh(command, cwd=self.builddir, output=True)
 
+    def points(self) -> list[tuple[str, int, dict[str, str]]]:
+        """
+        Get the name, seed and settings of each compile of the sweep.
+        """
+        seeds = range(self.args.first_seed, self.args.first_seed + int(self.args.num_seeds or 1))
+        names = [name for name, _ in self.args.setting]
+        combinations = [dict(zip(names, values)) for values in itertools.product(*(v for _, v in self.args.setting))]
+        points = list()
+        for i, settings in enumerate(combinations):
+            for seed in seeds:
+                name = f"seed{seed}" if len(combinations) == 1 else f"seed{seed}-{i}"
+                points.append((name, seed, settings))
+        return points
+
+    def clone(self, directory: Path, seed: int, settings: dict[str, str]) -> Job:
+        """
+        Copy the project to a directory, with the seed and settings of a
+        compile of the sweep, and get the job compiling it.
+        """
+        name = self.project.name
+        directory.mkdir(parents=True, exist_ok=True)
+        shutil.copy(self.builddir.joinpath(f"{name}.qpf"), directory)
+        # NOTE: Each compile of the sweep compiles all partitions, instead of
+        #       importing the snapshots of an incremental compile.
+        lines = self.builddir.joinpath(f"{name}.qsf").read_text().splitlines(keepends=True)
+        directory.joinpath(f"{name}.qsf").write_text(
+            "".join(line for line in lines if "QDB_FILE_PARTITION" not in line)
+        )
+        self.copy_inputs(directory)
+        with directory.joinpath(f"{name}.qsf").open("a") as qsf:
+            qsf.write(f"set_global_assignment -name SEED {seed}\n")
+            for setting, value in settings.items():
+                qsf.write(f'set_global_assignment -name {setting} "{value}"\n')
+        return Job(
+            directory.name,
+            ["quartus_sh", "--flow", "compile", name],
+            directory,
+            directory.joinpath("quartus.log"),
+            tags={"seed": seed, "settings": settings},
+        )
+
+    def copy_inputs(self, directory: Path) -> None:
+        """
+        Copy the inputs of the project to a clone, as reflinks where the file
+        system supports them. Only the files changed since the last sweep are
+        copied again.
+        """
+        files = dict()
+        for entry in CLONED_INPUTS:
+            source = self.builddir.joinpath(entry)
+            if directory.joinpath(entry).is_symlink():
+                directory.joinpath(entry).unlink()
+            if source.is_dir():
+                for root, _, names in os.walk(source):
+                    for filename in names:
+                        path = Path(root, filename)
+                        files[path.relative_to(self.builddir).as_posix()] = path
+            elif source.exists():
+                files[entry] = source
+        sync_files(files, directory, directory.joinpath("inputs.json"), "reflink")
+
+    def sweep(self) -> None:
+        """
+        Compile the seeds and settings of the sweep in parallel, each in its
+        own copy of the project, and report the timing of each compile and
+        the best one.
+        """
+        dsedir = self.builddir.joinpath("dse").absolute()
+        jobs = [self.clone(dsedir.joinpath(name), seed, settings) for name, seed, settings in self.points()]
+        backend = BackendFactory.get_backend(self.args.backend or "local", self.args)
+        rows = list()
+        for result in backend.run(jobs):
+            row = {"name": result.name, **result.tags, "status": result.status.value, "duration": result.duration}
+            summary = dsedir.joinpath(result.name, "output_files", f"{self.project.name}.sta.summary")
+            if result.passed and summary.exists():
+                row.update(parse_sta_summary(summary))
+                logger.info(f"PASSED {result.name} ({result.duration:.1f}s), WNS {row.get('setup_wns')}")
+            elif result.status != JobStatus.CANCELLED:
+                logger.error(f"{result.status.value.upper()} {result.name}, see {result.logfile}")
+            rows.append(row)
+        rows.sort(key=lambda r: (-r.get("setup_wns", float("-inf")), -r.get("setup_tns", float("-inf"))))
+        with dsedir.joinpath("results.json").open("w") as f:
+            json.dump(rows, f, indent=2)
+        self.print_summary(rows)
+        timed = [row for row in rows if "setup_wns" in row]
+        if not timed:
+            raise FlowError(f"None of the {len(jobs)} compiles of the sweep passed")
+        logger.info(f"Best compile: {dsedir.joinpath(timed[0]['name'])}")
+
+    def print_summary(self, rows: list[dict]) -> None:
+        table = Table(title="Design space exploration")
+        table.add_column("Compile")
+        table.add_column("Seed", justify="right")
+        table.add_column("Settings")
+        table.add_column("Status")
+        for column in ("Setup WNS", "Setup TNS", "Hold WNS", "Time [s]"):
+            table.add_column(column, justify="right")
+        for row in rows:
+            color = "green" if row["status"] == JobStatus.PASSED.value else "red"
+            table.add_row(
+                row["name"],
+                str(row["seed"]),
+                " ".join(f"{k}={v}" for k, v in row["settings"].items()),
+                f"[{color}]{row['status'].upper()}",
+                *(f"{row[k]:.3f}" if k in row else "" for k in ("setup_wns", "setup_tns", "hold_wns")),
+                f"{row['duration']:.1f}",
+            )
+        Console().print(table)
+
     def is_tool_setup(self) -> None:
         exit: bool = False
         if shutil.which("quartus_sh") is None:
@@ -1,15 +1,18 @@
+from __future__ import annotations
+
 try:
     from importlib.resources import files as resources_files
 except ImportError:
     from importlib_resources import files as resources_files
+import hashlib
 import logging
 import os
+import re
 import shutil
+import time
 from argparse import Namespace
 from pathlib import Path
 
-from jinja2 import Environment, FileSystemLoader
-
 from simplhdl import Project, FileOrder, FilesetOrder
 from simplhdl.plugin import FlowTools, ImplementationFlow
 from simplhdl.project.files import (
@@ -32,12 +35,64 @@ from simplhdl.project.files import (
     VhdlFile,
     UsedIn,
 )
-from simplhdl.utils import generate_from_template, sh
+from simplhdl.results import save_build
+from simplhdl.utils import CalledShError, generate_from_template, sh, template_environment
 
+from .partitions import Partition, partition_digests, read_digests, write_digests
+from .reports import quartus_report
 from .resources.templates import quartus as templates
 
 logger = logging.getLogger(__name__)
 
+# NOTE: Assignments Quartus reads as a set, so the order they are rendered in,
+#       e.g. the topological order of the source files, doesn't change the
+#       project.
+UNORDERED_ASSIGNMENTS = {
+    "HEX_FILE",
+    "IP_FILE",
+    "MIF_FILE",
+    "QIP_FILE",
+    "QSYS_FILE",
+    "SEARCH_PATH",
+    "SOURCE_FILE",
+    "SYSTEMVERILOG_FILE",
+    "VERILOG_FILE",
+    "VERILOG_INCLUDE_FILE",
+    "VHDL_FILE",
+}
+ASSIGNMENT = re.compile(r"^set_global_assignment\b.*-name\s+(\w+)")
+SOURCED_FILE = re.compile(r'^(?:source|file copy -force)\s+"([^"]+)"')
+
+
+def project_fingerprint(script: Path) -> str:
+    """
+    Get a fingerprint of the project created by a project.tcl script. The
+    file and search path assignments are compared as a set, and the content
+    of the settings files sourced by the script is included, so the project
+    is only created again when its settings change.
+    """
+    ordered = list()
+    unordered = set()
+    for line in script.read_text().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        m = ASSIGNMENT.match(line)
+        if m and m.group(1) in UNORDERED_ASSIGNMENTS:
+            unordered.add(line)
+            continue
+        ordered.append(line)
+        m = SOURCED_FILE.match(line)
+        if m:
+            try:
+                ordered.append(hashlib.sha256(script.parent.joinpath(m.group(1)).read_bytes()).hexdigest())
+            except OSError:
+                ordered.append("missing")
+    digest = hashlib.sha256()
+    for line in ordered + sorted(unordered):
+        digest.update(f"{line}\n".encode())
+    return digest.hexdigest()
+
 
 class QuartusFlow(ImplementationFlow):
     @classmethod
@@ -57,11 +112,25 @@ class QuartusFlow(ImplementationFlow):
             choices=["project", "project-service-request", "project-source"],
             help="Archive Quartus project, settings and results",
         )
+        parser.add_argument(
+            "--partition",
+            action="append",
+            type=Partition.parse,
+            default=[],
+            metavar="NAME:INSTANCE:ENTITY",
+            help="Design partition, e.g. core:u_top|u_core:core",
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Reuse the final snapshots of the partitions whose source files haven't changed",
+        )
 
     def __init__(self, name, args: Namespace, project: Project, builddir: Path):
         super().__init__(name, args, project, builddir)
         self.templates = templates
         self.tools.add(FlowTools.QUARTUS)
+        self.partitions: list[Partition] = list(getattr(args, "partition", None) or [])
 
     def run(self) -> None:
         if self.args.archive:
@@ -97,10 +166,10 @@ class QuartusFlow(ImplementationFlow):
 
     def generate(self):
         templatedir = resources_files(templates)
-        environment = Environment(loader=FileSystemLoader(templatedir), trim_blocks=True)
+        environment = template_environment(templatedir)
 
         template = environment.get_template("project.tcl.j2")
-        project_updated = generate_from_template(
+        generate_from_template(
             template,
             self.builddir,
             HdlSearchPath=HdlSearchPath,
@@ -125,13 +194,20 @@ class QuartusFlow(ImplementationFlow):
             UsedIn=UsedIn,
             FileOrder=FileOrder,
             FilesetOrder=FilesetOrder,
+            partitions=self.partitions,
         )
         template = environment.get_template("run.tcl.j2")
         generate_from_template(template, self.builddir, project=self.project)
         command = "quartus_sh -t project.tcl".split()
         self.is_tool_setup()
-        if project_updated:
-            sh(command, cwd=self.builddir, output=True)
+        fingerprint = project_fingerprint(self.builddir.joinpath("project.tcl"))
+        fingerprintfile = self.builddir.joinpath("project.fingerprint")
+        qsf = self.builddir.joinpath(f"{self.project.name}.qsf")
+        if qsf.exists() and fingerprintfile.exists() and fingerprintfile.read_text() == fingerprint:
+            logger.debug(f"{qsf}: is already up to date")
+            return
+        sh(command, cwd=self.builddir, output=True)
+        fingerprintfile.write_text(fingerprint)
 
     def execute(self, step: str):
         name = self.project.name
@@ -139,9 +215,89 @@ class QuartusFlow(ImplementationFlow):
             sh(["quartus", name], cwd=self.builddir)
             return
 
+        incremental = getattr(self.args, "incremental", False) and step == "compile"
+        compiled = self.prepare_partitions(incremental)
         command = f"quartus_sh -t run.tcl {step} -project {name}".split()
         logfile = self.builddir.joinpath("quartus.log")
-        sh(command, cwd=self.builddir, output=True, log=logfile)
+        started = time.time()
+        try:
+            sh(command, cwd=self.builddir, output=True, log=logfile)
+        except CalledShError:
+            if step != "project":
+                self.ingest_reports(step, False, started)
+            raise
+        if step != "project":
+            self.ingest_reports(step, True, started)
+        if incremental:
+            self.export_partitions(compiled)
+
+    def ingest_reports(self, step: str, passed: bool, started: float) -> None:
+        """
+        Parse the timing, resources and step runtimes of the compile from the
+        reports it wrote, and save them in report.json and the results
+        database.
+        """
+        # NOTE: A report which can't be parsed mustn't fail the build, or
+        #       replace the error of a failed step.
+        try:
+            report = quartus_report(self.builddir, self.project.name, since=started)
+            save_build(self.builddir, self.name, self.project.name, step, passed, started, report)
+        except Exception as e:
+            logger.warning(f"Can't ingest the reports of the {step} step: {e}")
+
+    def prepare_partitions(self, incremental: bool) -> dict[str, str | None]:
+        """
+        Write the partitions.tcl script sourced by run.tcl, which imports the
+        exported snapshots of the partitions whose source files haven't
+        changed, and return the digests of the partitions to compile. All
+        partitions are compiled if the compile isn't incremental.
+        """
+        script = self.builddir.joinpath("partitions.tcl")
+        if not self.partitions:
+            script.unlink(missing_ok=True)
+            return dict()
+        qdbdir = self.builddir.joinpath("partitions")
+        reused = set()
+        compiled = dict()
+        if incremental:
+            files = self.project.defaultDesign.files(usedin=UsedIn.IMPLEMENTATION)
+            fingerprintfile = self.builddir.joinpath("project.fingerprint")
+            fingerprint = fingerprintfile.read_text() if fingerprintfile.exists() else ""
+            digests = partition_digests(self.partitions, files, fingerprint)
+            exported = read_digests(qdbdir.joinpath("digests.json"))
+            for partition in self.partitions:
+                digest = digests.get(partition.name)
+                if digest is not None and exported.get(partition.name) == digest and partition.qdb(qdbdir).exists():
+                    logger.info(f"Reuse the final snapshot of partition {partition.name}")
+                    reused.add(partition.name)
+                else:
+                    compiled[partition.name] = digest
+        templatedir = resources_files(templates)
+        environment = template_environment(templatedir)
+        template = environment.get_template("partitions.tcl.j2")
+        generate_from_template(template, self.builddir, partitions=self.partitions, reused=reused, qdbdir=qdbdir)
+        return compiled
+
+    def export_partitions(self, compiled: dict[str, str | None]) -> None:
+        """
+        Export the final snapshots of the compiled partitions, so the next
+        compile can reuse them.
+        """
+        name = self.project.name
+        qdbdir = self.builddir.joinpath("partitions")
+        qdbdir.mkdir(exist_ok=True)
+        digests = read_digests(qdbdir.joinpath("digests.json"))
+        for partition in self.partitions:
+            if partition.name not in compiled:
+                continue
+            qdb = partition.qdb(qdbdir)
+            command = f"quartus_cdb {name} -c {name} --export_partition {partition.name} --snapshot final --file {qdb}"
+            sh(command.split(), cwd=self.builddir, output=True)
+            if compiled[partition.name] is None:
+                digests.pop(partition.name, None)
+            else:
+                digests[partition.name] = compiled[partition.name]
+        write_digests(qdbdir.joinpath("digests.json"), digests)
 
     def is_tool_setup(self) -> None:
         exit: bool = False
@@ -0,0 +1,174 @@
+"""
+Parsers of the report files of Quartus. The reports are read line by line,
+so large reports aren't loaded into memory.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from pathlib import Path
+from typing import Any
+
+from simplhdl.utils import seconds
+
+__all__ = ["parse_fit_summary", "parse_flow_elapsed", "parse_fmax", "parse_sta_summary", "quartus_report"]
+
+logger = logging.getLogger(__name__)
+
+STA_FIELD = re.compile(r"^\s*(Type|Slack|TNS)\s*:\s*(.*?)\s*$")
+STA_TYPE = re.compile(r"^(.*?)\b(Setup|Hold|Recovery|Removal|Minimum Pulse Width)\b\s*'?(.*?)'?$")
+FIT_FIELD = re.compile(r"^\s*(.+?)\s+:\s+([\d,]+)\s*(?:/\s*([\d,]+)\s*)?(?:\([^)]*\)\s*)?$")
+FMAX_ROW = re.compile(r"^;\s*([\d.]+)\s*MHz\s*;\s*([\d.]+)\s*MHz\s*;\s*(.+?)\s*;")
+MEMORY = re.compile(r"([\d.]+)\s*MB")
+
+
+def parse_sta_summary(path: Path) -> dict[str, float]:
+    """
+    Get the worst negative slack (WNS) and total negative slack (TNS) of the
+    setup and hold analysis in a Timing Analyzer summary, e.g.
+    output_files/top.sta.summary. The WNS is the worst slack of all clocks in
+    all corners, and the TNS is the sum of the clocks in the worst corner.
+    """
+    # NOTE: (analysis, corner) -> slacks and TNS of each clock.
+    slacks: dict[tuple[str, str], list[float]] = dict()
+    tns: dict[tuple[str, str], float] = dict()
+    key = None
+    with path.open(errors="replace") as f:
+        for line in f:
+            m = STA_FIELD.match(line)
+            if not m:
+                continue
+            field, value = m.groups()
+            if field == "Type":
+                t = STA_TYPE.match(value)
+                key = (t.group(2).lower(), t.group(1).strip()) if t else None
+                continue
+            if key is None:
+                continue
+            try:
+                number = float(value)
+            except ValueError:
+                logger.debug(f"{path}: can't parse {line.strip()}")
+                continue
+            if field == "Slack":
+                slacks.setdefault(key, list()).append(number)
+            else:
+                tns[key] = tns.get(key, 0.0) + number
+    summary = dict()
+    for analysis in ("setup", "hold"):
+        values = [s for (a, _), corner in slacks.items() if a == analysis for s in corner]
+        if values:
+            summary[f"{analysis}_wns"] = min(values)
+        totals = [t for (a, _), t in tns.items() if a == analysis]
+        if totals:
+            summary[f"{analysis}_tns"] = min(totals)
+    return summary
+
+
+def table_cells(line: str) -> list[str]:
+    return [cell.strip() for cell in line.strip().strip(";").split(";")]
+
+
+def parse_fmax(path: Path) -> dict[str, float]:
+    """
+    Get the restricted Fmax of each clock in MHz from the Fmax Summary tables
+    of a Timing Analyzer report, e.g. output_files/top.sta.rpt. The Fmax of
+    a clock is the lowest of all corners.
+    """
+    fmax: dict[str, float] = dict()
+    table = False
+    with path.open(errors="replace") as f:
+        for line in f:
+            if "Fmax Summary" in line:
+                table = True
+            elif table and not line.startswith((";", "+")):
+                table = False
+            elif table:
+                m = FMAX_ROW.match(line)
+                if m:
+                    clock = m.group(3)
+                    fmax[clock] = min(float(m.group(2)), fmax.get(clock, float("inf")))
+    return fmax
+
+
+def parse_fit_summary(path: Path) -> dict[str, dict[str, int]]:
+    """
+    Get the used and available resources from a Fitter summary, e.g.
+    output_files/top.fit.summary. Only rows with a used and available count,
+    or a total, are resources; other rows, e.g. the Quartus version, are left
+    out.
+    """
+    utilization = dict()
+    with path.open(errors="replace") as f:
+        for line in f:
+            m = FIT_FIELD.match(line)
+            if m and (m.group(3) or m.group(1).startswith("Total")):
+                resource = {"used": int(m.group(2).replace(",", ""))}
+                if m.group(3):
+                    resource["available"] = int(m.group(3).replace(",", ""))
+                utilization[m.group(1)] = resource
+    return utilization
+
+
+def parse_flow_elapsed(path: Path) -> dict[str, dict[str, float]]:
+    """
+    Get the elapsed time in seconds and the peak virtual memory in MB of each
+    step from the Flow Elapsed Time table of a flow report, e.g.
+    output_files/top.flow.rpt.
+    """
+    steps: dict[str, dict[str, float]] = dict()
+    columns: list[str] | None = None
+    table = False
+    with path.open(errors="replace") as f:
+        for line in f:
+            if "Flow Elapsed Time" in line:
+                table = True
+                columns = None
+            elif table and not line.startswith((";", "+")):
+                table = False
+            elif table and line.startswith(";"):
+                cells = table_cells(line)
+                if columns is None:
+                    columns = cells
+                    continue
+                row = dict(zip(columns, cells))
+                step = dict()
+                if row.get("Elapsed Time"):
+                    step["elapsed"] = seconds(row["Elapsed Time"])
+                m = MEMORY.search(row.get("Peak Virtual Memory", ""))
+                if m:
+                    step["peak_memory"] = float(m.group(1))
+                steps[cells[0]] = step
+    return steps
+
+
+def quartus_report(builddir: Path, revision: str, since: float | None = None) -> dict[str, Any]:
+    """
+    Get the timing, resources and step runtimes of a compile from the reports
+    of a revision, which are found in its output files. Reports older than
+    `since`, e.g. of an earlier compile when the last one failed, are left
+    out.
+    """
+    outputdir = builddir.joinpath("output_files")
+    parsers = [
+        (".sta.summary", None, parse_sta_summary),
+        (".sta.rpt", "fmax", parse_fmax),
+        (".fit.summary", "utilization", parse_fit_summary),
+        (".flow.rpt", "steps", parse_flow_elapsed),
+    ]
+    report: dict[str, Any] = dict()
+    for suffix, key, parser in parsers:
+        path = outputdir.joinpath(f"{revision}{suffix}")
+        try:
+            if not path.exists() or (since is not None and path.stat().st_mtime < since):
+                continue
+            result = parser(path)
+        except OSError as e:
+            logger.warning(f"{path}: can't read report: {e}")
+            continue
+        if key is None:
+            report.update(result)
+        elif result:
+            report[key] = result
+    return report
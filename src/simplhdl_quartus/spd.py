@@ -1,14 +1,23 @@
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
+import os
 import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
-from shutil import copy, copytree, ignore_patterns, rmtree
+from shutil import copy, copytree, rmtree
 from typing import Generator
-from xml.etree.ElementTree import Element, parse
+from xml.etree.ElementTree import ParseError, iterparse
 from zipfile import ZipFile
 
 from simplhdl import Fileset
+from simplhdl._compat import is_relative_to
 from simplhdl.plugin import (
     FlowBase,
     FlowCategory,
@@ -32,7 +41,17 @@ from simplhdl.project.files import (
     VhdlFile,
     UsedIn,
 )
-from simplhdl.utils import md5check, md5write, sh
+from simplhdl.utils import (
+    LINK_METHODS,
+    CalledShError,
+    FileMemo,
+    cachedir,
+    extract_zip,
+    md5check,
+    md5write,
+    sh,
+    sync_files,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +77,207 @@ TOOL_MAP = {
 }
 
 
+IP_KEYFILE = ".simplhdl-key"
+
+# NOTE: Files in the directory of a QSYS system, which is its search path,
+#       used without being referenced by the system, e.g. memory
+#       initialization files and custom components.
+QSYS_SEARCH_PATH_FILES = (".hex", ".mif", ".ipx", "_hw.tcl")
+
+
+def spd_path(filename: Path) -> Path:
+    """
+    Get the simulation package descriptor generated for an IP or QSYS file.
+    """
+    return filename.parent.joinpath(filename.stem, filename.name).with_suffix(".spd")
+
+
+def ip_cachedir() -> Path | None:
+    """
+    Get the directory of the cache of generated simulation files, which is
+    shared by all build directories. It can be set with the
+    SIMPLHDL_QUARTUS_IP_CACHE environment variable.
+    """
+    if "SIMPLHDL_QUARTUS_IP_CACHE" in os.environ:
+        directory = Path(os.environ["SIMPLHDL_QUARTUS_IP_CACHE"])
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory
+    return cachedir("quartus", "ip")
+
+
+@lru_cache(maxsize=None)
+def quartus_version() -> str:
+    """
+    Get the location and version of the Quartus installation generating the
+    simulation files.
+    """
+    tool = shutil.which("qsys-generate")
+    try:
+        version = sh(["quartus_sh", "--version"])
+    except (CalledShError, OSError):
+        version = ""
+    return f"{tool and Path(tool).resolve()}\n{version}"
+
+
+def ip_key(filename: Path, ip_path: Path | None = None) -> str:
+    """
+    Get the key of the simulation files generated for an IP or QSYS file. The
+    key depends on the content of the file, which includes the device family,
+    the Quartus version and, for a QSYS system, the content of the IP files
+    and the search path files it uses, e.g. custom components and their HDL
+    files, but not on the location of the files, so the simulation files can
+    be shared by build directories.
+    """
+    digest = hashlib.sha256()
+    digest.update(quartus_version().encode())
+    digest.update(filename.name.encode())
+    digest.update(filename.read_bytes())
+    if filename.suffix == ".qsys":
+        directory = ip_path or filename.parent
+        ipfiles = [ipfile for ipfile in referenced_ipfiles(filename, directory) if ipfile.exists()]
+        for ipfile in ipfiles:
+            digest.update(ipfile.name.encode())
+            digest.update(hashlib.sha256(ipfile.read_bytes()).digest())
+        # NOTE: The generated files of the system and its IP files aren't
+        #       inputs of the system.
+        generated = [filename.with_suffix("")] + [ipfile.with_suffix("") for ipfile in ipfiles]
+        for path in sorted(search_path_files(directory, generated)):
+            digest.update(Path(os.path.relpath(path, directory)).as_posix().encode())
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def restore_spd(key: str, outputdir: Path) -> bool:
+    """
+    Copy the simulation files generated for a key from the cache.
+    """
+    directory = ip_cachedir()
+    if directory is None or not directory.joinpath(key, outputdir.name).is_dir():
+        return False
+    logger.info(f"Copy simulation files for {outputdir.name} from {directory}")
+    rmtree(outputdir, ignore_errors=True)
+    copytree(directory.joinpath(key, outputdir.name), outputdir, symlinks=True)
+    return True
+
+
+def store_spd(key: str, spdfile: Path) -> None:
+    """
+    Copy generated simulation files to the cache. The files are copied to a
+    temporary directory which is renamed, so other processes never see a
+    partial copy.
+    """
+    directory = ip_cachedir()
+    outputdir = spdfile.parent
+    if directory is None or directory.joinpath(key).exists():
+        return
+    # NOTE: Simulation files referring to the build directory can't be shared.
+    if str(outputdir.parent.resolve()) in spdfile.read_text(errors="replace"):
+        logger.debug(f"{outputdir}: not cached, the simulation files have absolute paths")
+        return
+    tmpdir = directory.joinpath(f".{key}.{os.getpid()}.{threading.get_ident()}")
+    try:
+        copytree(outputdir, tmpdir.joinpath(outputdir.name), symlinks=True)
+        os.rename(tmpdir, directory.joinpath(key))
+    except OSError as e:
+        logger.debug(f"{outputdir}: not cached: {e}")
+    finally:
+        rmtree(tmpdir, ignore_errors=True)
+
+
+def generate_spd(filename: Path, ip_path: Path | None = None) -> Path:
+    """
+    Generate the simulation files of an IP or QSYS file, unless they are up
+    to date, and return the simulation package descriptor. The key of the
+    generated files is written next to them, so files generated for an older
+    version of the IP file are generated again. Simulation files without a
+    key, e.g. delivered with the IP file, are used as they are.
+    """
+    spdfile = spd_path(filename)
+    keyfile = spdfile.parent.joinpath(IP_KEYFILE)
+    if spdfile.exists() and not keyfile.exists():
+        return spdfile
+    key = ip_key(filename, ip_path)
+    if spdfile.exists() and keyfile.read_text() == key:
+        return spdfile
+    if not restore_spd(key, spdfile.parent):
+        if ip_path:
+            command = f"qsys-generate --simulation=VERILOG --search-path={ip_path},$ {filename.resolve()}".split()
+        else:
+            command = f"qsys-generate --simulation=VERILOG {filename.resolve()}".split()
+        logger.info(f"Generate simulation files for {filename}")
+        sh(command, cwd=filename.parent)
+        if not spdfile.exists():
+            raise FileNotFoundError(f"{spdfile}: doesn't exits")
+        keyfile.write_text(key)
+        store_spd(key, spdfile)
+    return spdfile
+
+
+def generate_spds(models: list[tuple[Path, Path | None]], jobs: int) -> None:
+    """
+    Generate the simulation files of IP and QSYS files with their search
+    paths, `jobs` at a time. The IP files and nested systems are generated
+    before the QSYS systems which use them.
+    """
+    pending = dict()
+    for filename, ip_path in models:
+        pending.setdefault(filename.resolve(), ip_path)
+    if not pending:
+        return
+    # NOTE: The IP files are generated first, and then the QSYS systems, the
+    #       nested systems before the systems using them.
+    waves: dict[int, list[tuple[Path, Path | None]]] = dict()
+    for f, p in pending.items():
+        level = qsys_level(f, p or f.parent) if f.suffix == ".qsys" else 0
+        waves.setdefault(level, list()).append((f, p))
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for _, wave in sorted(waves.items()):
+            futures = {pool.submit(generate_spd, f, p): f for f, p in wave}
+            errors = list()
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except (CalledShError, FileNotFoundError) as e:
+                    errors.append(f"{futures[future]}: {e}")
+            if errors:
+                raise GeneratorError("Failed to generate simulation files:\n" + "\n".join(sorted(errors)))
+
+
+def ip_jobs() -> int:
+    """
+    Get the number of IP files generated in parallel, set with the
+    SIMPLHDL_QUARTUS_IP_JOBS environment variable.
+    """
+    try:
+        return int(os.environ.get("SIMPLHDL_QUARTUS_IP_JOBS", os.cpu_count() or 1))
+    except ValueError:
+        raise GeneratorError("SIMPLHDL_QUARTUS_IP_JOBS must be a number")
+
+
+def parse_spd(spdfile: Path) -> list[dict[str, str]]:
+    """
+    Extract the attributes of the file entries of a simulation package
+    descriptor. The file is streamed, and each element is dropped as soon as
+    it is parsed.
+    """
+    logger.debug(f"Parse {spdfile}")
+    entries = list()
+    depth = 0
+    for event, element in iterparse(spdfile, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            continue
+        depth -= 1
+        if depth == 1 and element.tag == "file":
+            entries.append(dict(element.attrib))
+        if depth >= 1:
+            element.clear()
+    return entries
+
+
+_spd_entries = FileMemo(parse_spd)
+
+
 class Spd:
     def __init__(self, filename: Path, flow: FlowBase, ip_path: Path | None = None) -> None:
         self._files = list()
@@ -65,19 +285,8 @@ class Spd:
         self.flow = flow
         self.libraries = dict()
         self.simulators = set()
-        spdfile = filename.parent.joinpath(filename.stem, filename.name).with_suffix(".spd")
-        if not spdfile.exists():
-            if ip_path:
-                command = f"qsys-generate --simulation=VERILOG --search-path={ip_path},$ {filename.resolve()}".split()
-            else:
-                command = f"qsys-generate --simulation=VERILOG {filename.resolve()}".split()
-            logger.info(f"Generate simulation files for {filename}")
-            sh(command, cwd=filename.parent)
-            if not spdfile.exists():
-                raise FileNotFoundError(f"{spdfile}: doesn't exits")
-        logger.debug(f"Parse {spdfile}")
-        self.tree = parse(spdfile)
-        self.root = self.tree.getroot()
+        spdfile = generate_spd(filename, ip_path)
+        self.entries = _spd_entries(spdfile)
         self.location = spdfile.parent.absolute()
         for element in self.file_elements():
             self._files.append(self.element_to_file(element))
@@ -85,18 +294,15 @@ class Spd:
             names = [n.name.capitalize() for n in self.flow.tools]
             raise GeneratorError(f"Encrypted IP {filename} does not support {','.join(names)}")
 
-    def file_elements(self) -> Generator[Element, None, None]:
-        for f in self.root:
-            if f.tag == "file":
-                properties = f.attrib
-                if "simulator" in properties:
-                    simulators = re.split(r"\s*,\s*", properties["simulator"])
-                    if not self.supported(self.flow, simulators):
-                        continue
-                yield f
-
-    def element_to_file(self, element: Element) -> File:
-        properties = element.attrib
+    def file_elements(self) -> Generator[dict[str, str], None, None]:
+        for properties in self.entries:
+            if "simulator" in properties:
+                simulators = re.split(r"\s*,\s*", properties["simulator"])
+                if not self.supported(self.flow, simulators):
+                    continue
+            yield properties
+
+    def element_to_file(self, properties: dict[str, str]) -> File:
         if properties["path"].startswith("/"):
             path = Path(properties["path"])
         else:
@@ -215,6 +421,10 @@ class QuartusGenerator(GeneratorBase):
         else:
             files = all_files
 
+        # NOTE: The files are copied, then their simulation files are
+        #       generated in parallel, and last the filesets are added in the
+        #       order of the files.
+        copied = list()
         for file in files:
             # The second time we see a file it is already processed and we just
             # Update the file path
@@ -232,36 +442,135 @@ class QuartusGenerator(GeneratorBase):
                 file = unpack_qsysfile(file, qsys_dir)
             elif isinstance(file, QuartusQsysFile):
                 file = copy_qsysfile(file, qsys_dir)
-            parse_file(file, flow, self.project.defaultDesign.defaultLibrary)
+            copied.append(file)
             # register the file as seen
             seen[fileid] = file
+        if flow.category == FlowCategory.SIMULATION:
+            generate_spds([model for file in copied for model in simulation_models(file)], ip_jobs())
+        for file in copied:
+            parse_file(file, flow, self.project.defaultDesign.defaultLibrary)
+
+
+def simulation_models(file: File) -> list[tuple[Path, Path | None]]:
+    """
+    Get the IP and QSYS files which simulation files are generated for, and
+    their search paths.
+    """
+    if isinstance(file, QuartusQsysFile):
+        searchpath = file.path.parent.resolve()
+        return [(ipfile.path, searchpath) for ipfile in [file] + get_list_of_ipfiles(file)]
+    if isinstance(file, QuartusIpFile):
+        return [(file.path, None)]
+    return list()
+
+
+def parse_qsys(filename: Path, data: bytes) -> list[str]:
+    """
+    Extract the names of the IP files and nested QSYS systems used by a QSYS
+    system. They are the values of the IP-XACT elements of Platform Designer
+    Pro systems, and the logicalView parameters of standard systems.
+    """
+    references = list()
+    try:
+        for _, element in iterparse(BytesIO(data)):
+            tag = element.tag.rpartition("}")[2]
+            if tag == "value" or (tag == "parameter" and element.get("name") == "logicalView"):
+                text = (element.text or "").strip()
+                if text.endswith((".ip", ".qsys")) and text not in references:
+                    references.append(text)
+            element.clear()
+    except ParseError as e:
+        raise GeneratorError(f"{filename}: {e}")
+    return references
+
+
+_qsys_references: dict[str, list[str]] = dict()
+
+
+def qsys_references(filename: Path) -> list[str]:
+    """
+    Get the names of the IP files and QSYS systems used by a QSYS system. The
+    names are cached by the digest of the system, in this process and in the
+    user cache directory.
+    """
+    data = filename.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    if digest not in _qsys_references:
+        directory = cachedir("quartus", "qsys")
+        cachefile = directory.joinpath(f"{digest}.json") if directory is not None else None
+        try:
+            references = json.loads(cachefile.read_text()) if cachefile is not None else None
+        except (OSError, ValueError):
+            references = None
+        if references is None:
+            references = parse_qsys(filename, data)
+            if cachefile is not None:
+                tmpfile = cachefile.with_name(f".{cachefile.name}.{os.getpid()}.{threading.get_ident()}")
+                try:
+                    tmpfile.write_text(json.dumps(references))
+                    os.replace(tmpfile, cachefile)
+                except OSError as e:
+                    logger.debug(f"{cachefile}: {e}")
+        _qsys_references[digest] = references
+    return _qsys_references[digest]
+
+
+def referenced_ipfiles(filename: Path, directory: Path) -> list[Path]:
+    """
+    Get the IP files and nested QSYS systems used by a QSYS system, which are
+    found in a directory. Nested systems are visited once, also if they are
+    used several times, and are listed after the systems they use.
+    """
+    ipfiles: dict[Path, None] = dict()
+    systems: list[Path] = list()
+    visited = {filename.resolve()}
+
+    def visit(qsys: Path) -> None:
+        for name in qsys_references(qsys):
+            path = directory.joinpath(name)
+            if path.suffix != ".qsys":
+                ipfiles.setdefault(path)
+            elif path.resolve() not in visited:
+                visited.add(path.resolve())
+                if path.exists():
+                    visit(path)
+                systems.append(path)
+
+    visit(filename)
+    return sorted(ipfiles) + systems
+
+
+def qsys_level(filename: Path, directory: Path) -> int:
+    """
+    Get the number of levels of nested QSYS systems of a system, e.g. 1 for a
+    system which only uses IP files.
+    """
+    levels: dict[Path, int] = dict()
+
+    def level(qsys: Path) -> int:
+        key = qsys.resolve()
+        if key not in levels:
+            levels[key] = 1
+            nested = [directory.joinpath(n) for n in qsys_references(qsys) if n.endswith(".qsys")]
+            levels[key] = 1 + max((level(p) for p in nested if p.exists()), default=0)
+        return levels[key]
+
+    return level(filename)
 
 
 def get_list_of_ipfiles(filename: QuartusQsysFile) -> list[File]:
     """
-    Search for IP files in a QSYS file and return a list of QuartusIPSpecificationFile objects.
-    """
-    files = set()
-    with filename.path.open() as file:
-        lines = file.readlines()
-        for line in lines:
-            m = re.search(r"<ipxact:value>(.*\.ip)</ipxact:value>", line)
-            if m:
-                ipfile = filename.path.parent.joinpath(m.group(1))
-                if ipfile.exists():
-                    logger.debug(f"Found {ipfile} in {filename.path}")
-                    files.add(QuartusIpFile(ipfile))
-                else:
-                    logger.warning(f"File {ipfile} not found")
-            m = re.search(r'<parameter name="logicalView">(.*\.ip)</parameter>', line)
-            if m:
-                ipfile = filename.path.parent.joinpath(m.group(1))
-                if ipfile.exists():
-                    logger.debug(f"Found {ipfile} in {filename.path}")
-                    files.add(QuartusIpFile(ipfile))
-                else:
-                    logger.warning(f"File {ipfile} not found")
-    return list(files)
+    Search for IP files and nested QSYS systems in a QSYS file and return a list of QuartusIpFile and
+    QuartusQsysFile objects.
+    """
+    files = list()
+    for ipfile in referenced_ipfiles(filename.path, filename.path.parent):
+        if ipfile.exists():
+            logger.debug(f"Found {ipfile} in {filename.path}")
+            files.append(QuartusQsysFile(ipfile) if ipfile.suffix == ".qsys" else QuartusIpFile(ipfile))
+        else:
+            logger.warning(f"File {ipfile} not found")
+    return files
 
 
 def qsys_to_fileset(file: QuartusQsysFile, flow: FlowBase, library) -> Fileset:
@@ -331,29 +640,103 @@ def copy_ipfile(file: QuartusIpFile, dest: Path) -> QuartusIpFile:
     return file
 
 
+def qsys_link_method() -> str:
+    """
+    Get how the files of QSYS systems are put in the build directory, which is
+    set with the SIMPLHDL_QUARTUS_LINK environment variable: reflink
+    (default), hardlink, symlink or copy. Files are copied where the link
+    isn't supported. Hardlinks and symlinks share the content with the
+    sources, so they are only safe if the tools don't modify the files.
+    """
+    method = os.environ.get("SIMPLHDL_QUARTUS_LINK", "reflink")
+    if method not in LINK_METHODS:
+        raise GeneratorError(f"SIMPLHDL_QUARTUS_LINK must be one of {', '.join(LINK_METHODS)}")
+    return method
+
+
+def walk_files(top: Path, exclude: list[Path]) -> list[Path]:
+    """
+    Get all files in a directory and its subdirectories, leaving out the
+    exclude directories.
+    """
+    excluded = {path.resolve() for path in exclude}
+    paths = list()
+    for root, dirs, names in os.walk(top):
+        dirs[:] = [d for d in dirs if Path(root, d).resolve() not in excluded]
+        paths.extend(Path(root, name) for name in names)
+    return paths
+
+
+def search_path_files(directory: Path, exclude: list[Path]) -> list[Path]:
+    """
+    Get the files in the search path of a QSYS system which Platform Designer
+    may use: the memory initialization files, the .ipx files and the custom
+    components with all files in their directories.
+    """
+    everything = walk_files(directory, exclude)
+    searched = [p for p in everything if p.name.endswith(QSYS_SEARCH_PATH_FILES)]
+    # NOTE: A custom component adds the files in its directory, e.g. its HDL
+    #       files, with add_fileset_file.
+    components = {p.parent for p in searched if p.name.endswith("_hw.tcl")}
+    for component in components:
+        searched.extend(walk_files(component, exclude))
+    return list(dict.fromkeys(searched))
+
+
+def qsys_sources(filename: Path, exclude: Path | None = None) -> dict[str, Path]:
+    """
+    Get the files used by a QSYS system by their paths in its directory. All
+    files in the directory are used, unless the SIMPLHDL_QUARTUS_QSYS_SOURCES
+    environment variable is set to 'referenced': then only the system, the IP
+    files and nested systems it uses with their generated files, and the
+    files of its search path are used, where the search path files are the
+    memory initialization files, the .ipx files and the custom components
+    with all files in their directories. Files in the exclude directory, e.g.
+    the build directory, are left out.
+    """
+    directory = filename.parent
+    excluded = exclude.resolve() if exclude is not None else None
+    exclusions = [] if exclude is None else [exclude]
+    mode = os.environ.get("SIMPLHDL_QUARTUS_QSYS_SOURCES", "directory")
+    if mode not in ("directory", "referenced"):
+        raise GeneratorError("SIMPLHDL_QUARTUS_QSYS_SOURCES must be directory or referenced")
+    if mode == "directory":
+        paths = walk_files(directory, exclusions)
+    else:
+        paths = [filename]
+        for ipfile in referenced_ipfiles(filename, directory):
+            if not ipfile.exists():
+                continue
+            paths.append(ipfile)
+            generated = ipfile.with_suffix("")
+            if generated.is_dir():
+                paths.extend(p for p in generated.rglob("*") if p.is_file())
+        paths.extend(search_path_files(directory, exclusions))
+    files = dict()
+    for path in paths:
+        name = os.path.relpath(os.path.normpath(path), os.path.normpath(directory))
+        if name.startswith(os.pardir):
+            logger.warning(f"{path}: is outside {directory} and can't be used by {filename.name}")
+        elif excluded is None or not is_relative_to(path.resolve(), excluded):
+            files[Path(name).as_posix()] = path
+    return files
+
+
 def copy_qsysfile(file: QuartusQsysFile, dest: Path) -> QuartusQsysFile:
     """
-    Copy QSYS files to a directory and return a new QuartusQsysFile object with the new path.
+    Link or copy a QSYS file and the files it uses to a directory and return a
+    new QuartusQsysFile object with the new path. Only files which have
+    changed since the last run are linked or copied again.
     """
-    md5file = dest.joinpath(file.path.name).with_suffix(".md5")
     qsysdir = dest.joinpath(file.path.name).with_suffix("")
-
-    src = file.path.parent
-    if not md5file.exists() or not md5check(src, filename=md5file):
-        logger.debug(f"Copy {file.path} to {qsysdir}")
-        # If destination is a subdirectory of source the copytree will have
-        # to ignore this subdirectory
-        if qsysdir.resolve().is_relative_to(src.resolve()):
-            ignoredir = qsysdir.resolve().relative_to(src.resolve()).parents[-2]
-            copytree(
-                str(src),
-                str(qsysdir),
-                dirs_exist_ok=True,
-                ignore=ignore_patterns(ignoredir),
-            )
-        else:
-            copytree(str(src), str(qsysdir), dirs_exist_ok=True)
-        md5write(src, filename=md5file)
+    manifest = dest.joinpath(file.path.name).with_suffix(".json")
+    if is_relative_to(file.path.resolve(), qsysdir.resolve()):
+        # NOTE: The file is already in the build directory.
+        return file
+    dest.mkdir(parents=True, exist_ok=True)
+    files = qsys_sources(file.path, exclude=qsysdir)
+    updated = sync_files(files, qsysdir, manifest, qsys_link_method())
+    logger.debug(f"Synced {updated} of {len(files)} files of {file.path} to {qsysdir}")
     file.__class__ = QuartusQsysFile
     file._path = qsysdir.joinpath(file.path.name).with_suffix(".qsys").resolve()
     if file.path.exists():
@@ -391,14 +774,12 @@ def unpack_qsysfile(file: QuartusQsysZipFile, dest: Path) -> QuartusQsysFile:
 
 def unpack(file: Path, dest: Path) -> None:
     """
-    Unpack a file to a directory and return the new path.
+    Unpack the changed files of an archive to a directory.
     """
-    md5file = dest.parent.joinpath(file.name).with_suffix(".md5")
-    if not md5file.exists() or not md5check(file, filename=md5file):
-        logger.info(f"Unpack {file} to {dest}")
-        with ZipFile(file, "r") as zip:
-            zip.extractall(dest)
-        md5write(file, filename=md5file)
+    manifest = dest.parent.joinpath(file.name).with_suffix(".json")
+    dest.mkdir(parents=True, exist_ok=True)
+    if extract_zip(file, dest, manifest):
+        logger.info(f"Unpacked {file} to {dest}")
 
 
 def filter_duplicated_files(files: list[File]) -> list[File]:
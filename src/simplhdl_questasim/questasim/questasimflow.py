@@ -13,18 +13,24 @@ from argparse import Namespace
 from pathlib import Path
 from typing import Any
 
-from jinja2 import Environment, FileSystemLoader, Template
+from jinja2 import Template
 
 from simplhdl import Project, FilesetOrder
 from simplhdl.cli.info import Info
+from simplhdl.matchers import LogMatcher, Severity
 from simplhdl.plugin import FlowTools, SimulationFlow
 from simplhdl.project.files import ModelsimIniFile
-from simplhdl.utils import escape, generate_from_template, sh
+from simplhdl.utils import escape, generate_from_template, sh, template_environment
 
 from ..resources.templates import questasim as questasimtemplates
 
 logger = logging.getLogger(__name__)
 
+QUESTASIM_MATCHERS = [
+    LogMatcher("QUESTASIM_ERROR", r"^#?\s*\*\* Error\b", Severity.ERROR),
+    LogMatcher("QUESTASIM_FATAL", r"^#?\s*\*\* Fatal\b", Severity.FATAL),
+]
+
 qrunfile = "project.qrun"
 
 
@@ -98,6 +104,12 @@ class QuestaSimFlow(SimulationFlow):
             metavar="ARGS",
             help="Extra arguments for QuestaSim vlog command",
         )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Watch the project files and recompile and rerun when they change",
+        )
+        self.parse_log_args(parser)
         parser.add_argument(
             "--seed",
             type=int,
@@ -200,6 +212,9 @@ class QuestaSimFlow(SimulationFlow):
             args.add(f"-top {top}")
         return list(args) + [self.args.qrun_args]
 
+    def log_matchers(self) -> list[LogMatcher]:
+        return QUESTASIM_MATCHERS + super().log_matchers()
+
     def execute(self, step: str) -> None:
         """
         Execute the QuestaSim simulation flow.
@@ -232,7 +247,8 @@ class QuestaSimFlow(SimulationFlow):
         command = self.get_command(step)
         env = self.get_environment(command)
 
-        sh(command, cwd=self.builddir, output=True, env=env)
+        with self.simulation():
+            sh(command, cwd=self.builddir, output=True, env=env)
         if step in ["simulate", ""]:
             self.run_hooks("post")
 
@@ -349,7 +365,8 @@ class QuestaSimFlow(SimulationFlow):
     def generate(self):
         self.check_libraries()
         templatedir = resources_files(self.templates)
-        env = Environment(loader=FileSystemLoader(templatedir), trim_blocks=True)
+        env = template_environment(templatedir)
+        globals = self.get_globals()
         templates: list[Template] = [
             env.get_template(f"{qrunfile}.j2"),
             env.get_template("vsim-run.do.j2"),
@@ -357,7 +374,7 @@ class QuestaSimFlow(SimulationFlow):
             env.get_template("visualizer.tcl.j2"),
         ]
         for template in templates:
-            generate_from_template(template, self.builddir, self.get_globals())
+            generate_from_template(template, self.builddir, globals)
         self.copy_memory_files()
         self.copy_modelsim_ini()
 
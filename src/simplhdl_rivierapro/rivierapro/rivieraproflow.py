@@ -10,6 +10,7 @@ from typing import Any
 from jinja2 import Template
 
 from simplhdl import Fileset, Project
+from simplhdl.matchers import LogMatcher, Severity
 from simplhdl.plugin import FlowTools, SimulationFlow
 from simplhdl.utils import escape, sh
 
@@ -17,6 +18,11 @@ from ..resources.templates import rivierapro as rivieraprotemplates
 
 logger = logging.getLogger(__name__)
 
+RIVIERAPRO_MATCHERS = [
+    LogMatcher("RIVIERAPRO_FATAL", r"^#?\s*(KERNEL|RUNTIME): Fatal Error\b", Severity.FATAL),
+    LogMatcher("RIVIERAPRO_ERROR", r"^#?\s*(KERNEL|RUNTIME|ELAB\d*): Error\b", Severity.ERROR),
+]
+
 
 class RivieraProFlow(SimulationFlow):
     @classmethod
@@ -66,6 +72,17 @@ class RivieraProFlow(SimulationFlow):
             metavar="args",
             help="Extra args for Riviera PRO vlog command",
         )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Compile each file on its own and only recompile changed files and their dependents",
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Watch the project files and recompile and rerun when they change",
+        )
+        self.parse_log_args(parser)
         parser.add_argument(
             "--seed",
             default=1,
@@ -188,6 +205,9 @@ class RivieraProFlow(SimulationFlow):
             library = ""
         return library
 
+    def log_matchers(self) -> list[LogMatcher]:
+        return RIVIERAPRO_MATCHERS + super().log_matchers()
+
     def execute(self, step: str) -> None:
         self.run_hooks("pre")
         sh(["make", "compile"], cwd=self.builddir, output=True)
@@ -204,7 +224,8 @@ class RivieraProFlow(SimulationFlow):
             command = ["make", "gui"]
         else:
             command = ["make", step]
-        sh(command, cwd=self.builddir, output=True)
+        with self.simulation():
+            sh(command, cwd=self.builddir, output=True)
         if step == "simulate":
             self.run_hooks("post")
 
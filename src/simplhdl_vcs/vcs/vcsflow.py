@@ -11,6 +11,7 @@ from typing import Any
 from jinja2 import Template
 
 from simplhdl import Fileset, Project
+from simplhdl.matchers import LogMatcher, Severity
 from simplhdl.plugin import FlowTools, SimulationFlow
 from simplhdl.utils import escape, sh
 
@@ -18,6 +19,11 @@ from ..resources.templates import vcs as vcstemplates
 
 logger = logging.getLogger(__name__)
 
+VCS_MATCHERS = [
+    LogMatcher("VCS_ERROR", r"^Error-\[", Severity.ERROR),
+    LogMatcher("VCS_FATAL", r"^Fatal: ", Severity.FATAL),
+]
+
 
 class VcsFlow(SimulationFlow):
     @classmethod
@@ -64,6 +70,17 @@ class VcsFlow(SimulationFlow):
             action="store",
             help="Extra args for Vcs vlogan command",
         )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Compile each file on its own and only recompile changed files and their dependents",
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Watch the project files and recompile and rerun when they change",
+        )
+        self.parse_log_args(parser)
         parser.add_argument(
             "--seed",
             default="1",
@@ -205,6 +222,9 @@ class VcsFlow(SimulationFlow):
             library = ""
         return library
 
+    def log_matchers(self) -> list[LogMatcher]:
+        return VCS_MATCHERS + super().log_matchers()
+
     def execute(self, step: str) -> None:
         self.run_hooks("pre")
         sh(["make", "compile"], cwd=self.builddir, output=True)
@@ -215,7 +235,8 @@ class VcsFlow(SimulationFlow):
             command = ["make", "gui"]
         else:
             command = ["make", step]
-        sh(command, cwd=self.builddir, output=True)
+        with self.simulation():
+            sh(command, cwd=self.builddir, output=True)
         if step == "simulate":
             self.run_hooks("post")
 
@@ -4,8 +4,7 @@ import logging
 import os
 import re
 from pathlib import Path
-from xml.etree.ElementTree import Element, parse
-from zipfile import ZipFile
+from xml.etree.ElementTree import iterparse
 
 from simplhdl import Fileset
 from simplhdl.plugin import FlowBase, FlowCategory, GeneratorBase
@@ -25,7 +24,7 @@ from simplhdl.project.files import (
     UnknownFile,
     UsedIn,
 )
-from simplhdl.utils import md5check, md5write
+from simplhdl.utils import FileMemo, extract_zip
 
 logger = logging.getLogger(__name__)
 
@@ -53,91 +52,96 @@ FILETYPE_2014_MAP = {
 }
 
 
+def localname(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def parse_component(filename: Path) -> tuple[dict[str, list[str]], dict[str, list[dict[str, str]]]]:
+    """
+    Extract the views with the names of their file sets, and the file sets
+    with their file entries, from an IP-XACT component. The file is streamed,
+    and the elements which aren't needed, e.g. the ports and parameters, are
+    dropped as soon as they are parsed.
+    """
+    views: dict[str, list[str]] = dict()
+    filesets: dict[str, list[dict[str, str]]] = dict()
+    path: list[str] = list()
+    files: list[dict[str, str]] = list()
+    fileset_name = None
+    for event, element in iterparse(filename, events=("start", "end")):
+        tag = localname(element.tag)
+        if event == "start":
+            path.append(tag)
+            if tag == "fileSet":
+                files, fileset_name = list(), None
+            continue
+        path.pop()
+        parent = path[-1] if path else None
+        if tag == "view" and parent == "views":
+            name = next((c.text for c in element if localname(c.tag) == "name"), None)
+            refs = [r.text for ref in element if localname(ref.tag) == "fileSetRef" for r in ref]
+            views[name] = refs
+        elif tag == "name" and parent == "fileSet":
+            fileset_name = element.text
+        elif tag == "file" and parent == "fileSet":
+            entry: dict[str, str] = dict()
+            for child in element:
+                entry.setdefault(localname(child.tag), child.text)
+            files.append(entry)
+        elif tag == "fileSet":
+            filesets[fileset_name] = files
+        # NOTE: The children of views and files are needed when they end.
+        if "view" not in path and "file" not in path:
+            element.clear()
+    return views, filesets
+
+
+_components = FileMemo(parse_component)
+
+
 class Component:
     def __init__(self):
         pass
 
     def load(self, filename: Path) -> None:
         self.filename = str(filename)
-        self.tree = parse(filename)
-        self.root = self.tree.getroot()
-        self.namespaces = {"ipxact": self.root.tag.split("}")[0].strip("{")}
+        self._views, self._filesets = _components(filename)
         self.location = filename.parent.absolute()
 
-    def views(self, pattern: str = r".*") -> list[Element]:
-        views = list()
-        for view in self.root.findall("ipxact:model/ipxact:views/ipxact:view", self.namespaces):
-            name = view.find("ipxact:name", self.namespaces).text
-            if re.match(pattern, name):
-                views.append(view)
-        return views
-
-    def filesets(self, view: Element) -> list[Element]:
-        fileset_refs = view.findall("ipxact:fileSetRef", self.namespaces)
-        allfilesets = self.root.findall("ipxact:fileSets/ipxact:fileSet", self.namespaces)
-        fileset_names = list()
-        filesets = list()
-
-        for ref in fileset_refs:
-            fileset_names.append(ref.find("ipxact:localName", self.namespaces).text)
-
-        for fileset in allfilesets:
-            name = fileset.find("ipxact:name", self.namespaces).text
-            if name in fileset_names:
-                filesets.append(fileset)
-        return filesets
-
-    def files(self, fileset: Element) -> list[Element]:
-        files = list()
-        file_elements = fileset.findall("ipxact:file", self.namespaces)
-        for file_element in file_elements:
-            files.append(self.element_to_file(file_element))
-        return file_elements
+    def views(self, pattern: str = r".*") -> list[str]:
+        return [name for name in self._views if re.match(pattern, name)]
 
-    def pyedaa_files(self, fileset: Element) -> list[Element]:
-        files = list()
-        file_elements = fileset.findall("ipxact:file", self.namespaces)
-        for file_element in file_elements:
-            files.append(self.element_to_file(file_element))
-        return files
+    def filesets(self, view: str) -> list[str]:
+        refs = self._views[view]
+        return [name for name in self._filesets if name in refs]
+
+    def files(self, fileset: str) -> list[dict[str, str]]:
+        return self._filesets[fileset]
+
+    def pyedaa_files(self, fileset: str) -> list[File]:
+        return [self.element_to_file(entry) for entry in self._filesets[fileset]]
+
+    def filepath(self, file: dict[str, str]) -> Path:
+        return self.location.joinpath(file["name"])
+
+    def element_to_fileset(self, fileset: str) -> Fileset:
+        fileset_ = Fileset(f"{self.filename}.{fileset}")
+        for file in self.pyedaa_files(fileset):
+            fileset_.add_file(file)
+        return fileset_
 
-    def filepath(self, file: Element) -> Path:
-        return self.location.joinpath(file.find("ipxact:name", self.namespaces).text)
-
-    def element_to_fileset(self, element: Element) -> Fileset:
-        if not element.tag.endswith("fileSet"):
-            raise Exception(f"Wrong tag {element.tag}")
-        name = f"{self.filename}.{element.find('ipxact:name', self.namespaces).text}"
-        fileset = Fileset(name)
-        for file in self.files(element):
-            fileset.add_file(self.element_to_file(file))
-        return fileset
-
-    def element_to_file(self, element: Element) -> File:  # noqa C901
-        if not element.tag.endswith("file"):
-            raise Exception(f"Wrong tag {element.tag}")
-        filepath = element.find("ipxact:name", self.namespaces).text
+    def element_to_file(self, element: dict[str, str]) -> File:  # noqa C901
+        filepath = element["name"]
         if filepath.startswith("/"):
             path = Path(filepath)
         else:
             path = Path(self.location, filepath)
         if not path.exists():
             raise FileNotFoundError(f"{path}: file not found")
-        try:
-            filetype = element.find("ipxact:fileType", self.namespaces).text
-        except AttributeError:
-            filetype = "unknown"
-        try:
-            logicalname = element.find("ipxact:logicalName", self.namespaces).text
-        except AttributeError:
-            logicalname = DEFAULT_LIB
-        try:
-            isinclude = ""
-            if element.find("ipxact:isIncludeFile", self.namespaces).text == "true":
-                isinclude = "Include"
-        except AttributeError:
-            pass
-        filetype += isinclude
+        filetype = element.get("fileType") or "unknown"
+        logicalname = element.get("logicalName") or DEFAULT_LIB
+        if element.get("isIncludeFile") == "true":
+            filetype += "Include"
 
         if filetype in FILETYPE_2014_MAP:
             fileclass = FILETYPE_2014_MAP.get(filetype)
@@ -167,16 +171,10 @@ class VivadoGenerator(GeneratorBase):
     def unpack_ip(self, filename: VivadoXciFile | VivadoXcixFile) -> Path:
         ipdir = self.builddir.joinpath("ips")
         dest = ipdir.joinpath(filename.path.stem)
-        md5file = dest.with_suffix(".md5")
+        manifest = dest.with_suffix(".json")
         ipdir.mkdir(exist_ok=True)
         if filename.path.suffix == ".xcix":
-            update = True
-            if md5file.exists():
-                update = not md5check(filename.path, filename=md5file)
-            if update:
-                with ZipFile(filename.path, "r") as zip:
-                    zip.extractall(ipdir)
-                md5write(filename.path, filename=md5file)
+            if extract_zip(filename.path, ipdir, manifest):
                 logger.debug(f"Unpack {filename.path} to {dest}")
         elif filename.path.suffix == ".xci":
             return filename.path.with_suffix(".xml")
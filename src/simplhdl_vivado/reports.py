@@ -0,0 +1,147 @@
+"""
+Parsers of the report files and run logs of Vivado. The reports are read line
+by line, so large reports aren't loaded into memory.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from pathlib import Path
+from typing import Any
+
+from simplhdl.utils import seconds
+
+__all__ = ["parse_run_log", "parse_timing_summary", "parse_utilization", "vivado_report"]
+
+logger = logging.getLogger(__name__)
+
+SECTION = re.compile(r"^\|\s+(\w[\w ]*?)\s*$")
+RULE = re.compile(r"^[\s-]+$")
+CLOCK_PERIOD = re.compile(r"^\s*(\S+)\s+\{[^}]*\}\s+(-?[\d.]+)\s+(-?[\d.]+)\s*$")
+CLOCK_SLACK = re.compile(r"^\s*(\S+)\s+(-?[\d.]+)\s+")
+COMMAND_TIME = re.compile(r"^(\w+): Time \(s\): cpu = [\d:.]+ ; elapsed = ([\d:.]+) \. Memory \(MB\): peak = ([\d.]+)")
+TIMING_COLUMNS = {"WNS(ns)": "setup_wns", "TNS(ns)": "setup_tns", "WHS(ns)": "hold_wns", "THS(ns)": "hold_tns"}
+
+
+def parse_timing_summary(path: Path) -> dict[str, Any]:
+    """
+    Get the setup and hold WNS and TNS from the Design Timing Summary of a
+    timing summary report, e.g. impl_1/top_timing_summary_routed.rpt, and the
+    Fmax of each clock in MHz from its period and worst slack.
+    """
+    summary: dict[str, Any] = dict()
+    periods: dict[str, float] = dict()
+    slacks: dict[str, float] = dict()
+    section = None
+    columns: list[str] | None = None
+    with path.open(errors="replace") as f:
+        for line in f:
+            m = SECTION.match(line)
+            if m:
+                section = m.group(1)
+                columns = None
+                continue
+            if section == "Design Timing Summary":
+                if "WNS(ns)" in line:
+                    # NOTE: Column names have spaces, e.g. TNS Failing Endpoints.
+                    columns = re.split(r"\s{2,}", line.strip())
+                elif columns and line.strip() and not RULE.match(line):
+                    for column, value in zip(columns, line.split()):
+                        if column in TIMING_COLUMNS:
+                            try:
+                                summary[TIMING_COLUMNS[column]] = float(value)
+                            except ValueError:
+                                logger.debug(f"{path}: can't parse {line.strip()}")
+                    columns = None
+            elif section == "Clock Summary":
+                m = CLOCK_PERIOD.match(line)
+                if m:
+                    periods[m.group(1)] = float(m.group(2))
+            elif section == "Intra Clock Table":
+                m = CLOCK_SLACK.match(line)
+                if m and m.group(1) in periods:
+                    slacks[m.group(1)] = float(m.group(2))
+    fmax = {clock: 1000.0 / (periods[clock] - slack) for clock, slack in slacks.items() if periods[clock] > slack}
+    if fmax:
+        summary["fmax"] = fmax
+    return summary
+
+
+def parse_utilization(path: Path) -> dict[str, dict[str, int]]:
+    """
+    Get the used and available resources from the tables of a utilization
+    report, e.g. impl_1/top_utilization_placed.rpt. The indented rows, which
+    break down a resource, are left out.
+    """
+    utilization = dict()
+    columns: list[str] | None = None
+    with path.open(errors="replace") as f:
+        for line in f:
+            if not line.startswith("|"):
+                continue
+            cells = line.rstrip().split("|")[1:-1]
+            names = [cell.strip() for cell in cells]
+            if "Site Type" in names:
+                columns = names
+                continue
+            if columns is None or len(cells) != len(columns) or cells[0].startswith("   "):
+                continue
+            row = dict(zip(columns, names))
+            try:
+                resource = {"used": int(row["Used"])}
+                if row.get("Available"):
+                    resource["available"] = int(row["Available"])
+            except (KeyError, ValueError):
+                continue
+            utilization.setdefault(names[0].rstrip("*"), resource)
+    return utilization
+
+
+def parse_run_log(path: Path) -> dict[str, dict[str, float]]:
+    """
+    Get the elapsed time in seconds and the peak memory in MB of each command
+    of a run from its log, e.g. impl_1/runme.log.
+    """
+    steps = dict()
+    with path.open(errors="replace") as f:
+        for line in f:
+            m = COMMAND_TIME.match(line)
+            if m:
+                steps[m.group(1)] = {"elapsed": seconds(m.group(2)), "peak_memory": float(m.group(3))}
+    return steps
+
+
+def vivado_report(builddir: Path, name: str, since: float | None = None) -> dict[str, Any]:
+    """
+    Get the timing, resources and command runtimes of the synthesis and
+    implementation runs of a project from their reports and logs. Reports
+    older than `since`, e.g. of an implementation run before the last
+    synthesis run, are left out.
+    """
+    runsdir = builddir.joinpath(f"{name}.runs")
+    report: dict[str, Any] = dict()
+    steps = dict()
+
+    def reports(pattern: str) -> list[Path]:
+        return sorted(p for p in runsdir.glob(pattern) if since is None or p.stat().st_mtime >= since)
+
+    try:
+        for run in ("synth_1", "impl_1"):
+            for log in reports(f"{run}/runme.log"):
+                steps.update(parse_run_log(log))
+        for pattern in ("impl_1/*_timing_summary_routed.rpt", "synth_1/*_timing_summary_synth.rpt"):
+            paths = reports(pattern)
+            if paths:
+                report.update(parse_timing_summary(paths[0]))
+                break
+        for pattern in ("impl_1/*_utilization_placed.rpt", "synth_1/*_utilization_synth.rpt"):
+            paths = reports(pattern)
+            if paths:
+                report["utilization"] = parse_utilization(paths[0])
+                break
+    except OSError as e:
+        logger.warning(f"{runsdir}: can't read report: {e}")
+    if steps:
+        report["steps"] = steps
+    return report
@@ -7,11 +7,10 @@ except ImportError:
 import logging
 import os
 import shutil
+import time
 from argparse import Namespace
 from pathlib import Path
 
-from jinja2 import Environment, FileSystemLoader
-
 from simplhdl import Project
 from simplhdl.plugin import FlowBase, FlowTools
 from simplhdl.project.files import (
@@ -29,8 +28,10 @@ from simplhdl.project.files import (
     VivadoXcixFile,
     VivadoXdcFile,
 )
-from simplhdl.utils import dict2str, generate_from_template, sh
+from simplhdl.results import save_build
+from simplhdl.utils import CalledShError, dict2str, generate_from_template, sh, template_environment
 
+from .reports import vivado_report
 from .resources.templates import vivado as templates
 
 logger = logging.getLogger(__name__)
@@ -107,7 +108,7 @@ class VivadoFlow(FlowBase):
 
     def generate(self):
         templatedir = resources_files(self.templates)
-        environment = Environment(loader=FileSystemLoader(templatedir), trim_blocks=True)
+        environment = template_environment(templatedir)
         template = environment.get_template("project.tcl.j2")
         generate_from_template(
             template,
@@ -138,7 +139,27 @@ class VivadoFlow(FlowBase):
     def execute(self, step: str):
         name = self.project.name
         command = f"vivado {name}.xpr -mode batch -notrace -source run.tcl -tclargs {step}".split()
-        sh(command, cwd=self.builddir, output=True)
+        started = time.time()
+        try:
+            sh(command, cwd=self.builddir, output=True)
+        except CalledShError:
+            self.ingest_reports(step, False, started)
+            raise
+        self.ingest_reports(step, True, started)
+
+    def ingest_reports(self, step: str, passed: bool, started: float) -> None:
+        """
+        Parse the timing, resources and command runtimes of the runs from the
+        reports and logs they wrote, and save them in report.json and the
+        results database.
+        """
+        # NOTE: A report which can't be parsed mustn't fail the build, or
+        #       replace the error of a failed step.
+        try:
+            report = vivado_report(self.builddir, self.project.name, since=started)
+            save_build(self.builddir, self.name, self.project.name, step, passed, started, report)
+        except Exception as e:
+            logger.warning(f"Can't ingest the reports of the {step} step: {e}")
 
     def run(self) -> None:
         if self.args.archive:
@@ -10,6 +10,7 @@ from typing import Any
 from jinja2 import Template
 
 from simplhdl import Fileset, Project
+from simplhdl.matchers import LogMatcher, Severity
 from simplhdl.plugin import FlowTools, SimulationFlow
 from simplhdl.utils import escape, sh
 
@@ -17,6 +18,11 @@ from ..resources.templates import xsim as xsimtemplates
 
 logger = logging.getLogger(__name__)
 
+XSIM_MATCHERS = [
+    LogMatcher("XSIM_FATAL", r"^FATAL_ERROR:", Severity.FATAL),
+    LogMatcher("XSIM_ERROR", r"^ERROR: \[", Severity.ERROR),
+]
+
 
 class XsimFlow(SimulationFlow):
     @classmethod
@@ -56,6 +62,17 @@ class XsimFlow(SimulationFlow):
             action="store",
             help="Extra args for Xsim xvlog command",
         )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Compile each file on its own and only recompile changed files and their dependents",
+        )
+        parser.add_argument(
+            "--watch",
+            action="store_true",
+            help="Watch the project files and recompile and rerun when they change",
+        )
+        self.parse_log_args(parser)
         parser.add_argument(
             "--seed",
             default="1",
@@ -155,6 +172,9 @@ class XsimFlow(SimulationFlow):
             args.add(f"--testplusarg {name}={escape(value)}")
         return " ".join(list(args) + [self.args.xsim_args])
 
+    def log_matchers(self) -> list[LogMatcher]:
+        return XSIM_MATCHERS + super().log_matchers()
+
     def execute(self, step: str) -> None:
         self.run_hooks("pre")
         sh(["make", "compile"], cwd=self.builddir, output=True)
@@ -172,7 +192,8 @@ class XsimFlow(SimulationFlow):
             command = ["make", "gui"]
         else:
             command = ["make", step]
-        sh(command, cwd=self.builddir, output=True)
+        with self.simulation():
+            sh(command, cwd=self.builddir, output=True)
         if step == "simulate":
             self.run_hooks("post")
 
@@ -4,17 +4,13 @@ import pytest
 
 from simplhdl.project.project import Project
 from simplhdl.project.design import Design
-from simplhdl.project.files import File
 from simplhdl.project.fileset import Fileset
 
 
 @pytest.fixture(autouse=True)
 def project() -> Project:
-    # The Project class is a singleton, so we need to reset it for each test.
-    Project._instance = None
-    # Clear caches
-    Fileset._cache.clear()
-    File._cache.clear()
+    # NOTE: Each project has its own files and filesets, so a new project
+    #       starts from scratch.
     return Project("project")
 
 
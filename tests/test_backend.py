@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import sys
+from argparse import Namespace
+
+import pytest
+
+from simplhdl.backends import LocalBackend, QueueBackend, local
+from simplhdl.plugin.backend import Job, JobStatus, execute
+
+
+def python_job(tmp_path, name: str, code: str, **options) -> Job:
+    return Job(name, [sys.executable, "-c", code], tmp_path, tmp_path.joinpath(f"{name}.log"), **options)
+
+
+def test_execute(tmp_path):
+    result = execute(python_job(tmp_path, "pass", "print('hello')"))
+    assert result.status == JobStatus.PASSED
+    assert result.returncode == 0
+    assert result.logfile.read_text() == "hello\n"
+
+    result = execute(python_job(tmp_path, "fail", "raise SystemExit(3)", retries=2))
+    assert result.status == JobStatus.FAILED
+    assert result.returncode == 3
+    assert result.attempts == 3
+
+    result = execute(python_job(tmp_path, "timeout", "import time; time.sleep(10)", timeout=0.3))
+    assert result.status == JobStatus.TIMEOUT
+    assert result.duration < 5
+
+
+def test_retry(tmp_path):
+    # NOTE: Fails the first time only.
+    code = "import pathlib, sys; p = pathlib.Path('once'); sys.exit(0 if p.exists() else p.touch() or 1)"
+    result = execute(python_job(tmp_path, "flaky", code, retries=1))
+    assert result.status == JobStatus.PASSED
+    assert result.attempts == 2
+
+
+@pytest.mark.parametrize("backend", ["local", "queue"])
+def test_backend(tmp_path, backend):
+    jobs = [python_job(tmp_path, f"job{i}", f"raise SystemExit({i % 2})", tags={"i": i}) for i in range(6)]
+    if backend == "local":
+        runner = LocalBackend("local", Namespace(jobs=3))
+    else:
+        runner = QueueBackend("queue", Namespace(queue=tmp_path.joinpath("queue"), hosts="localhost:3"))
+    results = {result.name: result for result in runner.run(jobs)}
+    assert sorted(results) == [job.name for job in jobs]
+    for i, job in enumerate(jobs):
+        result = results[job.name]
+        assert result.passed == (i % 2 == 0)
+        assert result.tags == {"i": i}
+        assert result.host is not None
+
+
+def test_job_memory(tmp_path, monkeypatch):
+    # NOTE: There is memory for two jobs, so no more than two run at a time.
+    monkeypatch.setattr(local, "available_memory", lambda: int(2.5 * local.GB))
+    code = "import time; start = time.time(); time.sleep(0.3); print(start, time.time())"
+    jobs = [python_job(tmp_path, f"job{i}", code) for i in range(4)]
+    results = list(LocalBackend("local", Namespace(jobs=4, job_memory=1.0)).run(jobs))
+    assert all(result.passed for result in results)
+    spans = [tuple(map(float, result.logfile.read_text().split())) for result in results]
+    assert max(sum(1 for start, end in spans if start <= t < end) for t, _ in spans) == 2
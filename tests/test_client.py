@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import os
+import socket
+
+import pytest
+
+from simplhdl import client
+from simplhdl.client import DaemonError, connect, peer_uid, request, socket_path
+from simplhdl.daemon import private_directory
+
+
+def test_socket_path(tmp_path, monkeypatch):
+    monkeypatch.delenv("SIMPLHDL_DAEMON_SOCKET", raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(client.tempfile, "gettempdir", lambda: str(tmp_path))
+    assert socket_path() == tmp_path.joinpath(f"simplhdl-{os.getuid()}", "daemon.sock")
+    private_directory(socket_path().parent)
+    assert socket_path().parent.stat().st_mode & 0o777 == 0o700
+    # NOTE: A directory others can access isn't used.
+    socket_path().parent.chmod(0o755)
+    with pytest.raises(DaemonError):
+        private_directory(socket_path().parent)
+
+
+def test_connect(tmp_path, monkeypatch):
+    path = tmp_path.joinpath("daemon.sock")
+    assert connect(path) is None
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(path))
+    server.listen()
+    with server:
+        sock = connect(path)
+        assert sock is not None
+        assert peer_uid(sock) in (None, os.getuid())
+        sock.close()
+        # NOTE: The socket of another user is never used.
+        uid = os.getuid()
+        monkeypatch.setattr(client.os, "getuid", lambda: uid + 1)
+        with pytest.raises(DaemonError, match="another user"):
+            connect(path)
+        monkeypatch.setenv("SIMPLHDL_DAEMON_SOCKET", str(path))
+        assert request(["xsim"]) is None
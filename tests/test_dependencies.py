@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from simplhdl.project.attributes import Library
+from simplhdl.project.dependencies import dependency_graph, scan_file, strata
+from simplhdl.project.files import SystemVerilogFile, VerilogIncludeFile, VhdlFile
+from simplhdl.project.fileset import FileOrder, Fileset
+
+
+def write(path, text):
+    path.write_text(text)
+    return path
+
+
+def test_scan_systemverilog(tmp_path):
+    path = write(
+        tmp_path / "top.sv",
+        """
+        // module commented (
+        `include "defs.svh"
+        module top import my_pkg::*; (input clk);
+          adder #(.W(8)) u_adder (.a(a), .b(b));
+          sub u_sub(.a(a));
+        endmodule
+        """,
+    )
+    units = scan_file(SystemVerilogFile(path))
+    assert units.provides == {"top"}
+    assert {"my_pkg", "adder", "sub"} <= units.requires
+    assert "commented" not in units.requires
+    assert units.includes == {"defs.svh"}
+
+
+def test_scan_vhdl(tmp_path):
+    path = write(
+        tmp_path / "top.vhd",
+        """
+        library work;
+        use work.types_pkg.all;
+        -- use work.commented_pkg.all;
+        entity Top is
+        end entity;
+        architecture rtl of top is
+          component adder is end component;
+        begin
+          u0 : entity work.sub port map (a => a);
+          u1 : adder port map (a => a);
+        end architecture;
+        """,
+    )
+    units = scan_file(VhdlFile(path))
+    assert units.provides == {"top"}
+    assert units.requires >= {"types_pkg", "sub", "adder"}
+    assert "commented_pkg" not in units.requires
+    assert "top" not in units.requires
+
+
+def test_dependency_graph(tmp_path):
+    pkg = SystemVerilogFile(write(tmp_path / "pkg.sv", "package my_pkg;\nendpackage\n"))
+    inc = VerilogIncludeFile(write(tmp_path / "defs.svh", "`define WIDTH 8\n"))
+    sub = SystemVerilogFile(write(tmp_path / "sub.sv", "module sub;\n  import my_pkg::*;\nendmodule\n"))
+    top = SystemVerilogFile(write(tmp_path / "top.sv", '`include "defs.svh"\nmodule top;\n  sub u_sub();\nendmodule\n'))
+    graph = dependency_graph([top, sub, inc, pkg])
+    assert set(graph.edges()) == {(top, sub), (top, inc), (sub, pkg)}
+
+
+def test_strata(tmp_path):
+    pkg = SystemVerilogFile(write(tmp_path / "pkg.sv", "package my_pkg;\nendpackage\n"))
+    a = SystemVerilogFile(write(tmp_path / "a.sv", "module a;\n  import my_pkg::*;\nendmodule\n"))
+    b = SystemVerilogFile(write(tmp_path / "b.sv", "module b;\nendmodule\n"))
+    top = SystemVerilogFile(write(tmp_path / "top.sv", "module top;\n  a u_a();\n  b u_b();\nendmodule\n"))
+    assert strata([top, b, a, pkg]) == [[b, pkg], [a], [top]]
+
+
+def test_strata_with_cycle(tmp_path):
+    a = SystemVerilogFile(write(tmp_path / "a.sv", "module a;\n  b u_b();\nendmodule\n"))
+    b = SystemVerilogFile(write(tmp_path / "b.sv", "module b;\n  a u_a();\nendmodule\n"))
+    top = SystemVerilogFile(write(tmp_path / "top.sv", "module top;\n  a u_a();\nendmodule\n"))
+    assert strata([a, b, top]) == [[a], [b], [top]]
+
+
+def test_strata_prefers_same_library(tmp_path):
+    lib1 = Library("lib1")
+    lib2 = Library("lib2")
+    sub1 = VhdlFile(write(tmp_path / "sub1.vhd", "entity sub is\nend entity;\n"), library=lib1)
+    sub2 = VhdlFile(write(tmp_path / "sub2.vhd", "entity sub is\nend entity;\n"), library=lib2)
+    top = VhdlFile(
+        write(tmp_path / "top.vhd", "entity top is\nend;\nu0 : entity work.sub port map (a);\n"), library=lib2
+    )
+    assert set(dependency_graph([sub1, sub2, top]).edges()) == {(top, sub2)}
+
+
+def test_design_files_strata_order(design, tmp_path):
+    fs = Fileset("fs")
+    design.add_fileset(fs)
+    # Declared in the wrong order, the dependency scanner fixes it
+    top = SystemVerilogFile(write(tmp_path / "top.sv", "module top;\n  sub u_sub();\nendmodule\n"))
+    sub = SystemVerilogFile(write(tmp_path / "sub.sv", "module sub;\n  import my_pkg::*;\nendmodule\n"))
+    pkg = SystemVerilogFile(write(tmp_path / "pkg.sv", "package my_pkg;\nendpackage\n"))
+    fs.add_file(top)
+    fs.add_file(sub)
+    fs.add_file(pkg)
+    assert design.files(order=FileOrder.COMPILE) == [top, sub, pkg]
+    assert design.files(order=FileOrder.STRATA) == [pkg, sub, top]
+    assert design.strata() == [[pkg], [sub], [top]]
+    assert fs.files(order=FileOrder.STRATA) == [pkg, sub, top]
+
+
+def test_include_prefers_same_fileset(design, tmp_path):
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    fs_a = Fileset("a")
+    fs_b = Fileset("b")
+    design.add_fileset(fs_a)
+    design.add_fileset(fs_b)
+    inc_a = VerilogIncludeFile(write(tmp_path / "a" / "env.svh", "`define A\n"))
+    inc_b = VerilogIncludeFile(write(tmp_path / "b" / "env.svh", "`define B\n"))
+    top = SystemVerilogFile(write(tmp_path / "b" / "top.sv", '`include "env.svh"\nmodule top;\nendmodule\n'))
+    fs_a.add_file(inc_a)
+    fs_b.add_file(inc_b)
+    fs_b.add_file(top)
+    assert set(dependency_graph([inc_a, inc_b, top]).edges()) == {(top, inc_b)}
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from simplhdl_vivado.ipxact import Component, parse_component
+
+COMPONENT = """<?xml version="1.0" encoding="UTF-8"?>
+<spirit:component xmlns:spirit="http://www.spiritconsortium.org/XMLSchema/SPIRIT/1685-2009">
+  <spirit:name>fifo</spirit:name>
+  <spirit:model>
+    <spirit:views>
+      <spirit:view>
+        <spirit:name>xilinx_verilogsimulation</spirit:name>
+        <spirit:fileSetRef><spirit:localName>sim_files</spirit:localName></spirit:fileSetRef>
+      </spirit:view>
+      <spirit:view>
+        <spirit:name>xilinx_synthesis</spirit:name>
+        <spirit:fileSetRef><spirit:localName>synth_files</spirit:localName></spirit:fileSetRef>
+      </spirit:view>
+    </spirit:views>
+    <spirit:ports>
+      <spirit:port><spirit:name>clk</spirit:name></spirit:port>
+    </spirit:ports>
+  </spirit:model>
+  <spirit:fileSets>
+    <spirit:fileSet>
+      <spirit:name>synth_files</spirit:name>
+      <spirit:file><spirit:name>synth/fifo.v</spirit:name></spirit:file>
+    </spirit:fileSet>
+    <spirit:fileSet>
+      <spirit:name>sim_files</spirit:name>
+      <spirit:file>
+        <spirit:name>sim/fifo.sv</spirit:name>
+        <spirit:fileType>systemVerilogSource</spirit:fileType>
+        <spirit:logicalName>fifo_lib</spirit:logicalName>
+      </spirit:file>
+      <spirit:file>
+        <spirit:name>sim/fifo.vh</spirit:name>
+        <spirit:fileType>verilogSource</spirit:fileType>
+        <spirit:isIncludeFile>true</spirit:isIncludeFile>
+      </spirit:file>
+    </spirit:fileSet>
+  </spirit:fileSets>
+</spirit:component>
+"""
+
+
+def test_parse_component(tmp_path):
+    path = tmp_path.joinpath("fifo.xml")
+    path.write_text(COMPONENT)
+    views, filesets = parse_component(path)
+    assert views == {"xilinx_verilogsimulation": ["sim_files"], "xilinx_synthesis": ["synth_files"]}
+    assert filesets["synth_files"] == [{"name": "synth/fifo.v"}]
+    assert filesets["sim_files"][1] == {"name": "sim/fifo.vh", "fileType": "verilogSource", "isIncludeFile": "true"}
+
+
+def test_component(tmp_path):
+    path = tmp_path.joinpath("fifo.xml")
+    path.write_text(COMPONENT)
+    tmp_path.joinpath("sim").mkdir()
+    tmp_path.joinpath("sim", "fifo.sv").write_text("")
+    tmp_path.joinpath("sim", "fifo.vh").write_text("")
+    component = Component()
+    component.load(path)
+    assert component.views(".*simulation.*") == ["xilinx_verilogsimulation"]
+    files = component.pyedaa_files(component.filesets("xilinx_verilogsimulation")[0])
+    assert [(type(f).__name__, f.path.name) for f in files] == [
+        ("SystemVerilogFile", "fifo.sv"),
+        ("VerilogIncludeFile", "fifo.vh"),
+    ]
+    assert files[0].library.name == "fifo_lib"
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from simplhdl import Design, Fileset, Project, ProjectError
+from simplhdl.project.attributes import Library
+from simplhdl.project.files import File
+from simplhdl.project.project import current_project
+
+
+def create_project(name: str) -> Project:
+    project = Project(name)
+    design = Design("design")
+    project.add_design(design)
+    fileset = Fileset("fileset")
+    design.add_fileset(fileset)
+    fileset.add_file(File("top.sv"))
+    fileset.library = Library("work")
+    return project
+
+
+def test_current_project(project):
+    assert Project() is project
+    assert current_project() is project
+    other = Project("other")
+    assert Project() is other
+    with project.activate():
+        assert Project() is project
+    assert Project() is other
+
+
+def test_independent_projects():
+    a = create_project("a")
+    b = create_project("b")
+    fileset_a = a.defaultDesign.filesets()[0]
+    fileset_b = b.defaultDesign.filesets()[0]
+    assert fileset_a is not fileset_b
+    assert fileset_a.project is a
+    assert fileset_b.project is b
+    assert fileset_a.library._project is a
+    assert next(iter(fileset_a.files())) is not next(iter(fileset_b.files()))
+    with a.activate():
+        assert Fileset("fileset") is fileset_a
+    assert Fileset("fileset") is fileset_b
+
+
+def test_concurrent_projects():
+    with ThreadPoolExecutor(4) as pool:
+        projects = list(pool.map(create_project, [f"project{i}" for i in range(8)]))
+    for project in projects:
+        fileset = project.defaultDesign.filesets()[0]
+        assert fileset.project is project
+        assert [f.path.name for f in project.defaultDesign.files()] == ["top.sv"]
+
+
+def test_no_current_project():
+    def get_project():
+        return Project()
+
+    # NOTE: A new thread has no current project.
+    with ThreadPoolExecutor(1) as pool, pytest.raises(ProjectError):
+        pool.submit(get_project).result()
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from argparse import ArgumentTypeError, Namespace
+
+import pytest
+
+from simplhdl.backends import LocalBackend
+from simplhdl.cli.arguments import parse_arguments
+from simplhdl.plugin.backend import BackendFactory
+from simplhdl.plugin.flow import FlowFactory
+from simplhdl.project.design import Design
+from simplhdl.project.files import SdcFile, VerilogFile
+from simplhdl.project.fileset import Fileset
+from simplhdl.utils import CalledShError
+from simplhdl_quartus.partitions import Partition
+from simplhdl_quartus.quartusdse.quartusdseflow import SWEEP_JOB_MEMORY, QuartusDseFlow
+from simplhdl_quartus.quartusflow import QuartusFlow, project_fingerprint
+
+# NOTE: Creates the project, like quartus_sh -t project.tcl, a timing summary
+#       depending on the seed, like quartus_sh --flow compile, or the file
+#       given by --file, like quartus_cdb, and logs the call. The steps run
+#       by run.tcl fail if QUARTUS_SH_FAIL is set.
+QUARTUS_SH = """#!{python}
+import os, re, sys
+from pathlib import Path
+args = sys.argv[1:]
+if args[:2] == ["-t", "project.tcl"]:
+    Path("top.qsf").write_text("")
+    Path("top.qpf").write_text("")
+if args[:2] == ["--flow", "compile"]:
+    seed = int(re.search(r"-name SEED (\\d+)", Path("top.qsf").read_text()).group(1))
+    Path("output_files").mkdir(exist_ok=True)
+    Path("output_files", "top.sta.summary").write_text(f"Type  : Setup 'clk'\\nSlack : {{seed / 10 - 0.25}}\\n")
+if "--file" in args:
+    Path(args[args.index("--file") + 1]).write_text("")
+with open(os.environ["QUARTUS_SH_LOG"], "a") as log:
+    log.write(" ".join([Path(sys.argv[0]).name] + args) + "\\n")
+if args[:2] == ["-t", "run.tcl"] and os.environ.get("QUARTUS_SH_FAIL"):
+    sys.exit(1)
+"""
+
+
+@pytest.fixture
+def quartus_sh(tmp_path, monkeypatch):
+    bindir = tmp_path.joinpath("bin")
+    bindir.mkdir()
+    for name in ("quartus_sh", "quartus", "quartus_cdb"):
+        tool = bindir.joinpath(name)
+        tool.write_text(QUARTUS_SH.format(python=sys.executable))
+        tool.chmod(0o755)
+    logfile = tmp_path.joinpath("calls.log")
+    monkeypatch.setenv("PATH", f"{bindir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("QUARTUS_SH_LOG", str(logfile))
+    return logfile
+
+
+def test_project_fingerprint(tmp_path):
+    qsf = tmp_path.joinpath("pins.qsf")
+    qsf.write_text("set_location_assignment PIN_A1 -to clk\n")
+    script = tmp_path.joinpath("project.tcl")
+
+    def fingerprint(*lines: str) -> str:
+        script.write_text("\n".join(lines) + "\n")
+        return project_fingerprint(script)
+
+    files = [
+        'set_global_assignment -library work -name VERILOG_FILE "a.v"',
+        'set_global_assignment -name VHDL_FILE "b.vhd"',
+    ]
+    sdcs = ['set_global_assignment -name SDC_FILE "a.sdc"', 'set_global_assignment -name SDC_FILE "b.sdc"']
+    reference = fingerprint('project_new -part "A" "top"', *files, *sdcs, f'source "{qsf}"')
+    # NOTE: The order of the source files doesn't change the project, but the
+    #       order of the timing constraints does.
+    assert fingerprint('project_new -part "A" "top"', *reversed(files), "", *sdcs, f'source "{qsf}"') == reference
+    assert fingerprint('project_new -part "A" "top"', *files, *reversed(sdcs), f'source "{qsf}"') != reference
+    assert fingerprint('project_new -part "B" "top"', *files, *sdcs, f'source "{qsf}"') != reference
+    qsf.write_text("set_location_assignment PIN_B1 -to clk\n")
+    assert fingerprint('project_new -part "A" "top"', *files, *sdcs, f'source "{qsf}"') != reference
+
+
+def test_generate(tmp_path, project, quartus_sh):
+    design = Design("design")
+    project.add_design(design)
+    fileset = Fileset("fileset")
+    design.add_fileset(fileset)
+    for name in ("a.v", "b.v", "top.sdc"):
+        tmp_path.joinpath(name).write_text("")
+    fileset.add_file(VerilogFile(tmp_path.joinpath("a.v")))
+    fileset.add_file(VerilogFile(tmp_path.joinpath("b.v")))
+    fileset.add_file(SdcFile(tmp_path.joinpath("top.sdc")))
+    design.toplevels = {"top"}
+    project.name = "top"
+    project.part = "AGFB014R24B2E2V"
+
+    def calls() -> int:
+        return len(quartus_sh.read_text().splitlines()) if quartus_sh.exists() else 0
+
+    builddir = tmp_path.joinpath("_build")
+    builddir.mkdir()
+    flow = QuartusFlow("quartus", Namespace(), project, builddir)
+    flow.generate()
+    assert calls() == 1
+    flow.generate()
+    assert calls() == 1
+    project.defines["DEBUG"] = "1"
+    flow.generate()
+    assert calls() == 2
+    builddir.joinpath("top.qsf").unlink()
+    flow.generate()
+    assert calls() == 3
+
+
+def test_partition():
+    partition = Partition.parse("core:u_top|u_core:core")
+    assert (partition.name, partition.instance, partition.entity) == ("core", "u_top|u_core", "core")
+    with pytest.raises(ArgumentTypeError):
+        Partition.parse("core:u_core")
+
+
+def test_incremental_compile(tmp_path, project, quartus_sh):
+    design = Design("design")
+    project.add_design(design)
+    fileset = Fileset("fileset")
+    design.add_fileset(fileset)
+    sources = {
+        "top.v": "module top;\n  core #(.W(8)) u_core();\n  uart u_uart();\nendmodule\n",
+        "core.v": "module core;\n  adder u_adder();\nendmodule\n",
+        "adder.v": "module adder;\nendmodule\n",
+        "uart.v": "module uart;\nendmodule\n",
+    }
+    for name, text in sources.items():
+        tmp_path.joinpath(name).write_text(text)
+        fileset.add_file(VerilogFile(tmp_path.joinpath(name)))
+    design.toplevels = {"top"}
+    project.name = "top"
+    project.part = "AGFB014R24B2E2V"
+    builddir = tmp_path.joinpath("_build")
+    builddir.mkdir()
+    args = Namespace(partition=[Partition.parse("core:u_core:core")], incremental=True, gui=False)
+    flow = QuartusFlow("quartus", args, project, builddir)
+
+    def compile() -> list[str]:
+        start = len(quartus_sh.read_text().splitlines()) if quartus_sh.exists() else 0
+        flow.generate()
+        flow.execute("compile")
+        return [line.split()[0] for line in quartus_sh.read_text().splitlines()[start:]]
+
+    assert compile() == ["quartus_sh", "quartus_sh", "quartus_cdb"]
+    assert 'PARTITION core -to "u_core"' in builddir.joinpath("project.tcl").read_text()
+    assert "-remove" in builddir.joinpath("partitions.tcl").read_text()
+    assert builddir.joinpath("partitions", "core.qdb").exists()
+    # NOTE: A change outside the partition reuses its snapshot.
+    tmp_path.joinpath("uart.v").write_text("module uart;\n  // changed\nendmodule\n")
+    assert compile() == ["quartus_sh"]
+    assert "QDB_FILE_PARTITION" in builddir.joinpath("partitions.tcl").read_text()
+    assert "-remove" not in builddir.joinpath("partitions.tcl").read_text()
+    # NOTE: A change of the parameters of the partition compiles it again.
+    tmp_path.joinpath("top.v").write_text("module top;\n  core #(.W(16)) u_core();\n  uart u_uart();\nendmodule\n")
+    assert compile() == ["quartus_sh", "quartus_cdb"]
+    assert "-remove" in builddir.joinpath("partitions.tcl").read_text()
+    # NOTE: A change of a file the partition depends on compiles it again.
+    tmp_path.joinpath("adder.v").write_text("module adder;\n  // changed\nendmodule\n")
+    assert compile() == ["quartus_sh", "quartus_cdb"]
+    assert "-remove" in builddir.joinpath("partitions.tcl").read_text()
+
+
+def test_ingest_malformed_report(tmp_path, project, quartus_sh, monkeypatch, caplog):
+    monkeypatch.delenv("SIMPLHDL_RESULTS_DB", raising=False)
+    design = Design("design")
+    project.add_design(design)
+    fileset = Fileset("fileset")
+    design.add_fileset(fileset)
+    tmp_path.joinpath("top.v").write_text("module top;\nendmodule\n")
+    fileset.add_file(VerilogFile(tmp_path.joinpath("top.v")))
+    design.toplevels = {"top"}
+    project.name = "top"
+    project.part = "AGFB014R24B2E2V"
+    builddir = tmp_path.joinpath("_build")
+    builddir.joinpath("output_files").mkdir(parents=True)
+    flowreport = builddir.joinpath("output_files", "top.flow.rpt")
+    flowreport.write_text("; Flow Elapsed Time ;\n; Module Name ; Elapsed Time ;\n; Fitter ; 00:xx:10 ;\n")
+    os.utime(flowreport, (2000000000, 2000000000))
+    flow = QuartusFlow("quartus", Namespace(gui=False), project, builddir)
+    flow.generate()
+    flow.execute("compile")
+    assert "Can't ingest the reports of the compile step" in caplog.text
+    assert not builddir.joinpath("report.json").exists()
+    # NOTE: The error of a failed step isn't replaced.
+    monkeypatch.setenv("QUARTUS_SH_FAIL", "1")
+    with pytest.raises(CalledShError):
+        flow.execute("compile")
+
+
+def test_dse_sweep(tmp_path, project, quartus_sh, monkeypatch):
+    monkeypatch.setitem(BackendFactory.registry, "local", LocalBackend)
+    design = Design("design")
+    project.add_design(design)
+    fileset = Fileset("fileset")
+    design.add_fileset(fileset)
+    tmp_path.joinpath("top.v").write_text("module top;\nendmodule\n")
+    fileset.add_file(VerilogFile(tmp_path.joinpath("top.v")))
+    design.toplevels = {"top"}
+    project.name = "top"
+    project.part = "AGFB014R24B2E2V"
+    builddir = tmp_path.joinpath("_build")
+    builddir.mkdir()
+    args = Namespace(
+        sweep=True,
+        num_seeds="3",
+        first_seed=1,
+        setting=[("OPTIMIZATION_MODE", ["BALANCED", "AGGRESSIVE PERFORMANCE"])],
+        backend=None,
+        jobs=4,
+    )
+    builddir.joinpath("ips").mkdir()
+    builddir.joinpath("ips", "ram.ip").write_text("<ip>ram</ip>")
+    QuartusDseFlow("quartus-dse", args, project, builddir).run()
+    # NOTE: Each compile has its own copy of the IP.
+    ipfile = builddir.joinpath("dse", "seed1-0", "ips", "ram.ip")
+    assert not ipfile.is_symlink() and ipfile.read_text() == "<ip>ram</ip>"
+    assert not ipfile.samefile(builddir.joinpath("ips", "ram.ip"))
+    results = json.loads(builddir.joinpath("dse", "results.json").read_text())
+    assert len(results) == 6
+    assert [row["seed"] for row in results[:2]] == [3, 3]
+    assert results[0]["setup_wns"] == pytest.approx(0.05)
+    qsf = builddir.joinpath("dse", "seed2-1", "top.qsf").read_text()
+    assert "SEED 2" in qsf
+    assert 'OPTIMIZATION_MODE "AGGRESSIVE PERFORMANCE"' in qsf
+
+
+def test_dse_job_memory(monkeypatch):
+    monkeypatch.setitem(BackendFactory.registry, "local", LocalBackend)
+    monkeypatch.setitem(FlowFactory.registry, "quartus-dse", QuartusDseFlow)
+    assert parse_arguments(["quartus-dse", "--sweep"]).job_memory == SWEEP_JOB_MEMORY
+    assert parse_arguments(["quartus-dse", "--sweep", "--job-memory", "4"]).job_memory == pytest.approx(4.0)
+
+
+def test_dse_partitions(tmp_path, project, quartus_sh, monkeypatch):
+    monkeypatch.setitem(BackendFactory.registry, "local", LocalBackend)
+    design = Design("design")
+    project.add_design(design)
+    fileset = Fileset("fileset")
+    design.add_fileset(fileset)
+    tmp_path.joinpath("top.v").write_text("module top;\n  core u_core();\nendmodule\n")
+    tmp_path.joinpath("core.v").write_text("module core;\nendmodule\n")
+    fileset.add_file(VerilogFile(tmp_path.joinpath("top.v")))
+    fileset.add_file(VerilogFile(tmp_path.joinpath("core.v")))
+    design.toplevels = {"top"}
+    project.name = "top"
+    project.part = "AGFB014R24B2E2V"
+    builddir = tmp_path.joinpath("_build")
+    builddir.mkdir()
+    partitions = [Partition.parse("core:u_core:core")]
+    QuartusFlow("quartus", Namespace(partition=partitions), project, builddir).generate()
+    builddir.joinpath("top.qsf").write_text('set_instance_assignment -name QDB_FILE_PARTITION "core.qdb" -to u_core\n')
+    args = Namespace(sweep=True, num_seeds="1", first_seed=1, setting=[], partition=partitions, backend=None, jobs=1)
+    QuartusDseFlow("quartus-dse", args, project, builddir).run()
+    # NOTE: The project of the quartus flow is reused by the quartus-dse flow,
+    #       but the compiles of the sweep don't import partition snapshots.
+    assert sum(line.endswith("-t project.tcl") for line in quartus_sh.read_text().splitlines()) == 1
+    assert "QDB_FILE_PARTITION" in builddir.joinpath("top.qsf").read_text()
+    assert "QDB_FILE_PARTITION" not in builddir.joinpath("dse", "seed1", "top.qsf").read_text()
@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from simplhdl_quartus.reports import (
+    parse_fit_summary,
+    parse_flow_elapsed,
+    parse_fmax,
+    parse_sta_summary,
+    quartus_report,
+)
+from simplhdl_vivado.reports import parse_run_log, parse_timing_summary, parse_utilization, vivado_report
+
+STA_SUMMARY = """------------------------------------------------------------
+Timing Analyzer Summary
+------------------------------------------------------------
+
+Type  : Slow 900mV 100C Model Setup 'clk'
+Slack : -0.250
+TNS   : -1.500
+
+Type  : Slow 900mV 100C Model Setup 'clk_fast'
+Slack : 0.100
+TNS   : 0.000
+
+Type  : Fast 900mV 0C Model Setup 'clk'
+Slack : 0.300
+TNS   : 0.000
+
+Type  : Slow 900mV 100C Model Hold 'clk'
+Slack : 0.020
+TNS   : 0.000
+
+Type  : Slow 900mV 100C Model Minimum Pulse Width 'clk'
+Slack : 1.200
+TNS   : 0.000
+"""
+
+
+def test_parse_sta_summary(tmp_path):
+    path = tmp_path.joinpath("top.sta.summary")
+    path.write_text(STA_SUMMARY)
+    summary = parse_sta_summary(path)
+    assert summary["setup_wns"] == pytest.approx(-0.25)
+    assert summary["setup_tns"] == pytest.approx(-1.5)
+    assert summary["hold_wns"] == pytest.approx(0.02)
+    assert summary["hold_tns"] == pytest.approx(0.0)
+
+
+STA_REPORT = """+-----------------------------------------------------------+
+; Slow 900mV 100C Model Fmax Summary                        ;
++------------+-----------------+------------+---------------+
+; Fmax       ; Restricted Fmax ; Clock Name ; Note          ;
++------------+-----------------+------------+---------------+
+; 412.2 MHz  ; 400.0 MHz       ; clk        ; limit due to  ;
+; 250.0 MHz  ; 250.0 MHz       ; clk_slow   ;               ;
++------------+-----------------+------------+---------------+
+
++-----------------------------------------------------------+
+; Fast 900mV 0C Model Fmax Summary                          ;
++------------+-----------------+------------+---------------+
+; Fmax       ; Restricted Fmax ; Clock Name ; Note          ;
++------------+-----------------+------------+---------------+
+; 520.8 MHz  ; 500.0 MHz       ; clk        ;               ;
++------------+-----------------+------------+---------------+
+"""
+
+FIT_SUMMARY = """Fitter Status : Successful - Mon Oct 19 10:00:00 2026
+Quartus Prime Version : 23.4.0 Build 79 11/22/2023 SC Pro Edition
+Revision Name : top
+Family : Agilex 7
+Device : AGFB014R24B2E2V
+Logic utilization (ALMs needed / total ALMs on device) : 1,234 / 487,200 ( < 1 % )
+Total dedicated logic registers : 2,345
+Total pins : 12 / 720 ( 2 % )
+Total block memory bits : 0 / 145,612,800 ( 0 % )
+"""
+
+FLOW_REPORT = """+----------------------------------------------------------------------------------------------+
+; Flow Elapsed Time                                                                            ;
++-------------------------+--------------+-------------------------+---------------------+-----+
+; Module Name             ; Elapsed Time ; Average Processors Used ; Peak Virtual Memory ; ... ;
++-------------------------+--------------+-------------------------+---------------------+-----+
+; Analysis & Synthesis    ; 00:01:30     ; 1.0                     ; 4321 MB             ;     ;
+; Fitter                  ; 01:02:03     ; 4.2                     ; 12345 MB            ;     ;
++-------------------------+--------------+-------------------------+---------------------+-----+
+"""
+
+
+def test_parse_quartus_reports(tmp_path):
+    outputdir = tmp_path.joinpath("output_files")
+    outputdir.mkdir()
+    outputdir.joinpath("top.sta.summary").write_text(STA_SUMMARY)
+    outputdir.joinpath("top.sta.rpt").write_text(STA_REPORT)
+    outputdir.joinpath("top.fit.summary").write_text(FIT_SUMMARY)
+    outputdir.joinpath("top.flow.rpt").write_text(FLOW_REPORT)
+    assert parse_fmax(outputdir.joinpath("top.sta.rpt")) == {"clk": 400.0, "clk_slow": 250.0}
+    utilization = parse_fit_summary(outputdir.joinpath("top.fit.summary"))
+    assert utilization["Logic utilization (ALMs needed / total ALMs on device)"] == {"used": 1234, "available": 487200}
+    assert utilization["Total dedicated logic registers"] == {"used": 2345}
+    assert "Device" not in utilization
+    assert "Quartus Prime Version" not in utilization
+    assert len(utilization) == 4
+    steps = parse_flow_elapsed(outputdir.joinpath("top.flow.rpt"))
+    assert steps == {
+        "Analysis & Synthesis": {"elapsed": 90.0, "peak_memory": 4321.0},
+        "Fitter": {"elapsed": 3723.0, "peak_memory": 12345.0},
+    }
+    report = quartus_report(tmp_path, "top")
+    assert report["setup_wns"] == pytest.approx(-0.25)
+    assert sorted(report) == ["fmax", "hold_tns", "hold_wns", "setup_tns", "setup_wns", "steps", "utilization"]
+    # NOTE: Only the reports written since the compile started are parsed.
+    os.utime(outputdir.joinpath("top.flow.rpt"), (2000000000, 2000000000))
+    assert quartus_report(tmp_path, "top", since=1900000000) == {"steps": steps}
+
+
+TIMING_SUMMARY = """------------------------------------------------------------------------------------------------
+| Design Timing Summary
+| ---------------------
+------------------------------------------------------------------------------------------------
+
+    WNS(ns)      TNS(ns)  TNS Failing Endpoints  TNS Total Endpoints      WHS(ns)      THS(ns)  THS Failing Endpoints
+    -------      -------  ---------------------  -------------------      -------      -------  ---------------------
+     -0.500       -2.000                      8                 1234        0.050        0.000                      0
+
+
+------------------------------------------------------------------------------------------------
+| Clock Summary
+| -------------
+------------------------------------------------------------------------------------------------
+
+Clock       Waveform(ns)         Period(ns)      Frequency(MHz)
+-----       ------------         ----------      --------------
+clk         {0.000 2.000}        4.000           250.000
+clk_slow    {0.000 5.000}        10.000          100.000
+
+
+------------------------------------------------------------------------------------------------
+| Intra Clock Table
+| -----------------
+------------------------------------------------------------------------------------------------
+
+Clock             WNS(ns)      TNS(ns)  TNS Failing Endpoints  TNS Total Endpoints      WHS(ns)
+-----             -------      -------  ---------------------  -------------------      -------
+clk                -0.500       -2.000                      8                 1000        0.050
+clk_slow            5.000        0.000                      0                  234        0.120
+"""
+
+UTILIZATION = """1. CLB Logic
+------------
+
++----------------------------+------+-------+------------+-----------+-------+
+|          Site Type         | Used | Fixed | Prohibited | Available | Util% |
++----------------------------+------+-------+------------+-----------+-------+
+| CLB LUTs                   | 1234 |     0 |          0 |    230400 |  0.54 |
+|   LUT as Logic             | 1200 |     0 |          0 |    230400 |  0.52 |
+| CLB Registers              | 2345 |     0 |          0 |    460800 |  0.51 |
++----------------------------+------+-------+------------+-----------+-------+
+"""
+
+RUN_LOG = """Starting Routing Task
+Phase 1 Build RT Design | Checksum: 1a2b3c4d
+Time (s): cpu = 00:00:10 ; elapsed = 00:00:08 . Memory (MB): peak = 3000.000 ; gain = 100.000
+route_design: Time (s): cpu = 00:02:00 ; elapsed = 00:01:05 . Memory (MB): peak = 3456.789 ; gain = 456.000
+"""
+
+
+def test_parse_vivado_reports(tmp_path):
+    impldir = tmp_path.joinpath("top.runs", "impl_1")
+    impldir.mkdir(parents=True)
+    impldir.joinpath("top_timing_summary_routed.rpt").write_text(TIMING_SUMMARY)
+    impldir.joinpath("top_utilization_placed.rpt").write_text(UTILIZATION)
+    impldir.joinpath("runme.log").write_text(RUN_LOG)
+    summary = parse_timing_summary(impldir.joinpath("top_timing_summary_routed.rpt"))
+    assert summary["setup_wns"] == pytest.approx(-0.5)
+    assert summary["setup_tns"] == pytest.approx(-2.0)
+    assert summary["hold_wns"] == pytest.approx(0.05)
+    assert summary["hold_tns"] == pytest.approx(0.0)
+    assert summary["fmax"] == {"clk": pytest.approx(222.22, abs=0.01), "clk_slow": pytest.approx(200.0)}
+    assert parse_utilization(impldir.joinpath("top_utilization_placed.rpt")) == {
+        "CLB LUTs": {"used": 1234, "available": 230400},
+        "CLB Registers": {"used": 2345, "available": 460800},
+    }
+    assert parse_run_log(impldir.joinpath("runme.log")) == {"route_design": {"elapsed": 65.0, "peak_memory": 3456.789}}
+    report = vivado_report(tmp_path, "top")
+    assert sorted(report) == ["fmax", "hold_tns", "hold_wns", "setup_tns", "setup_wns", "steps", "utilization"]
+    # NOTE: The reports of an earlier implementation run aren't parsed after a
+    #       synthesis run.
+    synthdir = tmp_path.joinpath("top.runs", "synth_1")
+    synthdir.mkdir()
+    synthdir.joinpath("top_utilization_synth.rpt").write_text(UTILIZATION.replace("1234", "1000"))
+    os.utime(synthdir.joinpath("top_utilization_synth.rpt"), (2000000000, 2000000000))
+    report = vivado_report(tmp_path, "top", since=1900000000)
+    assert report == {
+        "utilization": {
+            "CLB LUTs": {"used": 1000, "available": 230400},
+            "CLB Registers": {"used": 2345, "available": 460800},
+        }
+    }
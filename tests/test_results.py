@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import zlib
+from argparse import Namespace
+
+import pytest
+
+from simplhdl.matchers import COCOTB_MATCHERS, UVM_MATCHERS, LogMatcher, Severity
+from simplhdl.results import ResultsDatabase, SimulationLog, cocotb_results, save_build
+from simplhdl.utils import StopCommand
+from simplhdl_vivado.xsim.xsimflow import XsimFlow
+
+
+def test_simulation_log(tmp_path):
+    log = SimulationLog(tmp_path.joinpath("simulate.log"))
+    for line in [
+        "UVM_INFO @ 0: reporter [RNTST] Running test test_add...\n",
+        "UVM_ERROR top.sv(10) @ 100: uvm_test_top [CHK] mismatch\n",
+        "UVM_ERROR top.sv(10) @ 200: uvm_test_top [CHK] mismatch\n",
+        "UVM_WARNING top.sv(12) @ 300: uvm_test_top [CHK] slow\n",
+    ]:
+        log(line)
+    assert log.is_uvm
+    assert log.count("UVM_ERROR") == 2
+    assert log.count("UVM_FATAL") == 0
+    # NOTE: The report summary takes precedence over the counted messages.
+    for line in ["# UVM_WARNING :    1\n", "# UVM_ERROR :    3\n", "# UVM_FATAL :    0\n"]:
+        log(line)
+    log.close()
+    assert log.count("UVM_ERROR") == 3
+    assert log.count("UVM_WARNING") == 1
+    assert tmp_path.joinpath("simulate.log").read_text().count("\n") == 7
+
+    log = SimulationLog(tmp_path.joinpath("plain.log"))
+    log("Hello world\n")
+    log.close()
+    assert not log.is_uvm
+
+
+def test_simulation_log_matchers(tmp_path):
+    matchers = [
+        LogMatcher("QUESTASIM_ERROR", r"^#?\s*\*\* Error\b", Severity.ERROR),
+        LogMatcher("QUESTASIM_FATAL", r"^#?\s*\*\* Fatal\b", Severity.FATAL),
+        *UVM_MATCHERS,
+        *COCOTB_MATCHERS,
+    ]
+    log = SimulationLog(tmp_path.joinpath("simulate.log"), matchers, max_errors=3)
+    log("# ** Error: top.sv(12): Assertion error.\n")
+    log("# UVM_WARNING top.sv(10) @ 100: uvm_test_top [CHK] slow\n")
+    log("     ** test_alu.test_add   FAIL   10.00   0.01   1000.00  **\n")
+    assert (log.errors, log.fatals) == (2, 0)
+    with pytest.raises(StopCommand):
+        log("# ** Fatal: top.sv(20): $fatal\n")
+    log.close()
+    assert log.fatals == 1
+    assert log.count("COCOTB_FAIL") == 1
+    assert log.stopped is not None
+
+
+def test_cocotb_results(tmp_path):
+    xml = b"""<testsuites><testsuite name="all">
+        <testcase name="test_a"/>
+        <testcase name="test_b"><failure message="boom"/></testcase>
+        <testcase name="test_c"/>
+    </testsuite></testsuites>"""
+    path = tmp_path.joinpath("results.xml")
+    path.write_bytes(xml)
+    tests, failures, data = cocotb_results(path)
+    assert (tests, failures) == (3, 1)
+    assert zlib.decompress(data) == xml
+    path.write_text("<testsuites>")
+    assert cocotb_results(path) is None
+
+
+def test_database(tmp_path):
+    with ResultsDatabase(tmp_path.joinpath("results.db")) as database:
+        statuses = {
+            "test_add": ["passed", "passed", "passed"],
+            "test_sub": ["passed", "failed", "passed", "failed"],
+            "test_mul": ["failed"],
+        }
+        started = 0.0
+        for test, runs in statuses.items():
+            for i, status in enumerate(runs):
+                started += 1
+                database.record(
+                    started=started, flow="xsim", test=test, seed="1", status=status, wall_time=i + 1, tool_time=i
+                )
+        assert len(database.runs(limit=5)) == 5
+        assert database.runs(limit=1)[0]["test"] == "test_mul"
+        assert [row["test"] for row in database.latest("failed")] == ["test_mul", "test_sub"]
+        assert database.slowest(limit=1)[0]["test"] == "test_sub"
+        flaky = database.flaky()
+        assert [row["test"] for row in flaky] == ["test_sub"]
+        assert flaky[0]["changes"] == 3
+        assert flaky[0]["failures"] == 2
+
+
+def test_history(tmp_path):
+    with ResultsDatabase(tmp_path.joinpath("results.db")) as database:
+        for status, duration in [("failed", 1.0), ("passed", 2.0), ("passed", 4.0), ("passed", 6.0)]:
+            database.record_job("a", 1, status, duration)
+        database.record_job("b", None, "timeout", 8.0)
+        history = database.history(window=3)
+        assert history[("a", "1")].runs == 3
+        assert history[("a", "1")].duration == pytest.approx(4.0)
+        assert history[("a", "1")].failures == 0
+        assert not history[("a", "1")].failed
+        assert history[("b", None)].failed
+        assert database.history(window=4)[("a", "1")].failures == 1
+
+
+def test_save_build(tmp_path, monkeypatch):
+    monkeypatch.delenv("SIMPLHDL_RESULTS_DB", raising=False)
+    monkeypatch.setenv("SIMPLHDL_TARGET", "fpga")
+    builddir = tmp_path.joinpath("quartus")
+    builddir.mkdir()
+    report = {
+        "setup_wns": -0.25,
+        "setup_tns": -1.5,
+        "fmax": {"clk": 400.0, "clk_slow": 250.0},
+        "steps": {"Fitter": {"elapsed": 60.0, "peak_memory": 12345.0}, "Assembler": {"elapsed": 5.0}},
+    }
+    save_build(builddir, "quartus", "top", "compile", True, 100.0, report)
+    save_build(builddir, "quartus", "top", "compile", False, 200.0, dict())
+    assert json.loads(builddir.joinpath("report.json").read_text()) == dict()
+    with ResultsDatabase(tmp_path.joinpath("results.db")) as database:
+        latest, first = database.builds()
+        assert (latest["status"], latest["setup_wns"], latest["fmax"]) == ("failed", None, None)
+        assert (first["target"], first["design"], first["status"]) == ("fpga", "top", "passed")
+        assert (first["setup_wns"], first["fmax"], first["peak_memory"]) == (-0.25, 250.0, 12345.0)
+        assert json.loads(first["report"]) == report
+
+
+# NOTE: Reports an error when compiling and when simulating.
+MAKE = """#!{python}
+import sys
+print(f"ERROR: [XSIM 1-1] error of {{sys.argv[1]}}")
+"""
+
+
+def test_simulation_output(tmp_path, project, fileset, monkeypatch):
+    monkeypatch.delenv("SIMPLHDL_RESULTS_DB", raising=False)
+    bindir = tmp_path.joinpath("bin")
+    bindir.mkdir()
+    bindir.joinpath("make").write_text(MAKE.format(python=sys.executable))
+    bindir.joinpath("make").chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bindir}{os.pathsep}{os.environ['PATH']}")
+    project.defaultDesign.toplevels = {"top"}
+    builddir = tmp_path.joinpath("_build", "xsim")
+    builddir.mkdir(parents=True)
+    flow = XsimFlow("xsim", Namespace(step="simulate", gui=False, seed=1, max_errors=None), project, builddir)
+    flow.cocotb = Namespace(enabled=False)
+    flow.run_step("simulate")
+    # NOTE: Only the output of the simulation is scanned, not of the compile.
+    assert builddir.joinpath("simulate.log").read_text() == "ERROR: [XSIM 1-1] error of simulate\n"
+    with ResultsDatabase(tmp_path.joinpath("_build", "results.db")) as database:
+        (run,) = database.runs()
+        assert run["errors"] == 1
+        assert run["status"] == "failed"
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+from simplhdl.cli.arguments import flow_index, parse_arguments
+from simplhdl.cli.run import schedule, target_job
+from simplhdl.plugin.backend import Job
+from simplhdl.plugin.flow import FlowFactory
+from simplhdl.project.attributes import Target
+from simplhdl.results import JobHistory
+from simplhdl_vivado.xsim.xsimflow import XsimFlow
+
+
+def test_target_job(tmp_path, monkeypatch):
+    monkeypatch.setitem(FlowFactory.registry, "xsim", XsimFlow)
+    argv = ["-o", "other", "xsim", "--step", "compile"]
+    target = Target("a", args=parse_arguments(argv), cwd=tmp_path, argv=argv)
+    job = target_job(target, tmp_path.joinpath("_build", "run", "a"), seed=7)
+    assert job.name == "a:7"
+    assert job.cwd == tmp_path
+    assert job.command[:3] == [sys.executable, "-m", "simplhdl"]
+    args = parse_arguments(job.command[3:])
+    assert args.flow == "xsim"
+    assert args.step == "compile"
+    assert args.seed == "7"
+    assert args.outputdir == tmp_path.joinpath("_build", "run", "a")
+    assert job.logfile == Path(args.outputdir).joinpath("simpl.log")
+
+
+def test_target_job_option_value(tmp_path, monkeypatch):
+    monkeypatch.setitem(FlowFactory.registry, "xsim", XsimFlow)
+    # NOTE: The value of the output directory is the name of the flow.
+    argv = ["-v", "-o", "xsim", "xsim", "--step", "compile"]
+    assert flow_index(argv) == 3
+    target = Target("a", args=parse_arguments(argv), cwd=tmp_path, argv=argv)
+    job = target_job(target, tmp_path.joinpath("_build", "run", "a"))
+    args = parse_arguments(job.command[3:])
+    assert args.flow == "xsim"
+    assert args.step == "compile"
+    assert args.outputdir == tmp_path.joinpath("_build", "run", "a")
+
+
+def test_schedule(tmp_path):
+    def job(target: str, seed: int | None = None) -> Job:
+        return Job(f"{target}:{seed}", ["true"], tmp_path, tmp_path, tags={"target": target, "seed": seed})
+
+    jobs = [job("quick"), job("slow"), job("flaky"), job("broken"), job("seeds", 1), job("seeds", 2), job("new")]
+    history = {
+        ("quick", None): JobHistory(10, 1.0, 0, False),
+        ("slow", None): JobHistory(10, 100.0, 0, False),
+        ("flaky", None): JobHistory(10, 5.0, 3, False),
+        ("broken", None): JobHistory(10, 2.0, 1, True),
+        ("seeds", "1"): JobHistory(10, 50.0, 0, False),
+    }
+    names = [job.name for job in schedule(jobs, history)]
+    # NOTE: Seed 2 is expected to take as long as seed 1, and the new target
+    #       as long as the mean of all jobs.
+    assert names == ["broken:None", "flaky:None", "slow:None", "seeds:1", "seeds:2", "new:None", "quick:None"]
+    assert schedule(jobs, {}) == jobs
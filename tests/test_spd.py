@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+from simplhdl.plugin import GeneratorError
+from simplhdl.project.files import QuartusQsysFile
+from simplhdl_quartus import spd
+from simplhdl_quartus.spd import (
+    copy_qsysfile,
+    generate_spd,
+    generate_spds,
+    ip_key,
+    parse_qsys,
+    parse_spd,
+    qsys_level,
+    qsys_references,
+    qsys_sources,
+    referenced_ipfiles,
+    spd_path,
+)
+
+# NOTE: Writes the simulation package descriptor of the IP file given as the
+#       last argument, like qsys-generate --simulation, and logs the call.
+QSYS_GENERATE = """#!{python}
+import json, os, sys, time
+from pathlib import Path
+filename = Path(sys.argv[-1])
+start = time.time()
+time.sleep(0.3)
+if "broken" in filename.name:
+    sys.exit(1)
+spd = filename.parent.joinpath(filename.stem, filename.name).with_suffix(".spd")
+spd.parent.mkdir(exist_ok=True)
+spd.write_text("<simPackage/>")
+with open(os.environ["QSYS_GENERATE_LOG"], "a") as log:
+    log.write(json.dumps({{"file": filename.name, "start": start, "end": time.time()}}) + "\\n")
+"""
+
+
+@pytest.fixture
+def qsys_generate(tmp_path, monkeypatch):
+    bindir = tmp_path.joinpath("bin")
+    bindir.mkdir()
+    tool = bindir.joinpath("qsys-generate")
+    tool.write_text(QSYS_GENERATE.format(python=sys.executable))
+    tool.chmod(0o755)
+    logfile = tmp_path.joinpath("calls.log")
+    monkeypatch.setenv("PATH", f"{bindir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("QSYS_GENERATE_LOG", str(logfile))
+    monkeypatch.setenv("SIMPLHDL_QUARTUS_IP_CACHE", str(tmp_path.joinpath("cache")))
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path.joinpath("xdg")))
+    return logfile
+
+
+def test_generate_spds(tmp_path, qsys_generate):
+    ips = [tmp_path.joinpath(f"ip{i}.ip") for i in range(4)]
+    system = tmp_path.joinpath("system.qsys")
+    for path in ips:
+        path.write_text("")
+    system.write_text("<system/>")
+    start = time.time()
+    generate_spds([(system, tmp_path)] + [(ip, tmp_path) for ip in ips] + [(ips[0], None)], jobs=4)
+    # NOTE: The IP files are generated in parallel, and then the system.
+    assert time.time() - start < 1.2
+    calls = {call["file"]: call for call in map(json.loads, qsys_generate.read_text().splitlines())}
+    assert sorted(calls) == ["ip0.ip", "ip1.ip", "ip2.ip", "ip3.ip", "system.qsys"]
+    assert all(calls["system.qsys"]["start"] >= calls[ip.name]["end"] for ip in ips)
+    assert all(spd_path(path).exists() for path in ips + [system])
+
+    # NOTE: Generated files aren't generated again.
+    generate_spds([(ip, None) for ip in ips], jobs=4)
+    assert len(qsys_generate.read_text().splitlines()) == 5
+
+
+def test_generate_spds_error(tmp_path, qsys_generate):
+    ips = [tmp_path.joinpath(name) for name in ("good.ip", "broken.ip")]
+    for path in ips:
+        path.write_text("")
+    with pytest.raises(GeneratorError, match=r"broken\.ip"):
+        generate_spds([(ip, None) for ip in ips], jobs=2)
+    assert spd_path(ips[0]).exists()
+
+
+def test_generate_spd_cache(tmp_path, qsys_generate):
+    def calls() -> int:
+        return len(qsys_generate.read_text().splitlines()) if qsys_generate.exists() else 0
+
+    builddirs = [tmp_path.joinpath(name) for name in ("build1", "build2")]
+    for builddir in builddirs:
+        builddir.mkdir()
+        builddir.joinpath("ram.ip").write_text("<ip>ram</ip>")
+    generate_spd(builddirs[0].joinpath("ram.ip"))
+    assert calls() == 1
+    # NOTE: Another build directory gets the simulation files from the cache.
+    assert generate_spd(builddirs[1].joinpath("ram.ip")).exists()
+    assert calls() == 1
+    # NOTE: A changed IP file is generated again.
+    builddirs[0].joinpath("ram.ip").write_text("<ip>ram 2</ip>")
+    generate_spd(builddirs[0].joinpath("ram.ip"))
+    assert calls() == 2
+    generate_spd(builddirs[0].joinpath("ram.ip"))
+    assert calls() == 2
+    # NOTE: Simulation files without a key are used as they are.
+    delivered = tmp_path.joinpath("rom.ip")
+    delivered.write_text("<ip>rom</ip>")
+    spd_path(delivered).parent.mkdir()
+    spd_path(delivered).write_text("<simPackage/>")
+    generate_spd(delivered)
+    assert calls() == 2
+
+
+def test_ip_key(tmp_path, qsys_generate):
+    system = tmp_path.joinpath("top.qsys")
+    system.write_text('<system><module kind="blinker" name="blinker_0"/></system>')
+    component = tmp_path.joinpath("components", "blinker")
+    component.joinpath("hdl").mkdir(parents=True)
+    component.joinpath("blinker_hw.tcl").write_text("add_fileset_file blinker.v VERILOG PATH hdl/blinker.v")
+    component.joinpath("hdl", "blinker.v").write_text("module blinker; endmodule")
+    key = ip_key(system, tmp_path)
+    generate_spd(system, tmp_path)
+    # NOTE: The generated files don't change the key.
+    assert ip_key(system, tmp_path) == key
+    # NOTE: A changed HDL file of a custom component is generated again.
+    component.joinpath("hdl", "blinker.v").write_text("module blinker(input clk); endmodule")
+    assert ip_key(system, tmp_path) != key
+    generate_spd(system, tmp_path)
+    assert len(qsys_generate.read_text().splitlines()) == 2
+    # NOTE: Other files in the directory don't change the key.
+    key = ip_key(system, tmp_path)
+    tmp_path.joinpath("notes.txt").write_text("notes")
+    assert ip_key(system, tmp_path) == key
+
+
+def test_parse_spd(tmp_path):
+    spdfile = tmp_path.joinpath("ram.spd")
+    spdfile.write_text(
+        """<?xml version="1.0" encoding="UTF-8"?>
+<simPackage>
+  <file path="ram.v" type="VERILOG" library="ram_lib" />
+  <file path="ram_enc.v" type="VERILOG_ENCRYPT" library="ram_lib" simulator="vcs,riviera" />
+  <topLevel name="ram" />
+</simPackage>"""
+    )
+    assert parse_spd(spdfile) == [
+        {"path": "ram.v", "type": "VERILOG", "library": "ram_lib"},
+        {"path": "ram_enc.v", "type": "VERILOG_ENCRYPT", "library": "ram_lib", "simulator": "vcs,riviera"},
+    ]
+
+
+PRO_QSYS = """<?xml version="1.0" encoding="UTF-8"?>
+<ipxact:design xmlns:ipxact="http://www.accellera.org/XMLSchema/IPXACT/1685-2014">
+  <ipxact:componentInstances>
+    <ipxact:componentInstance>
+      <ipxact:instanceName>{name}</ipxact:instanceName>
+      <ipxact:configurableElementValues>
+{values}
+      </ipxact:configurableElementValues>
+    </ipxact:componentInstance>
+  </ipxact:componentInstances>
+</ipxact:design>
+"""
+
+
+def write_qsys(path, *names: str) -> None:
+    values = "\n".join(f"<ipxact:value>{name}</ipxact:value>" for name in names)
+    path.write_text(PRO_QSYS.format(name=path.stem, values=values))
+
+
+def test_parse_qsys(tmp_path):
+    standard = b"""<system name="top">
+      <module name="ram" kind="altera_ram">
+        <parameter name="logicalView">ip/ram.ip</parameter>
+        <parameter name="width">32</parameter>
+      </module>
+    </system>"""
+    assert parse_qsys(tmp_path, standard) == ["ip/ram.ip"]
+    write_qsys(tmp_path.joinpath("top.qsys"), "rom.ip", "sub.qsys", "rom.ip", "1024")
+    assert parse_qsys(tmp_path, tmp_path.joinpath("top.qsys").read_bytes()) == ["rom.ip", "sub.qsys"]
+    with pytest.raises(GeneratorError):
+        parse_qsys(tmp_path, b"<system>")
+
+
+def test_referenced_ipfiles(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path.joinpath("cache")))
+    write_qsys(tmp_path.joinpath("top.qsys"), "ram.ip", "sub.qsys", "fifo.qsys")
+    write_qsys(tmp_path.joinpath("sub.qsys"), "rom.ip", "fifo.qsys", "top.qsys")
+    write_qsys(tmp_path.joinpath("fifo.qsys"), "fifo.ip")
+    files = referenced_ipfiles(tmp_path.joinpath("top.qsys"), tmp_path)
+    assert [f.name for f in files] == ["fifo.ip", "ram.ip", "rom.ip", "fifo.qsys", "sub.qsys"]
+    assert qsys_level(tmp_path.joinpath("top.qsys"), tmp_path) == 3
+    assert qsys_level(tmp_path.joinpath("fifo.qsys"), tmp_path) == 1
+
+    # NOTE: The references are cached by the digest of the system.
+    assert len(list(tmp_path.joinpath("cache", "simplhdl", "quartus", "qsys").glob("*.json"))) == 3
+    spd._qsys_references.clear()
+    monkeypatch.setattr(spd, "parse_qsys", None)
+    assert qsys_references(tmp_path.joinpath("fifo.qsys")) == ["fifo.ip"]
+
+
+def test_copy_qsysfile(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path.joinpath("cache")))
+    monkeypatch.setenv("SIMPLHDL_QUARTUS_LINK", "hardlink")
+    monkeypatch.setenv("SIMPLHDL_QUARTUS_QSYS_SOURCES", "referenced")
+    write_qsys(tmp_path.joinpath("top.qsys"), "ip/ram.ip")
+    tmp_path.joinpath("ip", "ram", "sim").mkdir(parents=True)
+    tmp_path.joinpath("ip", "ram.ip").write_text("<ip>ram</ip>")
+    tmp_path.joinpath("ip", "ram", "sim", "ram.v").write_text("module ram; endmodule")
+    tmp_path.joinpath("mem").mkdir()
+    tmp_path.joinpath("mem", "init.hex").write_text(":00000001FF")
+    # NOTE: A custom component adds its HDL files with add_fileset_file.
+    tmp_path.joinpath("components", "blinker", "hdl").mkdir(parents=True)
+    tmp_path.joinpath("components", "blinker", "blinker_hw.tcl").write_text("add_fileset_file hdl/blinker.v")
+    tmp_path.joinpath("components", "blinker", "hdl", "blinker.v").write_text("module blinker; endmodule")
+    tmp_path.joinpath("unrelated").mkdir()
+    tmp_path.joinpath("unrelated", "large.bin").write_bytes(bytes(1024))
+    # NOTE: The build directory is in the directory of the system.
+    qsysdir = tmp_path.joinpath("_build", "qsys")
+    file = copy_qsysfile(QuartusQsysFile(tmp_path.joinpath("top.qsys")), qsysdir)
+    assert file.path == qsysdir.joinpath("top", "top.qsys").resolve()
+    copied = sorted(p.relative_to(qsysdir, "top").as_posix() for p in qsysdir.joinpath("top").rglob("*") if p.is_file())
+    assert copied == [
+        "components/blinker/blinker_hw.tcl",
+        "components/blinker/hdl/blinker.v",
+        "ip/ram.ip",
+        "ip/ram/sim/ram.v",
+        "mem/init.hex",
+        "top.qsys",
+    ]
+    assert qsysdir.joinpath("top", "mem", "init.hex").samefile(tmp_path.joinpath("mem", "init.hex"))
+
+    # NOTE: All files in the directory of the system are used by default.
+    monkeypatch.delenv("SIMPLHDL_QUARTUS_QSYS_SOURCES")
+    sources = qsys_sources(tmp_path.joinpath("top.qsys"), exclude=qsysdir.joinpath("top"))
+    assert "unrelated/large.bin" in sources
+    assert "components/blinker/hdl/blinker.v" in sources
+    assert not any(name.startswith("_build/qsys/top/") for name in sources)
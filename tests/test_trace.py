@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import json
+
+from simplhdl import trace
+
+
+def test_trace(tmp_path):
+    trace.clear()
+
+    @trace.traced()
+    def compile():
+        with trace.span("make", "sh", command="make compile"):
+            pass
+
+    compile()
+    compile()
+    assert [(c, n, count) for c, n, count, _ in trace.tracer.summary()] == [
+        ("simplhdl", "test_trace.<locals>.compile", 2),
+        ("sh", "make", 2),
+    ]
+    trace.write(tmp_path / "trace.json")
+    with (tmp_path / "trace.json").open() as f:
+        events = json.load(f)["traceEvents"]
+    assert len(events) == 4
+    assert events[1]["args"] == {"command": "make compile"}
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+import zipfile
+
+import pytest
+
+from simplhdl import utils
+from simplhdl.utils import (
+    CalledShError,
+    FileMemo,
+    OutputWriter,
+    StopCommand,
+    extract_zip,
+    link_file,
+    listen,
+    sh,
+    sync_files,
+)
+
+
+def test_output_writer(tmp_path):
+    output = tmp_path / "Makefile"
+    writer = OutputWriter()
+    assert writer.write(output, "all:\n")
+    assert not writer.write(output, "all:\n")
+    assert writer.write(output, "all: sim\n")
+    assert output.read_text() == "all: sim\n"
+    assert (writer.written, writer.rewritten) == (3, 2)
+    assert [p.name for p in tmp_path.iterdir()] == ["Makefile"]
+
+
+def test_output_writer_detects_external_change(tmp_path):
+    output = tmp_path / "Makefile"
+    writer = OutputWriter()
+    writer.write(output, "all:\n")
+    output.write_text("all: changed\n")
+    assert writer.write(output, "all:\n")
+    assert output.read_text() == "all:\n"
+
+
+def test_output_writer_digestfile(tmp_path):
+    output = tmp_path / "Makefile"
+    digestfile = tmp_path / "generated.digest"
+    with OutputWriter(digestfile) as writer:
+        writer.write(output, "all:\n")
+    with OutputWriter(digestfile) as writer:
+        assert str(output.absolute()) in writer.digests
+        assert not writer.write(output, "all:\n")
+        assert writer.rewritten == 0
+
+
+def test_sh_stop():
+    def listener(line: str) -> None:
+        if "stop" in line:
+            raise StopCommand("stopped")
+
+    script = "import time; print('stop', flush=True); time.sleep(30)"
+    start = time.perf_counter()
+    with listen(listener), pytest.raises(CalledShError, match="stopped"):
+        sh([sys.executable, "-c", script], output=True)
+    assert time.perf_counter() - start < 10
+
+
+def test_file_memo(tmp_path):
+    reads = list()
+
+    def read(path):
+        reads.append(path)
+        return path.read_text()
+
+    memo = FileMemo(read)
+    path = tmp_path.joinpath("a.txt")
+    path.write_text("a")
+    assert memo(path) == "a"
+    assert memo(path) == "a"
+    assert len(reads) == 1
+    path.write_text("bb")
+    assert memo(path) == "bb"
+    assert len(reads) == 2
+
+
+@pytest.mark.parametrize("method", ["copy", "hardlink", "symlink", "reflink"])
+def test_sync_files(tmp_path, method):
+    src = tmp_path.joinpath("src")
+    src.mkdir()
+    for name in ("a.ip", "b.hex"):
+        src.joinpath(name).write_text(name)
+    dest = tmp_path.joinpath("dest")
+    manifest = tmp_path.joinpath("dest.json")
+    files = {"a.ip": src.joinpath("a.ip"), "data/b.hex": src.joinpath("b.hex")}
+    assert sync_files(files, dest, manifest, method) == 2
+    assert dest.joinpath("data", "b.hex").read_text() == "b.hex"
+    assert sync_files(files, dest, manifest, method) == 0
+    # NOTE: A touched file with the same content isn't synced again.
+    os.utime(src.joinpath("a.ip"), ns=(0, 0))
+    assert sync_files(files, dest, manifest, method) == 0
+    src.joinpath("b.hex").unlink()
+    src.joinpath("b.hex").write_text("b.hex 2")
+    assert sync_files(files, dest, manifest, method) == 1
+    assert dest.joinpath("data", "b.hex").read_text() == "b.hex 2"
+    assert sync_files({"a.ip": src.joinpath("a.ip")}, dest, manifest, method) == 0
+    assert not dest.joinpath("data", "b.hex").exists()
+    assert src.joinpath("b.hex").read_text() == "b.hex 2"
+
+
+def test_link_file(tmp_path):
+    src = tmp_path.joinpath("a.ip")
+    src.write_text("a")
+    dst = tmp_path.joinpath("b.ip")
+    assert link_file(src, dst, "hardlink") == "hardlink"
+    # NOTE: Replacing a hardlink doesn't change the file it's linked to.
+    other = tmp_path.joinpath("c.ip")
+    other.write_text("c")
+    link_file(other, dst, "copy")
+    assert (src.read_text(), dst.read_text()) == ("a", "c")
+    assert link_file(src, dst, "reflink") in ("reflink", "copy")
+
+
+def write_zip(path, members: dict[str, bytes]) -> None:
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zip:
+        for name, data in members.items():
+            zip.writestr(name, data)
+
+
+def test_extract_zip(tmp_path):
+    archive = tmp_path.joinpath("ram.ip.zip")
+    dest = tmp_path.joinpath("ips")
+    manifest = tmp_path.joinpath("ram.ip.json")
+    write_zip(archive, {"ram.ip": b"ram", "ram/sim/ram.v": b"module ram;", "ram/sim/old.v": b"old", "../evil": b""})
+    assert extract_zip(archive, dest, manifest) == 3
+    assert not tmp_path.joinpath("evil").exists()
+    mtimes = {p.name: p.stat().st_mtime_ns for p in dest.rglob("*.*")}
+    assert extract_zip(archive, dest, manifest) == 0
+
+    # NOTE: Only the changed members are written, and removed members are
+    #       removed.
+    write_zip(archive, {"ram.ip": b"ram", "ram/sim/ram.v": b"module ram2;", "ram/sim/new.v": b"new"})
+    assert extract_zip(archive, dest, manifest) == 2
+    assert dest.joinpath("ram.ip").stat().st_mtime_ns == mtimes["ram.ip"]
+    assert dest.joinpath("ram", "sim", "ram.v").read_bytes() == b"module ram2;"
+    assert not dest.joinpath("ram", "sim", "old.v").exists()
+
+    # NOTE: Files changed in the directory are found without the manifest.
+    dest.joinpath("ram.ip").write_bytes(b"RAM")
+    manifest.unlink()
+    assert extract_zip(archive, dest, manifest) == 1
+    assert dest.joinpath("ram.ip").read_bytes() == b"ram"
+
+
+def test_extract_zip_parallel(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "PARALLEL_EXTRACT_SIZE", 0)
+    archive = tmp_path.joinpath("ip.xcix")
+    members = {f"ip/sim/f{i}.v": os.urandom(1024) for i in range(16)}
+    write_zip(archive, members)
+    assert extract_zip(archive, tmp_path.joinpath("ips"), tmp_path.joinpath("ip.json"), jobs=4) == 16
+    assert all(tmp_path.joinpath("ips", name).read_bytes() == data for name, data in members.items())
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from simplhdl import watch
+from simplhdl.watch import Watcher
+
+
+def touch_later(*paths):
+    def touch():
+        for path in paths:
+            path.write_text("changed\n")
+
+    timer = threading.Timer(0.1, touch)
+    timer.start()
+    return timer
+
+
+@pytest.mark.parametrize("inotify", [True, False])
+def test_watcher(tmp_path, monkeypatch, inotify):
+    if not inotify:
+        monkeypatch.setattr(watch, "_libc", lambda: None)
+    a = tmp_path / "a.sv"
+    b = tmp_path / "b.sv"
+    c = tmp_path / "c.sv"
+    for path in (a, b, c):
+        path.write_text("module x;\nendmodule\n")
+    with Watcher([a, b], debounce=0.2, interval=0.05) as watcher:
+        assert (watcher.fd is not None) == (inotify and watch._libc() is not None)
+        timer = touch_later(a, b, c)
+        assert watcher.wait() == {a, b}
+        timer.join()